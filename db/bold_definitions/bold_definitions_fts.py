@@ -0,0 +1,160 @@
+"""FTS5 trigram indexes over the bold definitions,
+to narrow down the rows before a regex search runs over them.
+
+- bold_definitions_fts indexes bold and commentary as they are.
+- bold_definitions_fuzzy indexes them folded by fuzzy_fold,
+  for the fuzzy search option.
+
+A regex is reduced to the literal text every match must contain,
+and only rows containing all of it are searched with the regex."""
+
+import re
+
+# the stdlib regex parser is private, it moved from sre_parse to
+# re._parser in python 3.11 and may move again. Without it no literals
+# are found, so every search falls back to the full scan.
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    sre_parse = None
+
+from sqlalchemy import literal_column, select, table, text
+from sqlalchemy.orm import Query, Session
+
+fts_table = "bold_definitions_fts"
+fuzzy_table = "bold_definitions_fuzzy"
+
+# the trigram tokenizer can't match anything shorter
+min_literal_length = 3
+
+# every spelling the fuzzy search allows folds to the same text:
+# long vowels to short, nasals to n, retroflexes to dentals,
+# aspirates to plain, and double letters to single
+fuzzy_fold_table = str.maketrans({
+    "ā": "a",
+    "ī": "i",
+    "ū": "u",
+    "ṅ": "n",
+    "ñ": "n",
+    "ṇ": "n",
+    "ṃ": "n",
+    "m": "n",
+    "ṭ": "t",
+    "ḍ": "d",
+    "ḷ": "l",
+    "h": None,
+})
+
+
+def fuzzy_fold(string: str) -> str:
+    return re.sub(r"(.)\1+", r"\1", string.translate(fuzzy_fold_table))
+
+
+def make_bold_definitions_fts(db_session: Session) -> None:
+    """(Re)build both indexes from the bold_definitions table."""
+
+    for name in [fts_table, fuzzy_table]:
+        db_session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+    db_session.execute(text(
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+        "bold, commentary, content='bold_definitions', content_rowid='id', "
+        "tokenize='trigram')"))
+    db_session.execute(text(
+        f"INSERT INTO {fts_table}({fts_table}) VALUES('rebuild')"))
+
+    # contentless, only the index is stored
+    db_session.execute(text(
+        f"CREATE VIRTUAL TABLE {fuzzy_table} USING fts5("
+        "bold, commentary, content='', tokenize='trigram')"))
+    results = db_session.execute(text(
+        "SELECT id, bold, commentary FROM bold_definitions"))
+    db_session.execute(
+        text(
+            f"INSERT INTO {fuzzy_table}(rowid, bold, commentary) "
+            "VALUES(:id, :bold, :commentary)"),
+        [
+            {
+                "id": id,
+                "bold": fuzzy_fold(bold),
+                "commentary": fuzzy_fold(commentary)
+            }
+            for id, bold, commentary in results
+        ])
+    db_session.commit()
+
+
+def fts_exists(db_session: Session) -> bool:
+    result = db_session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name IN (:fts, :fuzzy)"),
+        {"fts": fts_table, "fuzzy": fuzzy_table})
+    return len(result.all()) == 2
+
+
+def required_literals(pattern: str) -> list[str]:
+    """Runs of literal text which every match of the regex must contain,
+    i.e. runs of plain characters outside any group, class, repeat or
+    alternation. An invalid regex has none."""
+
+    if sre_parse is None:
+        return []
+
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+
+    # an alternation at the top level parses to a single BRANCH,
+    # so it has no literals
+    literals: list[str] = []
+    run = ""
+    for op, av in parsed:
+        if op == sre_parse.LITERAL:
+            run += chr(av)
+        else:
+            literals.append(run)
+            run = ""
+    literals.append(run)
+    return [x for x in literals if len(x) >= min_literal_length]
+
+
+def match_terms(column: str, literals: list[str]) -> list[str]:
+    """FTS5 phrases matching the literals in one column."""
+    terms: list[str] = []
+    for literal in literals:
+        escaped = literal.replace('"', '""')
+        terms.append(f'{column}:"{escaped}"')
+    return terms
+
+
+def fts_prefilter(
+        query: Query,
+        id_column,
+        bold_pattern: str,
+        commentary_pattern: str,
+        fuzzy: bool = False
+) -> Query:
+    """Restrict the query to the ids whose bold and commentary
+    contain the literal parts of the patterns. For the fuzzy search,
+    pass the patterns before fuzzy_replace."""
+
+    bold_literals = required_literals(bold_pattern)
+    commentary_literals = required_literals(commentary_pattern)
+    if fuzzy:
+        bold_literals = [
+            x for x in map(fuzzy_fold, bold_literals)
+            if len(x) >= min_literal_length]
+        commentary_literals = [
+            x for x in map(fuzzy_fold, commentary_literals)
+            if len(x) >= min_literal_length]
+
+    terms = match_terms("bold", bold_literals) \
+        + match_terms("commentary", commentary_literals)
+    if not terms:
+        return query
+
+    index_table = fuzzy_table if fuzzy else fts_table
+    matching_ids = select(literal_column("rowid")) \
+        .select_from(table(index_table)) \
+        .where(literal_column(index_table).op("MATCH")(" AND ".join(terms)))
+    return query.filter(id_column.in_(matching_ids))
@@ -9,6 +9,8 @@ from rich import print
 from db.models import BoldDefinition
 from db.get_db_session import get_db_session
 
+from db.bold_definitions.bold_definitions_fts import make_bold_definitions_fts
+
 from db.bold_definitions.functions import useless_endings
 from db.bold_definitions.functions import file_list
 from db.bold_definitions.functions import definition_to_dict
@@ -213,6 +215,11 @@ def update_db(pth, bold_definitions):
     db_session.add_all(add_to_db)
     db_session.commit()
 
+    # the search indexes would still hold the old rows' ids
+    print("[green]indexing for search")
+    make_bold_definitions_fts(db_session)
+    db_session.close()
+
 
 if __name__ == "__main__":
     main()
@@ -3,6 +3,7 @@
 """Update the bold definitions table from a previously saved tsv."""
 
 from rich import print
+from db.bold_definitions.bold_definitions_fts import make_bold_definitions_fts
 from db.get_db_session import get_db_session
 from db.models import BoldDefinition
 from tools.paths import ProjectPaths
@@ -44,6 +45,10 @@ def main():
     db_session.execute(BoldDefinition.__table__.delete()) # type: ignore
     db_session.add_all(add_to_db)
     db_session.commit()
+    print("ok")
+
+    print("[green]indexing for search", end=" ")
+    make_bold_definitions_fts(db_session)
     db_session.close()
     print("ok")
     toc()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmarks for the sandhi splitter."""
+
+import csv
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+from typing import Optional
+
+from rich import print
+
+from db.deconstructor import sandhi_splitter
+from db.deconstructor.sandhi_splitter import import_sandhi_rules
+from db.deconstructor.sandhi_splitter import make_rules_index
+from tools.paths import ProjectPaths
+
+# a fixed sample of long compounds from the commentaries
+word_sample = [
+    "pathavīkasiṇasamāpattintiādi",
+    "dūteyyapahinagamanānuyogapabhedaṃ",
+    "bhāvanārāmāriyavaṃsaṃ",
+    "suttantabhājanīyaabhidhammabhājanīyapañhapucchakanayānaṃ",
+    "anuttaradakkhiṇeyyatāuttamapūjanīyanamassanīyabhāvapūjananamassanakiriyāya",
+    "dukkhānupassanāvisesoyeva",
+    "sammāsambuddhantyādimāha",
+    "vimissanavasena",
+    "gosaddantassāvādesaṃ",
+    "abhivaggenapi",
+    "samāpattiyāpi",
+    "tasmātiha",
+]
+
+repeats = 100
+slowest_count = 100
+
+splitter_path = "db/deconstructor/sandhi_splitter.py"
+
+
+def junctions(word: str):
+    """Every (last letter of A, first letter of B) pair in a word."""
+    for x in range(0, len(word)-1):
+        yield word[-x-2], word[-x-1]
+
+
+def rules_scan(rules) -> float:
+    start = time.perf_counter()
+    for __ in range(repeats):
+        for word in word_sample:
+            for wordA_lastletter, wordB_firstletter in junctions(word):
+                for rule in rules:
+                    if (wordA_lastletter == rules[rule]["chA"] and
+                            wordB_firstletter == rules[rule]["chB"]):
+                        pass
+    return time.perf_counter() - start
+
+
+def rules_index_lookup(rules_index) -> float:
+    start = time.perf_counter()
+    for __ in range(repeats):
+        for word in word_sample:
+            for junction in junctions(word):
+                for __rule in rules_index.get(junction, []):
+                    pass
+    return time.perf_counter() - start
+
+
+def slowest_words(pth: ProjectPaths, count: int) -> list[str]:
+    """The slowest words of the last run, from timer.tsv"""
+    with open(pth.sandhi_timer_path) as f:
+        timings = [
+            (float(row[1]), row[0])
+            for row in csv.reader(f, delimiter="\t") if len(row) == 2]
+    timings.sort(reverse=True)
+    return [word for __time, word in timings[:count]]
+
+
+def split_words(words: list[str]) -> float:
+    """Split the words from a cold start."""
+    sandhi_splitter.matches_dict = {}
+    if sandhi_splitter.residue_cache is not None:
+        sandhi_splitter.residue_cache = sandhi_splitter.ResidueCache(
+            sandhi_splitter.residue_cache_size)
+    start = time.perf_counter()
+    for counter, word in enumerate(words):
+        sandhi_splitter.split_word(counter, word)
+    return time.perf_counter() - start
+
+
+def find_baseline_revision() -> Optional[str]:
+    """The last revision of the splitter with DotDict and the linear
+    rules scan, i.e. the parent of the commit which added the rules index."""
+    try:
+        commits = subprocess.check_output(
+            ["git", "log", "--format=%H", "--reverse",
+             "-S", "def make_rules_index", "--", splitter_path],
+            text=True, stderr=subprocess.DEVNULL).split()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    if not commits:
+        return None
+    return f"{commits[0]}^"
+
+
+def load_baseline(revision: str) -> types.ModuleType:
+    """The splitter as it was at the revision, from git,
+    sharing the assets already loaded into the current one."""
+
+    source = subprocess.check_output(
+        ["git", "show", f"{revision}:{splitter_path}"],
+        text=True)
+    baseline = types.ModuleType("sandhi_splitter_baseline")
+    exec(compile(source, f"{revision}:sandhi_splitter.py", "exec"),
+         baseline.__dict__)
+
+    baseline.rules = sandhi_splitter.rules
+    baseline.shortlist_set = sandhi_splitter.shortlist_set
+    baseline.unmatched_set = set(sandhi_splitter.unmatched_set)
+    baseline.all_inflections_set = sandhi_splitter.all_inflections_set
+    (baseline.all_inflections_nofirst,
+        baseline.all_inflections_nolast) = \
+        baseline.make_all_inflections_nfl_nll(baseline.all_inflections_set)
+    return baseline
+
+
+def split_words_baseline(baseline: types.ModuleType, words: list[str]) -> float:
+    """Split the words with the baseline, the way its main() did."""
+    baseline.matches_dict = {}
+    start = time.perf_counter()
+    for counter, word in enumerate(words):
+        baseline.w = baseline.Word(word)
+        baseline.matches_dict[word] = []
+        d = baseline.DotDict(baseline.default_dot_dict_init(counter, word))
+        d = baseline.two_word_sandhi(d)
+        if d.word.endswith(("tissa", "tissā")):
+            d = baseline.remove_tissa(d)
+        if not baseline.w.matches:
+            d = baseline.three_word_sandhi(d)
+        if not baseline.w.matches:
+            baseline.recursive_removal(d)
+    return time.perf_counter() - start
+
+
+def split_slowest_words(pth: ProjectPaths, revision: str) -> None:
+    """Split the slowest words of the last run with the baseline and the
+    current splitter, reporting time, unmatched words, the words whose
+    matches differ and the peak memory of the search."""
+
+    words = slowest_words(pth, slowest_count)
+    if not words:
+        print("[red]no timer.tsv, run sandhi_splitter.py first")
+        return
+
+    sandhi_splitter.load_assets(pth)
+
+    try:
+        baseline = load_baseline(revision)
+    except subprocess.CalledProcessError:
+        print(f"[red]{splitter_path} not found at {revision}")
+        return
+
+    print(f"[green]splitting the {len(words)} slowest words at {revision}")
+    baseline_time = split_words_baseline(baseline, words)
+
+    print(f"[green]splitting the {len(words)} slowest words")
+    split_time = split_words(words)
+    no_match = sum(
+        1 for word in words if not sandhi_splitter.matches_dict[word])
+
+    tracemalloc.start()
+    split_words(words)
+    __current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    different = sum(
+        1 for word in words
+        if {x[0] for x in baseline.matches_dict[word]}
+        != {x[0] for x in sandhi_splitter.matches_dict[word]})
+
+    print(f"{'baseline time':<20}{baseline_time:>10.4f}s")
+    print(f"{'time':<20}{split_time:>10.4f}s")
+    print(f"{'speedup':<20}{baseline_time / split_time:>10.1f}x")
+    print(f"{'per word':<20}{split_time / len(words):>10.4f}s")
+    print(f"{'no match':<20}{no_match:>10,}")
+    print(f"{'different splits':<20}{different:>10,}")
+    print(f"{'peak memory':<20}{peak / 1024 / 1024:>10.2f}MB")
+
+
+def main():
+    print("[bright_yellow]sandhi splitter benchmarks")
+    pth = ProjectPaths()
+
+    rules = import_sandhi_rules(pth)
+    rules_index = make_rules_index(rules)
+
+    print("[green]rule lookup per junction")
+    scan_time = rules_scan(rules)
+    index_time = rules_index_lookup(rules_index)
+    print(f"{'linear scan':<20}{scan_time:>10.4f}s")
+    print(f"{'rules index':<20}{index_time:>10.4f}s")
+    print(f"{'speedup':<20}{scan_time / index_time:>10.1f}x")
+
+    # the revision to compare against, or the one before the rules index
+    if len(sys.argv) > 1:
+        revision = sys.argv[1]
+    else:
+        revision = find_baseline_revision()
+    if revision is None:
+        print(
+            "[red]the splitter before the rules index isn't in the git history, "
+            "pass a revision to compare against")
+        return
+    split_slowest_words(pth, revision)
+
+
+if __name__ == "__main__":
+    main()
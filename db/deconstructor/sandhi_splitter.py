@@ -3,16 +3,23 @@
 """Recursive algorithm to deconstruct compounds and split sandhi. """
 
 import cProfile
+import hashlib
+import json
 import logging
+import os
 import pandas as pd
 import pickle
-import re
+import psutil
 import time
 
+from collections import OrderedDict
+from multiprocessing import Process
+from pathlib import Path
 from rich import print
-from typing import Optional, Set, TypedDict, Union, Self
+from typing import Dict, List, Optional, Set, Tuple
 from os import popen
 
+from tools.affix_trie import AffixTrie, load_tries, save_tries
 from tools.pali_alphabet import vowels, double_consonants
 from tools.tic_toc import tic, toc, bip, bop
 from tools.paths import ProjectPaths
@@ -43,6 +50,9 @@ global max_recursions
 global profiler
 global profiler_on
 global max_word_length
+global residue_cache_on
+global residue_cache_size
+global checkpoint_every
 clean_list_max_length = 3
 fuzzy_list_max_length = 4
 clean_word_min_length = 2
@@ -52,6 +62,53 @@ max_recursions = 15
 profiler_on = False
 profiler: Optional[cProfile.Profile] = None
 max_word_length = 1000
+residue_cache_on = True
+residue_cache_size = 200_000
+checkpoint_every = 100
+checkpoint_done = "#done\t"
+
+
+class ResidueCache:
+    """Bounded LRU memo of the decompositions each
+    (residual word, recursion depth) yields, shared by all words in a run."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.cache: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return (self.hits / lookups) * 100 if lookups else 0.0
+
+
+double_consonants_tuple = tuple(double_consonants)
+
+# affix trie flags
+IN_INFLECTIONS = 1
+IN_NOLAST = 2
+IN_NOFIRST = 2
+
+# (chA, chB) > [(rule number, ch1, ch2), ...]
+RulesIndex = Dict[Tuple[str, str], List[Tuple[int, str, str]]]
 
 
 class Word:
@@ -66,6 +123,8 @@ class Word:
         self.front = ""
         self.back = ""
         self.start_time = time.time()
+        # the word this residue belongs to already had matches
+        self.outer_matched = False
 
     @property
     def comp(self):
@@ -82,75 +141,95 @@ class Word:
         return word_copy
     
 
-class DotDictInit(TypedDict):
-    count: int
-    comm: str
-    init: str
-    front: str
-    word: str
-    back: str
-    rules_front: str
-    rules_back: str
-    tried: set
-    matches: set
-    path: str
-    processes: int
-
-def default_dot_dict_init(counter: int, word: str) -> DotDictInit:
-    return DotDictInit(
-        count = counter,
-        comm = "start",
-        init = word,
-        front = "",
-        word = word,
-        back = "",
-        rules_front = "",
-        rules_back = "",
-        tried = set(),
-        matches =  set(),
-        path = "start",
-        processes = 0,
-    )
-
-class DotDict:
-    count = 0
-    comm = "start"
-    init = ""
-    front = ""
-    back = ""
-    rules_front = ""
-    rules_back = ""
-    word = ""
-    tried = set()
-    matches = set()
-    path = "start"
-    processes = 0
-
-    def __init__(self, d: Union[DotDictInit, Self]):
-        if isinstance(d, dict):
-            for key in d:
-                setattr(self, key, d[key])
-
-        elif isinstance(d, DotDict):
-            for key in d.__dict__:
-                setattr(self, key, getattr(d, key))
+class PathNode:
+    """The state of one branch of the search.
+    Nodes are never changed: every step makes a new node with `replace`,
+    which shares all the unchanged strings with its parent,
+    so nothing needs to be copied or restored between branches."""
+
+    __slots__ = (
+        "count", "comm", "init", "front", "word", "back",
+        "rules_front", "rules_back", "path", "processes")
+
+    def __init__(
+            self, count: int, comm: str, init: str,
+            front: str, word: str, back: str,
+            rules_front: str, rules_back: str,
+            path: str, processes: int
+    ):
+        self.count = count
+        self.comm = comm
+        self.init = init
+        self.front = front
+        self.word = word
+        self.back = back
+        self.rules_front = rules_front
+        self.rules_back = rules_back
+        self.path = path
+        self.processes = processes
+
+    @classmethod
+    def start(cls, counter: int, word: str) -> "PathNode":
+        return cls(counter, "start", word, "", word, "", "", "", "start", 0)
+
+    def replace(
+            self,
+            comm: Optional[str] = None,
+            front: Optional[str] = None,
+            word: Optional[str] = None,
+            back: Optional[str] = None,
+            rules_front: Optional[str] = None,
+            rules_back: Optional[str] = None,
+            path: Optional[str] = None,
+            processes: Optional[int] = None
+    ) -> "PathNode":
+        return PathNode(
+            self.count,
+            self.comm if comm is None else comm,
+            self.init,
+            self.front if front is None else front,
+            self.word if word is None else word,
+            self.back if back is None else back,
+            self.rules_front if rules_front is None else rules_front,
+            self.rules_back if rules_back is None else rules_back,
+            self.path if path is None else path,
+            self.processes if processes is None else processes)
 
-        else:
-            raise TypeError("Invalid argument type.")
 
 def comp(d):
     return f"{d.front}{d.word}{d.back}"
 
 
 def setup(pth: ProjectPaths):
+    load_assets(pth)
+
+    # initalise matches.csv
+    with open(pth.matches_path, "w") as f:
+        f.write("")
+
+    # initalise timer dict
+    with open(pth.sandhi_timer_path, "w") as f:
+        f.write("")
+
+
+def load_assets(pth: ProjectPaths):
     print("[green]importing assets")
 
     global rules
     rules = import_sandhi_rules(pth)
 
+    global rules_index
+    rules_index = make_rules_index(rules)
+
     global shortlist_set
     shortlist_set = make_shortlist_set(pth)
 
+    global residue_cache
+    if residue_cache_on:
+        residue_cache = ResidueCache(residue_cache_size)
+    else:
+        residue_cache = None
+
     global unmatched_set
     with open(pth.unmatched_set_path, "rb") as f:
         unmatched_set = pickle.load(f)
@@ -159,20 +238,9 @@ def setup(pth: ProjectPaths):
     with open(pth.all_inflections_set_path, "rb") as f:
         all_inflections_set = pickle.load(f)
 
-    global all_inflections_nofirst
-    global all_inflections_nolast
-
-    (all_inflections_nofirst,
-        all_inflections_nolast) = make_all_inflections_nfl_nll(
-            all_inflections_set)
-
-    # initalise matches.csv
-    with open(pth.matches_path, "w") as f:
-        f.write("")
-
-    # initalise timer dict
-    with open(pth.sandhi_timer_path, "w") as f:
-        f.write("")
+    global front_trie
+    global back_trie
+    front_trie, back_trie = load_or_make_tries(pth, all_inflections_set)
 
 
 def import_sandhi_rules(pth: ProjectPaths):
@@ -214,6 +282,24 @@ def import_sandhi_rules(pth: ProjectPaths):
     return sandhi_rules
 
 
+def make_rules_index(rules) -> RulesIndex:
+    """Index the sandhi rules by their (chA, chB) junction letters,
+    so each split point is a single dict lookup instead of a scan
+    of the whole rules table. Rules keep their original order."""
+
+    print("[green]indexing sandhi rules", end=" ")
+
+    rules_index: RulesIndex = {}
+    for rule, data in rules.items():
+        rules_index.setdefault(
+            (data["chA"], data["chB"]), []).append(
+                (rule, data["ch1"], data["ch2"]))
+
+    print(f"[white]{len(rules_index):,}")
+
+    return rules_index
+
+
 def make_shortlist_set(pth: ProjectPaths):
 
     print("[green]making shortlist set", end=" ")
@@ -247,6 +333,63 @@ def make_all_inflections_nfl_nll(all_inflections_set):
     return all_inflections_nofirst, all_inflections_nolast
 
 
+def load_or_make_tries(pth: ProjectPaths, all_inflections_set):
+    """Load the prefix and suffix tries from disk, or rebuild them
+    if all_inflections_set has changed since they were saved."""
+
+    if (
+        pth.affix_tries_path.exists()
+        and pth.affix_tries_path.stat().st_mtime
+            >= pth.all_inflections_set_path.stat().st_mtime
+    ):
+        print("[green]loading affix tries", end=" ")
+        front_trie, back_trie = load_tries(pth.affix_tries_path)
+        print(f"[white]{len(front_trie):,}")
+        return front_trie, back_trie
+
+    (all_inflections_nofirst,
+        all_inflections_nolast) = make_all_inflections_nfl_nll(
+            all_inflections_set)
+
+    print("[green]making affix tries", end=" ")
+
+    front_trie = AffixTrie()
+    front_trie.add_all(all_inflections_set, IN_INFLECTIONS)
+    front_trie.add_all(all_inflections_nolast, IN_NOLAST)
+
+    back_trie = AffixTrie(reverse=True)
+    back_trie.add_all(all_inflections_set, IN_INFLECTIONS)
+    back_trie.add_all(all_inflections_nofirst, IN_NOFIRST)
+
+    save_tries(pth.affix_tries_path, front_trie, back_trie)
+    print(f"[white]{len(front_trie):,}")
+
+    return front_trie, back_trie
+
+
+def front_matches(word: str, mask: int) -> List[str]:
+    """Words from the front in the same order as testing word[:-i]
+    for every i: first the empty string (word[:-0]),
+    then the longest proper prefix down to a single letter."""
+
+    prefixes = front_trie.matches(word, mask)
+    if prefixes and prefixes[0] == word:
+        prefixes = prefixes[1:]
+    if prefixes and prefixes[-1] == "":
+        prefixes = [""] + prefixes[:-1]
+    return prefixes
+
+
+def back_matches(word: str, mask: int) -> List[str]:
+    """Words from the back in the same order as testing word[i:]
+    for every i: the whole word down to the last letter."""
+
+    suffixes = back_trie.matches(word, mask)
+    if suffixes and suffixes[-1] == "":
+        suffixes = suffixes[:-1]
+    return suffixes
+
+
 def main():
     tic()
     print("[bright_yellow]sandhi splitter")
@@ -280,113 +423,377 @@ def main():
     with open(pth.matches_dict_path, "rb") as f:
         matches_dict = pickle.load(f)
 
-    time_dict = {}
     global unmatched_len_init
     unmatched_len_init = len(unmatched_set)
 
     print(f"[green]splitting sandhi [white]{unmatched_len_init:,}")
 
-    for counter, word in enumerate(unmatched_set.copy()):
+    checkpoint = config_test("deconstructor", "checkpoint", "yes")
+    if checkpoint:
+        words = resume_from_checkpoints(pth)
+    else:
+        words = list(unmatched_set)
 
-        bip()
-        logging.info(word)
+    if config_test("deconstructor", "multiprocess", "yes"):
+        split_words_parallel(pth, words, checkpoint)
+    else:
+        if checkpoint:
+            checkpoint_path = pth.sandhi_checkpoints_dir / "checkpoint.tsv"
+        else:
+            checkpoint_path = None
+        split_words(
+            words, pth.matches_path, pth.sandhi_timer_path, checkpoint_path)
+
+    summary(pth)
+
+    # a finished run must not be resumed. A failed shard raises
+    # before this, so its checkpoints are kept for the next run
+    if checkpoint:
+        clear_checkpoints(pth)
+
+    toc()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats('profiler.prof')
+        yes_no = input("open profiler? (y/n) ")
+        if yes_no == "y":
+            popen("tuna profiler.prof")
+
+
+def split_word(counter: int, word: str) -> None:
+    """Run the whole splitting cascade on a single word,
+    adding any matches to matches_dict."""
+
+    logging.info(word)
+
+    global w
+    w = Word(word)
+    matches_dict[word] = []
+
+    d = PathNode.start(counter, word)
 
-        global w
-        w = Word(word)
-        matches_dict[word] = []
+    # two word sandhi
+    two_word_sandhi(d)
 
-        # d is a dictionary of data accessed using dot notation
-        d = DotDict(default_dot_dict_init(counter, word))
+    # iti + assa / assā
+    if d.word.endswith(("tissa", "tissā")):
+        remove_tissa(d)
 
-        # two word sandhi
-        d = two_word_sandhi(d)
+    # three word sandhi
+    if not w.matches:
+        three_word_sandhi(d)
 
-        # iti + assa / assā
-        if d.word.endswith(("tissa", "tissā")):
-            d = remove_tissa(d)
+    # # recursive removal
+    if not w.matches:
+        recursive_removal(d)
 
-        # three word sandhi
-        if not w.matches:
-            d = three_word_sandhi(d)
 
-        # # recursive removal
-        if not w.matches:
-            recursive_removal(d)
+def split_words(
+        words: List[str],
+        matches_path: Path,
+        timer_path: Path,
+        checkpoint_path: Optional[Path] = None
+) -> None:
+    """Split a list of words, flushing matches and timings
+    to file every 1000 words. With a checkpoint_path,
+    progress is also appended there every checkpoint_every words."""
 
+    global matches_dict
+    time_dict = {}
+    words_len = len(words)
+    overtime_count = 0
+
+    if checkpoint_path is not None:
+        save_every = checkpoint_every
+    else:
+        save_every = 1000
+
+    for counter, word in enumerate(words):
+
+        bip()
+        split_word(counter, word)
         time_dict[word] = bop()
+        if w.overtime:
+            overtime_count += 1
 
-        if d.count % 1000 == 0:
+        if counter % 1000 == 0:
             print(
-                f"{d.count:>10,} / {unmatched_len_init:<10,}{d.word}")
+                f"{counter:>10,} / {words_len:<10,}{word}")
 
-            save_matches(pth, matches_dict)
+        if counter % save_every == 0:
+            save_matches(matches_path, matches_dict)
+            if checkpoint_path is not None:
+                save_checkpoint(checkpoint_path, matches_dict)
             try:
-                save_timer_dict(pth, time_dict)
+                save_timer_dict(timer_path, time_dict)
             except KeyError:
                 pass
             matches_dict = {}
             time_dict = {}
 
-    save_matches(pth, matches_dict)
+    save_matches(matches_path, matches_dict)
+    if checkpoint_path is not None:
+        save_checkpoint(checkpoint_path, matches_dict)
 
     try:
-        save_timer_dict(pth, time_dict)
+        save_timer_dict(timer_path, time_dict)
     except KeyError as e:
         print(f"[red] {e}")
 
-    summary(pth)
-    toc()
+    print(f"[green]overtime:\t{overtime_count:,} / {words_len:,}")
+    if residue_cache is not None:
+        print(
+            f"[green]residue cache:\t{residue_cache.hits:,} hits "
+            f"{residue_cache.misses:,} misses\t"
+            f"[white]{residue_cache.hit_rate:.2f}%")
 
-    if profiler is not None:
-        profiler.disable()
-        profiler.dump_stats('profiler.prof')
-        yes_no = input("open profiler? (y/n) ")
-        if yes_no == "y":
-            popen("tuna profiler.prof")
 
+def split_words_parallel(
+        pth: ProjectPaths, words: List[str], checkpoint: bool
+) -> None:
+    """Shard the words across all cores.
+    Each process writes its own matches and timer shard,
+    which get merged in shard order when all are finished."""
 
-def save_matches(pth: ProjectPaths, matches_dict):
+    global matches_dict
+    global unmatched_set
 
-    with open(pth.matches_path, "a") as f:
+    # header and manual corrections go first
+    save_matches(pth.matches_path, matches_dict)
+    matches_dict = {}
+
+    num_logical_cores = psutil.cpu_count()
+    print(f"[green]running with {num_logical_cores} cores")
+
+    # round robin over a sorted list so that every shard
+    # gets a similar mix of long and short words
+    words = sorted(words)
+    shards = [words[i::num_logical_cores] for i in range(num_logical_cores)]
+
+    processes: List[Process] = []
+    for shard_index, shard in enumerate(shards):
+        p = Process(
+            target=split_shard, args=(pth, shard_index, shard, checkpoint))
+        p.start()
+        processes.append(p)
+
+    for p in processes:
+        p.join()
+
+    # a shard which crashed or was killed has only written part of its
+    # words, so it must not be merged as if it were complete
+    failed = [
+        f"shard {shard_index} exit code {p.exitcode}"
+        for shard_index, p in enumerate(processes) if p.exitcode != 0]
+    if failed:
+        for failure in failed:
+            print(f"[red]{failure}")
+        raise RuntimeError(f"{len(failed)} sandhi splitter shards failed")
+
+    matches_dict = merge_shards(pth, len(shards))
+    unmatched_set = unmatched_set - set(matches_dict)
+
+
+def shard_paths(pth: ProjectPaths, shard_index: int) -> Tuple[Path, Path]:
+    """Return the matches and timer file paths of a shard."""
+    return (
+        pth.sandhi_shards_dir / f"matches_{shard_index}.tsv",
+        pth.sandhi_shards_dir / f"timer_{shard_index}.tsv")
+
+
+def split_shard(
+        pth: ProjectPaths, shard_index: int, words: List[str], checkpoint: bool
+) -> None:
+    """Worker process: split one shard of words into its own files."""
+
+    global matches_dict
+    matches_dict = {}
+
+    matches_path, timer_path = shard_paths(pth, shard_index)
+    for shard_file in [matches_path, timer_path]:
+        with open(shard_file, "w") as f:
+            f.write("")
+
+    if checkpoint:
+        checkpoint_path = \
+            pth.sandhi_checkpoints_dir / f"checkpoint_{shard_index}.tsv"
+    else:
+        checkpoint_path = None
+
+    split_words(words, matches_path, timer_path, checkpoint_path)
+
+
+def merge_shards(pth: ProjectPaths, shard_count: int) -> Dict[str, List]:
+    """Append all the shards to matches.tsv and timer.tsv in shard order,
+    returning a dict of the matches found."""
+
+    print("[green]merging shards")
+    merged_matches = {}
+
+    for shard_index in range(shard_count):
+        matches_shard_path, timer_shard_path = shard_paths(pth, shard_index)
+
+        with open(matches_shard_path) as f:
+            matches_shard = f.read()
+        with open(pth.matches_path, "a") as f:
+            f.write(matches_shard)
+
+        for line in matches_shard.splitlines():
+            word, *data = line.split("\t")
+            merged_matches.setdefault(word, []).append(tuple(data[:4]))
+
+        with open(timer_shard_path) as f:
+            timer_shard = f.read()
+        with open(pth.sandhi_timer_path, "a") as f:
+            f.write(timer_shard)
+
+        matches_shard_path.unlink()
+        timer_shard_path.unlink()
+
+    return merged_matches
+
+
+def match_line(word: str, item) -> str:
+    columns = "".join(f"{column}\t" for column in item)
+    return f"{word}\t{columns}\n"
+
+
+def save_matches(matches_path: Path, matches_dict):
+
+    with open(matches_path, "a") as f:
         for word, data in matches_dict.items():
             for item in data:
-                f.write(f"{word}\t")
-                for column in item:
-                    f.write(f"{column}\t")
-                f.write("\n")
+                f.write(match_line(word, item))
+
+
+def save_checkpoint(checkpoint_path: Path, matches_dict):
+    """Append the matches of the words in matches_dict,
+    followed by a done line for each word, in a single write."""
+
+    lines = []
+    for word, data in matches_dict.items():
+        for item in data:
+            lines.append(match_line(word, item))
+    for word in matches_dict:
+        lines.append(f"{checkpoint_done}{word}\n")
+
+    with open(checkpoint_path, "a") as f:
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_checkpoints(pth: ProjectPaths) -> Tuple[Set[str], List[str]]:
+    """Read every checkpoint file, from any number of sessions and shards.
+    Returns the finished words and their matches lines.
+    Matches of words without a done line are dropped,
+    they get split again."""
+
+    done_words: Set[str] = set()
+    lines: List[str] = []
+
+    for checkpoint_path in sorted(pth.sandhi_checkpoints_dir.glob("*.tsv")):
+        with open(checkpoint_path) as f:
+            for line in f:
+                # cut off mid-write
+                if not line.endswith("\n"):
+                    break
+                if line.startswith(checkpoint_done):
+                    done_words.add(line[len(checkpoint_done):-1])
+                else:
+                    lines.append(line)
+
+    lines = [
+        line for line in lines if line.split("\t", 1)[0] in done_words]
+
+    return done_words, lines
+
+
+def inputs_hash() -> str:
+    """Hash of the words to split and everything they are split with,
+    so checkpoints are only resumed by a run with the same inputs."""
+
+    sha1 = hashlib.sha1()
+    for items in [unmatched_set, all_inflections_set, shortlist_set]:
+        sha1.update("\n".join(sorted(items)).encode())
+        sha1.update(b"\0")
+    sha1.update(json.dumps(rules, sort_keys=True, ensure_ascii=False).encode())
+    return sha1.hexdigest()
+
+
+def check_checkpoints_inputs(pth: ProjectPaths) -> None:
+    """Discard the checkpoints if they were made from other inputs,
+    or it can't be told what they were made from,
+    then stamp the directory with the current inputs."""
+
+    current_hash = inputs_hash()
+    stamp_path = pth.sandhi_checkpoints_inputs_path
+    if stamp_path.exists():
+        stamped_hash = stamp_path.read_text()
+    else:
+        stamped_hash = ""
+
+    if stamped_hash != current_hash:
+        if any(pth.sandhi_checkpoints_dir.glob("*.tsv")):
+            print("[red]inputs changed, discarding checkpoints")
+        clear_checkpoints(pth)
+        stamp_path.write_text(current_hash)
+
+
+def resume_from_checkpoints(pth: ProjectPaths) -> List[str]:
+    """Start matches.tsv with the header, manual corrections and
+    the matches of every word finished in an earlier session
+    with the same inputs, and return the words still to do."""
+
+    global matches_dict
+
+    check_checkpoints_inputs(pth)
+    done_words, lines = load_checkpoints(pth)
+    print(f"[green]resuming from checkpoints [white]{len(done_words):,}")
+
+    save_matches(pth.matches_path, matches_dict)
+    matches_dict = {}
+
+    with open(pth.matches_path, "a") as f:
+        f.writelines(lines)
+
+    unmatched_set.difference_update(
+        line.split("\t", 1)[0] for line in lines)
+
+    return [word for word in unmatched_set if word not in done_words]
+
+
+def clear_checkpoints(pth: ProjectPaths):
+    for checkpoint_path in pth.sandhi_checkpoints_dir.glob("*.tsv"):
+        checkpoint_path.unlink()
+    pth.sandhi_checkpoints_inputs_path.unlink(missing_ok=True)
 
 
-def save_timer_dict(pth: ProjectPaths, time_dict):
+def save_timer_dict(timer_path: Path, time_dict):
     df = pd.DataFrame.from_dict(time_dict, orient="index")
     df = df.sort_values(by=0, ascending=False)
     df.to_csv(
-        pth.sandhi_timer_path, mode="a", header=False, sep="\t")
+        timer_path, mode="a", header=False, sep="\t")
 
 
-def recursive_removal(d: DotDict) -> None:
+def recursive_removal(d: PathNode) -> None:
 
     if w.overtime:
         return
 
-    d.processes += 1
+    d = d.replace(processes=d.processes + 1)
 
     # global dampers
     if d.processes < max_recursions and len(w.matches) < max_matches:
 
         if comp(d) not in w.tried:
             w.tried.add(comp(d))
-            d.tried.add(comp(d))
 
             if d.word in all_inflections_set:
-                
+
                 # add to matches
-                if comp(d) not in w.matches:
-                    matches_dict[d.init] += [(
-                        comp(d), f"xword{d.comm}",
-                        f"{comp_rules(d)}", d.path)]
-                    w.matches.add(comp(d))
-                    d.matches.add(comp(d))
-                    unmatched_set.discard(d.init)
+                add_match(d, f"xword{d.comm}", comp_rules(d))
 
             else:
                 # recursion
@@ -394,368 +801,365 @@ def recursive_removal(d: DotDict) -> None:
 
                     # a na an nā
                     if d.word.startswith(("a", "na", "an", "nā")):
-                        d = remove_neg(d)
+                        remove_neg(d)
 
                     # sa
                     if d.word.startswith("sa"):
-                        d = remove_sa(d)
+                        remove_sa(d)
 
                     # su
                     if d.word.startswith("su"):
-                        d = remove_su(d)
+                        remove_su(d)
 
                     # dur
                     if d.word.startswith("du"):
-                        d = remove_dur(d)
+                        remove_dur(d)
 
                     # ati
                     if d.word.startswith("ati"):
-                        d = remove_ati(d)
+                        remove_ati(d)
 
                     # tā ttā
                     if d.word.endswith(("tā", "ttā", "tāya")):
-                        d = remove_tta(d)
+                        remove_tta(d)
 
                     if d.word.endswith(("tissa", "tissā")):
-                        d = remove_tissa(d)
+                        remove_tissa(d)
+
+                    remove_all(d)
+
+                elif residue_cache is None:
+                    remove_all(d)
+
+                else:
+                    remove_all_memoized(d)
+
+
+def remove_all(d: PathNode) -> None:
+    """try every way of splitting the residual word"""
+
+    # two word sandhi
+    if d.comm != "start":
+        two_word_sandhi(d)
+
+    # ffc = lwff clean
+    remove_lwff_clean(d)
+
+    # fff = lwff fuzzy
+    remove_lwff_fuzzy(d)
+
+    # api eva iti
+    if d.word.endswith(("pi", "va", "ti")):
+        remove_apievaiti(d)
+
+    # double consonants at the beginning
+    if d.word.startswith(double_consonants_tuple):
+        remove_double_consonants(d)
+
+    if not (w.matches or w.outer_matched):
+        # fbc = lwfb_clean
+        remove_lwfb_clean(d)
+
+        # fbf = lwfb fuzzy
+        remove_lwfb_fuzzy(d)
 
-                # two word sandhi
-                if d.comm != "start":
-                    d = two_word_sandhi(d)
 
-                # ffc = lwff clean
-                d = remove_lwff_clean(d)
+def remove_all_memoized(d: PathNode) -> None:
+    """look up the decompositions of the residual word in the cache,
+    or find them once on the bare residue, then
+    add them to the matches with the current front and back."""
 
-                # fff = lwff fuzzy
-                d = remove_lwff_fuzzy(d)
+    outer_matched = bool(w.matches) or w.outer_matched
+    key = (d.word, d.processes, outer_matched)
+    decompositions = residue_cache.get(key)
 
-                # api eva iti
-                if re.findall("(pi|va|ti)$", d.word) != []:
-                    d = remove_apievaiti(d)
+    if decompositions is None:
+        decompositions, complete = find_decompositions(d, outer_matched)
+        if complete:
+            residue_cache.put(key, decompositions)
 
-                # double consonants at the beginning
-                dc_str = "|".join(double_consonants)
-                if re.findall(f"^({dc_str})", d.word):
-                    d = remove_double_consonants(d)
+    for split, comm, rules, path in decompositions:
+        if len(w.matches) >= max_matches:
+            break
+        split = f"{d.front}{split}{d.back}"
+        # rules made by comp_rules always end with a comma,
+        # fixed rules like "dc" or "apievaiti" don't
+        if rules.endswith(","):
+            rules = f"{d.rules_front}{rules}{d.rules_back}"
+        if split not in w.matches:
+            matches_dict[d.init] += [(
+                split, comm, rules, f"{d.path}{path}")]
+            w.matches.add(split)
+            unmatched_set.discard(d.init)
 
-                if not w.matches:
-                    # fbc = lwfb_clean
-                    d = remove_lwfb_clean(d)
 
-                    # fbf = lwfb fuzzy
-                    d = remove_lwfb_fuzzy(d)
+def find_decompositions(
+        d: PathNode, outer_matched: bool
+) -> Tuple[List[Tuple[str, str, str, str]], bool]:
+    """run remove_all on the bare residue with its own Word and matches,
+    so the result does not depend on how the residue was reached.
+    Returns the decompositions and whether the search was complete."""
+
+    global w
+    global matches_dict
+    w_outer = w
+    matches_dict_outer = matches_dict
+
+    w = Word(d.word)
+    w.start_time = w_outer.start_time
+    w.outer_matched = outer_matched
+    matches_dict = {d.init: []}
+
+    residue = d.replace(
+        front="", back="", rules_front="", rules_back="", path="")
+
+    try:
+        remove_all(residue)
+        decompositions = matches_dict[d.init]
+        complete = not w.overtime and len(w.matches) < max_matches
+    finally:
+        w = w_outer
+        matches_dict = matches_dict_outer
+
+    return decompositions, complete
+
+
+def add_match(d: PathNode, comm: str, rules: str) -> None:
+    """add the split of d to the word's matches, unless already found"""
+
+    split = comp(d)
+    if split not in w.matches:
+        matches_dict[d.init] += [(split, comm, rules, d.path)]
+        w.matches.add(split)
+        unmatched_set.discard(d.init)
 
 
-def remove_neg(d: DotDict) -> DotDict:
+def remove_neg(d: PathNode) -> None:
     """finds neg in front then
     1. finds match 2. recurses 3. passes through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 2:
-        d.path += " > neg"
-        d.rules_front = "na,"
-        d.front = f"na + {d.front}"
-
-        if d.word.startswith("a"):
-            if d.word[1] == d.word[2]:
-                
-                d.word = d.word[2:]
+        word = d.word
+
+        if word.startswith("a"):
+            if word[1] == word[2]:
+                word = word[2:]
             else:
-                d.word = d.word[1:]
-            
+                word = word[1:]
 
-        elif d.word.startswith("an"):
-            d.word = d.word[2:]
+        elif word.startswith("an"):
+            word = word[2:]
 
-        elif d.word.startswith("na"):
-            if d.word[1] == d.word[2]:
-                d.word = d.word[3:]
+        elif word.startswith("na"):
+            if word[1] == word[2]:
+                word = word[3:]
             else:
-                d.word = d.word[2:]
+                word = word[2:]
 
-        elif d.word.startswith("nā"):
-            d.word = f"a{d.word[2:]}"
+        elif word.startswith("nā"):
+            word = f"a{word[2:]}"
 
-        if d.word in all_inflections_set:
-            d.comm = f"match! = {comp(d)}"
+        d = d.replace(
+            word=word,
+            front=f"na + {d.front}",
+            rules_front="na,",
+            path=f"{d.path} > neg")
 
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [(
-                    comp(d), "xword-na", "na", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-na", "na")
 
         else:
-            d.comm = "recursing from na"
-            recursive_removal(d)
-
-        d = DotDict(d_orig)
+            recursive_removal(d.replace(comm="recursing from na"))
 
-    return d_orig
 
-
-def remove_sa(d: DotDict) -> DotDict:
+def remove_sa(d: PathNode) -> None:
     """find sa in front then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 3:
-        d.path += " > sa"
-        d.front = f"sa + {d.front}"
-        d.rules_front = "sa,"
 
         if d.word[2] == d.word[3]:
-            d.word = d.word[3:]
-
+            word = d.word[3:]
         else:
-            d.word = d.word[2:]
-        
-        if d.word in all_inflections_set:
-            d.comm = "sa"
+            word = d.word[2:]
 
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-sa", "sa", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+        d = d.replace(
+            word=word,
+            front=f"sa + {d.front}",
+            rules_front="sa,",
+            path=f"{d.path} > sa")
 
-        else:
-            d.comm = "recursing sa"
-            recursive_removal(d)
-
-        d = DotDict(d_orig)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-sa", "sa")
 
-    return d_orig
+        else:
+            recursive_removal(d.replace(comm="recursing sa"))
 
 
-def remove_su(d: DotDict) -> DotDict:
+def remove_su(d: PathNode) -> None:
     """find su in front then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 3:
-        d.path += " > su"
-        d.front = f"su + {d.front}"
-        d.rules_front += "su,"
+
         if d.word[2] == d.word[3]:
-            d.word = d.word[3:]
+            word = d.word[3:]
         else:
-            d.word = d.word[2:]
-        
-        if d.word in all_inflections_set:
-            d.comm = "su"
+            word = d.word[2:]
 
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-su", "su", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+        d = d.replace(
+            word=word,
+            front=f"su + {d.front}",
+            rules_front=f"{d.rules_front}su,",
+            path=f"{d.path} > su")
 
-        else:
-            d.comm = "recursing su"
-            recursive_removal(d)
-
-        d = DotDict(d_orig)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-su", "su")
 
-    return d_orig
+        else:
+            recursive_removal(d.replace(comm="recursing su"))
 
 
-def remove_dur(d: DotDict) -> DotDict:
+def remove_dur(d: PathNode) -> None:
     """find du(r) in front then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 3:
-        d.path += " > dur"
-        d.rules_front = "dur,"
-        d.front = f"dur + {d.front}"
+
         if d.word[2] == d.word[3]:
-            d.word = d.word[3:]
+            word = d.word[3:]
         else:
-            d.word = d.word[2:]
-        
-        if d.word in all_inflections_set:
-            d.comm = "dur"
+            word = d.word[2:]
 
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-dur", "dur", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+        d = d.replace(
+            word=word,
+            front=f"dur + {d.front}",
+            rules_front="dur,",
+            path=f"{d.path} > dur")
 
-        else:
-            d.comm = "recursing dur"
-            recursive_removal(d)
-
-        d = DotDict(d_orig)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-dur", "dur")
 
-    return d_orig
+        else:
+            recursive_removal(d.replace(comm="recursing dur"))
 
 
-def remove_ati(d: DotDict) -> DotDict:
+def remove_ati(d: PathNode) -> None:
     """find ati in front then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 3:
-        d.path += " > ati"
-        d.front = f"ati + {d.front}"
-        d.rules_front += "ati,"
 
         if d.word[3] == d.word[4]:
-            d.word = d.word[4:]
+            word = d.word[4:]
         else:
-            d.word = d.word[3:]
+            word = d.word[3:]
 
-        if d.word in all_inflections_set:
-            d.comm = "ati"
+        d = d.replace(
+            word=word,
+            front=f"ati + {d.front}",
+            rules_front=f"{d.rules_front}ati,",
+            path=f"{d.path} > ati")
 
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-ati", "ati", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-ati", "ati")
 
         else:
-            d.comm = "recursing ati"
-            recursive_removal(d)
-
-        d = DotDict(d_orig)
+            recursive_removal(d.replace(comm="recursing ati"))
 
-    return d_orig
 
-
-def remove_tta(d: DotDict) -> DotDict:
+def remove_tta(d: PathNode) -> None:
     """find tā, ttā, tāya in back then
     1. match 2. recurse or 3. pass through.
     These are suffix which create abstract nouns,
     very common in the commentaries."""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 3:
-        d.path += " > tta"
+        path = f"{d.path} > tta"
+
         if d.word.endswith("ttā"):
-            d.back = f"{d.back} + ttā"
-            d.word = d.word[:-3]
-            d.rules_back = f"ttā,{d.rules_back}"
+            d = d.replace(
+                word=d.word[:-3],
+                back=f"{d.back} + ttā",
+                rules_back=f"ttā,{d.rules_back}",
+                path=path)
 
         elif d.word.endswith("tā"):
-            d.back = f"{d.back} + tā"
-            d.word = d.word[:-2]
-            d.rules_back = f"tā,{d.rules_back}"
+            d = d.replace(
+                word=d.word[:-2],
+                back=f"{d.back} + tā",
+                rules_back=f"tā,{d.rules_back}",
+                path=path)
 
         elif d.word.endswith("tāya"):
-            d.back = f"{d.back} + tāya"
-            d.word = d.word[:-4]
-            d.rules_back = f"tāya,{d.rules_back}"
-
-        if d.word in all_inflections_set:
-            d.comm = "tta"
-
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-tta", "tta", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+            d = d.replace(
+                word=d.word[:-4],
+                back=f"{d.back} + tāya",
+                rules_back=f"tāya,{d.rules_back}",
+                path=path)
 
         else:
-            d.comm = "recursing tta"
-            recursive_removal(d)
+            d = d.replace(path=path)
 
-        d = DotDict(d_orig)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-tta", "tta")
 
-    return d_orig
+        else:
+            recursive_removal(d.replace(comm="recursing tta"))
 
 
-def remove_tissa(d: DotDict) -> DotDict:
+def remove_tissa(d: PathNode) -> None:
     """find tissa or tissā in last place then
     1. match 2. recurse or 3. pass through.
     This fixes the problem of 'iti + assa / assā' being taken as tissa / tissā,
     very common in the commentaries."""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 3:
-        d.path += " > tissa"
+        d = d.replace(path=f"{d.path} > tissa")
+
         if d.word.endswith("tissa"):
-            d.back = f"{d.back} + iti + assa"
-            d.word = d.word[:-5]
-            d.rules_back = f"tissa,{d.rules_back}"
+            d = d.replace(
+                word=d.word[:-5],
+                back=f"{d.back} + iti + assa",
+                rules_back=f"tissa,{d.rules_back}")
 
         if d.word.endswith("tissā"):
-            d.back = f"{d.back} + iti + assā"
-            d.word = d.word[:-5]
-            d.rules_back = f"tissa,{d.rules_back}"
+            d = d.replace(
+                word=d.word[:-5],
+                back=f"{d.back} + iti + assā",
+                rules_back=f"tissa,{d.rules_back}")
 
         if d.word in all_inflections_set:
-            d.comm = "tissa"
-
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-tissa", "tissa", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+            add_match(d, "xword-tissa", "tissa")
 
         else:
-            d.comm = "recursing tissa"
-            recursive_removal(d)
-
-        d = DotDict(d_orig)
+            recursive_removal(d.replace(comm="recursing tissa"))
 
-    return d_orig
 
-
-def remove_double_consonants(d: DotDict) -> DotDict:
+def remove_double_consonants(d: PathNode) -> None:
     """find double consontant at the start or end and remove
     1. match 2. recurse or 3. pass through.
     """
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches and len(d.word) > 4:
-        d.path += " > dc"
-        if any(d.word.startswith(dc) for dc in double_consonants):
-            d.word = d.word[1:]
-            d.rules_front += "dc,"
+        d = d.replace(path=f"{d.path} > dc")
 
-        if d.word in all_inflections_set:
-            d.comm = "dc"
+        if d.word.startswith(double_consonants_tuple):
+            d = d.replace(
+                word=d.word[1:],
+                rules_front=f"{d.rules_front}dc,")
 
-            if comp(d) not in w.matches:
-                matches_dict[d.init] += [
-                    (comp(d), "xword-dc", "dc", d.path)]
-                w.matches.add(comp(d))
-                d.matches.add(comp(d))
-                unmatched_set.discard(d.init)
+        if d.word in all_inflections_set:
+            add_match(d, "xword-dc", "dc")
 
         else:
-            d.comm = "recursing dc"
-            recursive_removal(d)
+            recursive_removal(d.replace(comm="recursing dc"))
 
-        d = DotDict(d_orig)
 
-    return d_orig
-
-
-def remove_apievaiti(d: DotDict) -> DotDict:
+def remove_apievaiti(d: PathNode) -> None:
     """find api eva or iti using sandhi rules then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
         try:
@@ -771,151 +1175,95 @@ def remove_apievaiti(d: DotDict) -> DotDict:
             wordA = d.word[:-2]
             wordB = d.word[-2:]
 
-        for rule in rules:
-            chA = rules[rule]["chA"]
-            chB = rules[rule]["chB"]
-            ch1 = rules[rule]["ch1"]
-            ch2 = rules[rule]["ch2"]
-
-            try:
-                wordA_lastletter = wordA[-1]
-            except Exception:
-                wordA_lastletter = wordA
-            wordB_firstletter = wordB[0]
-
-            if (wordA_lastletter == chA and
-                    wordB_firstletter == chB):
-                word1 = wordA[:-1] + ch1
-                word2 = ch2 + wordB[1:]
-
-                if word2 in ["api", "eva", "iti"]:
-                    d.word = d.word.replace(wordB, "")
-                    d.word = d.word.replace(wordA, word1)
-                    d.back = f" + {word2}{d.back}"
-                    d.comm = "apievaiti"
-                    d.rules_back = f"{rule+2},{d.rules_back}"
-                    d.path += " > apievaiti"
-
-                    if d.word in all_inflections_set:
-                        d.comm = f"match! = {comp(d)}"
+        try:
+            wordA_lastletter = wordA[-1]
+        except Exception:
+            wordA_lastletter = wordA
+        wordB_firstletter = wordB[0]
 
-                        if comp(d) not in w.matches:
-                            matches_dict[d.init] += [
-                                (comp(d), "xword-pi", "apievaiti", d.path)]
-                            w.matches.add(comp(d))
-                            d.matches.add(comp(d))
-                            unmatched_set.discard(d.init)
+        for rule, ch1, ch2 in rules_index.get(
+                (wordA_lastletter, wordB_firstletter), []):
+            word1 = wordA[:-1] + ch1
+            word2 = ch2 + wordB[1:]
 
-                    else:
-                        recursive_removal(d)
+            if word2 in ["api", "eva", "iti"]:
+                n = d.replace(
+                    word=word1,
+                    back=f" + {word2}{d.back}",
+                    comm="apievaiti",
+                    rules_back=f"{rule+2},{d.rules_back}",
+                    path=f"{d.path} > apievaiti")
 
-                    d = DotDict(d_orig)
+                if n.word in all_inflections_set:
+                    add_match(n, "xword-pi", "apievaiti")
 
-    return d_orig
+                else:
+                    recursive_removal(n)
 
 
-def remove_lwff_clean(d: DotDict) -> DotDict:
+def remove_lwff_clean(d: PathNode) -> None:
     """make a list of the longest clean words from the front then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
-        lwff_clean_list = []
-
-        for i in range(len(d.word)):
-            if d.word[:-i] in all_inflections_set:
-                lwff_clean_list.append(d.word[:-i])
-
+        lwff_clean_list = front_matches(d.word, IN_INFLECTIONS)
         lwff_clean_list = lwff_clean_list[:clean_list_max_length]
 
         for lwff_clean in lwff_clean_list:
 
             if len(lwff_clean) >= clean_word_min_length:
-                d.path += " > front_clean"
-                d.word = re.sub(f"^{lwff_clean}", "", d.word, count=1)
-                d.front = f"{d.front}{lwff_clean} + "
-                d.comm = f"lwff_clean [yellow]{lwff_clean}"
-                d.rules_front += "0,"
+                n = d.replace(
+                    word=d.word[len(lwff_clean):],
+                    front=f"{d.front}{lwff_clean} + ",
+                    rules_front=f"{d.rules_front}0,",
+                    path=f"{d.path} > front_clean")
 
-                if d.word in all_inflections_set:
-
-                    if comp(d) not in w.matches:
-                        matches_dict[d.init] += [(
-                            comp(d), "xword-lwff",
-                            f"{comp_rules(d)}", d.path)]
-                        w.matches.add(comp(d))
-                        unmatched_set.discard(d.init)
+                if n.word in all_inflections_set:
+                    add_match(n, "xword-lwff", comp_rules(n))
 
                 else:
-                    d.comm = f"recursing lwff_clean [yellow]{comp(d)}"
-                    recursive_removal(d)
-
-                d = DotDict(d_orig)
+                    recursive_removal(n.replace(
+                        comm=f"recursing lwff_clean [yellow]{comp(n)}"))
 
-    return d_orig
 
-
-def remove_lwfb_clean(d: DotDict) -> DotDict:
+def remove_lwfb_clean(d: PathNode) -> None:
     """make list of the longest clean words from the back then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
-        lwfb_clean_list = []
-
-        for i in range(len(d.word)):
-            if d.word[i:] in all_inflections_set:
-                lwfb_clean_list.append(d.word[i:])
-
+        lwfb_clean_list = back_matches(d.word, IN_INFLECTIONS)
         lwfb_clean_list = lwfb_clean_list[:clean_list_max_length]
 
         for lwfb_clean in lwfb_clean_list:
 
             if len(lwfb_clean) >= clean_word_min_length:
-                d.path += " > back_clean"
-                d.word = re.sub(f"{lwfb_clean}$", "", d.word, count=1)
-                d.back = f" + {lwfb_clean}{d.back}"
-                d.comm = f"lwfb_clean [yellow]{lwfb_clean}"
-                d.rules_back = f"0,{d.rules_back}"
-
-                if d.word in all_inflections_set:
-                    if comp(d) not in w.matches:
-                        matches_dict[d.init] += [(
-                            comp(d), "xword-lwfb", f"{comp_rules(d)}", d.path)]
-                        w.matches.add(comp(d))
-                        d.matches.add(comp(d))
-                        unmatched_set.discard(d.init)
-
-                else:
-                    d.comm = f"recursing lfwb_clean [yellow]{comp(d)}"
-                    recursive_removal(d)
+                n = d.replace(
+                    word=d.word[:-len(lwfb_clean)],
+                    back=f" + {lwfb_clean}{d.back}",
+                    rules_back=f"0,{d.rules_back}",
+                    path=f"{d.path} > back_clean")
 
-                d = DotDict(d_orig)
+                if n.word in all_inflections_set:
+                    add_match(n, "xword-lwfb", comp_rules(n))
 
-    return d_orig
+                else:
+                    recursive_removal(n.replace(
+                        comm=f"recursing lfwb_clean [yellow]{comp(n)}"))
 
 
-def remove_lwff_fuzzy(d: DotDict) -> DotDict:
+def remove_lwff_fuzzy(d: PathNode) -> None:
     """make a list of the longest fuzzy words from the front then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
-    if comp(d) not in d.matches:
+    if comp(d) not in w.matches:
 
         lwff_fuzzy_list = []
 
         if len(d.word) >= fuzzy_word_min_length:
-            for i in range(len(d.word)):
-                fuzzy_word = d.word[:-i]
-
-                if (fuzzy_word in all_inflections_nolast or
-                        fuzzy_word in all_inflections_set):
-                    lwff_fuzzy_list.append(fuzzy_word)
+            lwff_fuzzy_list = front_matches(
+                d.word, IN_INFLECTIONS | IN_NOLAST)
 
         lwff_fuzzy_list = lwff_fuzzy_list[:fuzzy_list_max_length]
 
@@ -924,235 +1272,140 @@ def remove_lwff_fuzzy(d: DotDict) -> DotDict:
             if len(lwff_fuzzy) >= fuzzy_word_min_length:
 
                 wordA_fuzzy = lwff_fuzzy
-                wordB_fuzzy = re.sub(f"^{wordA_fuzzy}", "", d.word, count=1)
-
-                try:
-                    wordA_lastletter = wordA_fuzzy[-1]
-                except Exception:
-                    wordA_lastletter = ""
-                try:
-                    wordB_firstletter = wordB_fuzzy[0]
-                except Exception:
-                    wordB_firstletter = ""
-
-                for rule in rules:
-                    chA = rules[rule]["chA"]
-                    chB = rules[rule]["chB"]
-                    ch1 = rules[rule]["ch1"]
-                    ch2 = rules[rule]["ch2"]
-
-                    if (wordA_lastletter == chA and
-                            wordB_firstletter == chB):
-                        word1 = wordA_fuzzy[:-1] + ch1
-                        word2 = ch2 + wordB_fuzzy[1:]
-
-                        if word1 in all_inflections_set:
-                            d.path += " > front_fuzzy"
-                            d.word = re.sub(
-                                f"^{wordA_fuzzy}", "", d.word, count=1)
-                            d.word = re.sub(
-                                f"^{wordB_fuzzy}", word2, d.word, count=1)
-                            d.front = f"{d.front}{word1} + "
-                            d.comm = f"lwff_fuzzy [yellow]{word1} + {word2}"
-                            d.rules_front += f"{rule+2},"
-
-                            if d.word in all_inflections_set:
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), "xword-fff",
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
-
-                            else:
-                                d.comm = f"recursing lwff_fuzzy {comp(d)}"
-                                recursive_removal(d)
-
-                            d = DotDict(d_orig)
-
-    return d_orig
-
-
-def remove_lwfb_fuzzy(d: DotDict) -> DotDict:
+                wordB_fuzzy = d.word[len(wordA_fuzzy):]
+                wordA_lastletter = wordA_fuzzy[-1:]
+                wordB_firstletter = wordB_fuzzy[:1]
+
+                for rule, ch1, ch2 in rules_index.get(
+                        (wordA_lastletter, wordB_firstletter), []):
+                    word1 = wordA_fuzzy[:-1] + ch1
+                    word2 = ch2 + wordB_fuzzy[1:]
+
+                    if word1 in all_inflections_set:
+                        n = d.replace(
+                            word=word2,
+                            front=f"{d.front}{word1} + ",
+                            rules_front=f"{d.rules_front}{rule+2},",
+                            path=f"{d.path} > front_fuzzy")
+
+                        if n.word in all_inflections_set:
+                            add_match(n, "xword-fff", comp_rules(n))
+
+                        else:
+                            recursive_removal(n.replace(
+                                comm=f"recursing lwff_fuzzy {comp(n)}"))
+
+
+def remove_lwfb_fuzzy(d: PathNode) -> None:
     """make a list of the longest fuzzy words from the back then
     1. match 2. recurse or 3. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
         lwfb_fuzzy_list = []
 
         if len(d.word) > 0:
-            for i in range(len(d.word)):
-                fuzzy_word = d.word[i:]
-
-                if (fuzzy_word in all_inflections_nofirst or
-                        fuzzy_word in all_inflections_set):
-                    lwfb_fuzzy_list.append(fuzzy_word)
+            lwfb_fuzzy_list = back_matches(
+                d.word, IN_INFLECTIONS | IN_NOFIRST)
 
         lwfb_fuzzy_list = lwfb_fuzzy_list[:fuzzy_list_max_length]
 
         for lwfb_fuzzy in lwfb_fuzzy_list:
 
             if len(lwfb_fuzzy) >= fuzzy_word_min_length:
-                wordA_fuzzy = re.sub(f"{lwfb_fuzzy}$", "", d.word, count=1)
+                wordA_fuzzy = d.word[:-len(lwfb_fuzzy)]
                 wordB_fuzzy = lwfb_fuzzy
+                wordA_lastletter = wordA_fuzzy[-1:]
+                wordB_firstletter = wordB_fuzzy[:1]
 
-                try:
-                    wordA_lastletter = wordA_fuzzy[-1]
-                except Exception:
-                    wordA_lastletter = ""
-                try:
-                    wordB_firstletter = wordB_fuzzy[0]
-                except Exception:
-                    wordB_firstletter = ""
-
-                for rule in rules:
-                    chA = rules[rule]["chA"]
-                    chB = rules[rule]["chB"]
-                    ch1 = rules[rule]["ch1"]
-                    ch2 = rules[rule]["ch2"]
-
-                    if (wordA_lastletter == chA and
-                            wordB_firstletter == chB):
-                        word1 = wordA_fuzzy[:-1] + ch1
-                        word2 = ch2 + wordB_fuzzy[1:]
-
-                        if word2 in all_inflections_set:
-                            d.path += " > back_fuzzy"
-                            d.word = re.sub(
-                                f"{wordB_fuzzy}$", "", d.word, count=1)
-                            d.word = re.sub(
-                                f"{wordA_fuzzy}$", word1, d.word, count=1)
-                            # d.back = re.sub(
-                            #     f"{wordB_fuzzy}$", word2, d.back, count=1)
-                            d.back = f" + {word2}{d.back}"
-                            d.comm = f"lwfb_fuzzy [yellow]{word1} + {word2}"
-                            d.rules_back = f"{rule+2},{d.rules_back}"
-
-                            if d.word in all_inflections_set:
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), "xword-fbf",
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
-
-                            else:
-                                d.comm = f"recursing lwfb_fuzzy {comp(d)}"
-                                recursive_removal(d)
-
-                            d = DotDict(d_orig)
-
-    return d_orig
-
-
-def two_word_sandhi(d: DotDict) -> DotDict:
+                for rule, ch1, ch2 in rules_index.get(
+                        (wordA_lastletter, wordB_firstletter), []):
+                    word1 = wordA_fuzzy[:-1] + ch1
+                    word2 = ch2 + wordB_fuzzy[1:]
+
+                    if word2 in all_inflections_set:
+                        n = d.replace(
+                            word=word1,
+                            back=f" + {word2}{d.back}",
+                            rules_back=f"{rule+2},{d.rules_back}",
+                            path=f"{d.path} > back_fuzzy")
+
+                        if n.word in all_inflections_set:
+                            add_match(n, "xword-fbf", comp_rules(n))
+
+                        else:
+                            recursive_removal(n.replace(
+                                comm=f"recursing lwfb_fuzzy {comp(n)}"))
+
+
+def two_word_sandhi(d: PathNode) -> None:
     """split into two words, apply sandhi rules then
     1. match or 2. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
+        if d.comm == "start":
+            comm = "start2"
+        else:
+            comm = "x2"
+
         for x in range(0, len(d.word)-1):
 
             wordA = d.word[:-x-1]
             wordB = d.word[-1-x:]
-            try:
-                wordA_lastletter = wordA[len(wordA)-1]
-            except Exception:
-                wordA_lastletter = ""
+            wordA_lastletter = wordA[-1:]
             wordB_firstletter = wordB[0]
 
             # blah blah
 
             if (wordA in all_inflections_set and
                     wordB in all_inflections_set):
-                d.front = f"{d.front}{wordA} + "
-                d.word = wordB
-                d.rules_front += "0,"
-                d.path += " > 2.1"
-                if d.comm == "start":
-                    d.comm = "start2.1"
-                else:
-                    d.comm = "x2.1"
-
-                if comp(d) not in d.matches:
-                    matches_dict[d.init] += [(
-                        f"{d.front}{wordB}{d.back}",
-                        d.comm, comp_rules(d), d.path)]
-                    w.matches.add(comp(d))
-                    d.matches.add(comp(d))
-                    unmatched_set.discard(d.init)
-
-                d = DotDict(d_orig)
+                n = d.replace(
+                    front=f"{d.front}{wordA} + ",
+                    word=wordB,
+                    rules_front=f"{d.rules_front}0,",
+                    path=f"{d.path} > 2.1",
+                    comm=f"{comm}.1")
+                add_match(n, n.comm, comp_rules(n))
 
             # bla* *lah
 
-            for rule in rules:
-                chA = rules[rule]["chA"]
-                chB = rules[rule]["chB"]
-                ch1 = rules[rule]["ch1"]
-                ch2 = rules[rule]["ch2"]
-
-                if (wordA_lastletter == chA and
-                        wordB_firstletter == chB):
-                    word1 = wordA[:-1] + ch1
-                    word2 = ch2 + wordB[1:]
-
-                    if (word1 in all_inflections_set and
-                            word2 in all_inflections_set):
-                        d.front = f"{d.front}{word1} + "
-                        d.word = word2
-                        d.rules_front += f"{rule+2},"
-                        d.path += " > 2.2"
-                        if d.comm == "start":
-                            d.comm = "start2.2"
-                        else:
-                            d.comm = "x2.2"
-
-                        if comp(d) not in w.matches:
-                            matches_dict[d.init] += [
-                                (comp(d), d.comm, f"{comp_rules(d)}", d.path)]
-                            w.matches.add(comp(d))
-                            d.matches.add(comp(d))
-                            unmatched_set.discard(d.init)
-
-                    d = DotDict(d_orig)
+            for rule, ch1, ch2 in rules_index.get(
+                    (wordA_lastletter, wordB_firstletter), []):
+                word1 = wordA[:-1] + ch1
+                word2 = ch2 + wordB[1:]
 
-    return d_orig
+                if (word1 in all_inflections_set and
+                        word2 in all_inflections_set):
+                    n = d.replace(
+                        front=f"{d.front}{word1} + ",
+                        word=word2,
+                        rules_front=f"{d.rules_front}{rule+2},",
+                        path=f"{d.path} > 2.2",
+                        comm=f"{comm}.2")
+                    add_match(n, n.comm, comp_rules(n))
 
 
-def three_word_sandhi(d: DotDict) -> DotDict:
+def three_word_sandhi(d: PathNode) -> None:
     """split into three words, apply sandhi rules then
     1. match or 2. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
+        if d.comm == "start":
+            comm = "start3"
+        else:
+            comm = "x3"
+
         for x in range(0, len(d.word)-1):
 
             wordA = d.word[:-x-1]
-            try:
-                wordA_lastletter = wordA[len(wordA)-1]
-            except Exception:
-                wordA_lastletter = ""
+            wordA_lastletter = wordA[-1:]
 
             for y in range(0, len(d.word[-1-x:])-1):
                 wordB = d.word[-1-x:-y-1]
-                try:
-                    wordB_firstletter = wordB[0]
-                except Exception:
-                    wordB_firstletter = ""
-                try:
-                    wordB_lastletter = wordB[len(wordB)-1]
-                except Exception:
-                    wordB_lastletter = ""
+                wordB_firstletter = wordB[:1]
+                wordB_lastletter = wordB[-1:]
 
                 wordC = d.word[-1-y:]
                 wordC_firstletter = wordC[0]
@@ -1163,164 +1416,92 @@ def three_word_sandhi(d: DotDict) -> DotDict:
                     wordB in all_inflections_set and
                         wordC in all_inflections_set):
 
-                    d.front = f"{d.front}{wordA} + "
-                    d.word = wordB
-                    d.back = f" + {wordC}{d.back}"
-                    d.rules_front += "0,"
-                    d.rules_back = f"0,{d.rules_back}"
-                    d.path += " > 3.1"
-                    if d.comm == "start":
-                        d.comm = "start3.1"
-                    else:
-                        d.comm = "x3.1"
-
-                    if comp(d) not in w.matches:
-                        matches_dict[d.init] += [
-                            (comp(d), d.comm, "0,0", d.path)]
-                        w.matches.add(comp(d))
-                        d.matches.add(comp(d))
-                        unmatched_set.discard(d.init)
-
-                    d = DotDict(d_orig)
+                    n = d.replace(
+                        front=f"{d.front}{wordA} + ",
+                        word=wordB,
+                        back=f" + {wordC}{d.back}",
+                        rules_front=f"{d.rules_front}0,",
+                        rules_back=f"0,{d.rules_back}",
+                        path=f"{d.path} > 3.1",
+                        comm=f"{comm}.1")
+                    add_match(n, n.comm, "0,0")
 
                 # blah bla* *lah
                 if wordA in all_inflections_set:
 
-                    for rule in rules:
-                        chA = rules[rule]["chA"]
-                        chB = rules[rule]["chB"]
-                        ch1 = rules[rule]["ch1"]
-                        ch2 = rules[rule]["ch2"]
-
-                        if (wordB_lastletter == chA and
-                                wordC_firstletter == chB):
-                            word2 = wordB[:-1] + ch1
-                            word3 = ch2 + wordC[1:]
-
-                            if (wordA in all_inflections_set and
-                                word2 in all_inflections_set and
-                                    word3 in all_inflections_set):
-
-                                d.front = f"{d.front}{wordA} + "
-                                d.word = word2
-                                d.back = f" + {word3}{d.back}"
-                                d.rules_front += "0,"
-                                d.rules_back = f"{rule+2},{d.rules_back}"
-                                d.path += " > 3.2"
-                                if d.comm == "start":
-                                    d.comm = "start3.2"
-                                else:
-                                    d.comm = "x3.2"
-
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), d.comm,
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
-
-                                d = DotDict(d_orig)
+                    for rule, ch1, ch2 in rules_index.get(
+                            (wordB_lastletter, wordC_firstletter), []):
+                        word2 = wordB[:-1] + ch1
+                        word3 = ch2 + wordC[1:]
+
+                        if (word2 in all_inflections_set and
+                                word3 in all_inflections_set):
+
+                            n = d.replace(
+                                front=f"{d.front}{wordA} + ",
+                                word=word2,
+                                back=f" + {word3}{d.back}",
+                                rules_front=f"{d.rules_front}0,",
+                                rules_back=f"{rule+2},{d.rules_back}",
+                                path=f"{d.path} > 3.2",
+                                comm=f"{comm}.2")
+                            add_match(n, n.comm, comp_rules(n))
 
                 # bla* *lah blah
 
                 if wordC in all_inflections_set:
 
-                    for rule in rules:
-                        chA = rules[rule]["chA"]
-                        chB = rules[rule]["chB"]
-                        ch1 = rules[rule]["ch1"]
-                        ch2 = rules[rule]["ch2"]
-
-                        if (wordA_lastletter == chA and
-                                wordB_firstletter == chB):
-                            word1 = wordA[:-1] + ch1
-                            word2 = ch2 + wordB[1:]
-
-                            if (word1 in all_inflections_set and
-                                word2 in all_inflections_set and
-                                    wordC in all_inflections_set):
-
-                                d.front = f"{d.front}{word1} + "
-                                d.word = word2
-                                d.back = f" + {wordC}{d.back}"
-                                d.rules_front += f"{rule+2},"
-                                d.rules_back = f"0,{d.rules_back}"
-                                d.path += " > 3.3"
-                                if d.comm == "start":
-                                    d.comm = "start3.3"
-                                else:
-                                    d.comm = "x3.3"
-
-                                if comp(d) not in w.matches:
-                                    matches_dict[d.init] += [(
-                                        comp(d), d.comm,
-                                        f"{comp_rules(d)}", d.path)]
-                                    w.matches.add(comp(d))
-                                    d.matches.add(comp(d))
-                                    unmatched_set.discard(d.init)
-
-                                d = DotDict(d_orig)
+                    for rule, ch1, ch2 in rules_index.get(
+                            (wordA_lastletter, wordB_firstletter), []):
+                        word1 = wordA[:-1] + ch1
+                        word2 = ch2 + wordB[1:]
 
-                # bla* *la* *lah
+                        if (word1 in all_inflections_set and
+                                word2 in all_inflections_set):
 
-                for rulex in rules:
-                    chAx = rules[rulex]["chA"]
-                    chBx = rules[rulex]["chB"]
-                    ch1x = rules[rulex]["ch1"]
-                    ch2x = rules[rulex]["ch2"]
+                            n = d.replace(
+                                front=f"{d.front}{word1} + ",
+                                word=word2,
+                                back=f" + {wordC}{d.back}",
+                                rules_front=f"{d.rules_front}{rule+2},",
+                                rules_back=f"0,{d.rules_back}",
+                                path=f"{d.path} > 3.3",
+                                comm=f"{comm}.3")
+                            add_match(n, n.comm, comp_rules(n))
 
-                    if (wordA_lastletter == chAx and
-                            wordB_firstletter == chBx):
-                        word1 = wordA[:-1] + ch1x
-                        word2 = ch2x + wordB[1:]
+                # bla* *la* *lah
 
-                        for ruley in rules:
-                            chAy = rules[ruley]["chA"]
-                            chBy = rules[ruley]["chB"]
-                            ch1y = rules[ruley]["ch1"]
-                            ch2y = rules[ruley]["ch2"]
+                for rulex, ch1x, ch2x in rules_index.get(
+                        (wordA_lastletter, wordB_firstletter), []):
+                    word1 = wordA[:-1] + ch1x
 
-                            if (wordB_lastletter == chAy and
-                                    wordC_firstletter == chBy):
-                                word2 = (ch2x + wordB[1:])[:-1] + ch1y
-                                word3 = ch2y + wordC[1:]
+                    if word1 not in all_inflections_set:
+                        continue
 
-                                if (word1 in all_inflections_set and
-                                        word2 in all_inflections_set and
-                                        word3 in all_inflections_set):
+                    for ruley, ch1y, ch2y in rules_index.get(
+                            (wordB_lastletter, wordC_firstletter), []):
+                        word2 = (ch2x + wordB[1:])[:-1] + ch1y
+                        word3 = ch2y + wordC[1:]
 
-                                    d.front = f"{d.front}{word1} + "
-                                    d.word = word2
-                                    d.back = f" + {word3}{d.back}"
-                                    d.rules_front += f"{rulex+2},"
-                                    d.rules_back = f"{ruley+2},{d.rules_back}"
-                                    d.path += " > 3.4"
-                                    if d.comm == "start":
-                                        d.comm = "start3.4"
-                                    else:
-                                        d.comm = "x3.4"
+                        if (word2 in all_inflections_set and
+                                word3 in all_inflections_set):
 
-                                    if comp(d) not in w.matches:
-                                        matches_dict[d.init] += [(
-                                            comp(d), d.comm,
-                                            f"{comp_rules(d)}", d.path)]
-                                        w.matches.add(comp(d))
-                                        d.matches.add(comp(d))
-                                        unmatched_set.discard(d.init)
+                            n = d.replace(
+                                front=f"{d.front}{word1} + ",
+                                word=word2,
+                                back=f" + {word3}{d.back}",
+                                rules_front=f"{d.rules_front}{rulex+2},",
+                                rules_back=f"{ruley+2},{d.rules_back}",
+                                path=f"{d.path} > 3.4",
+                                comm=f"{comm}.4")
+                            add_match(n, n.comm, comp_rules(n))
 
-                                    d = DotDict(d_orig)
 
-    return d_orig
-
-
-def four_word_sandhi(d: DotDict) -> DotDict:
+def four_word_sandhi(d: PathNode) -> None:
 
     """split into four words, apply sandhi rules, then
     1. match or 2. pass through"""
 
-    d_orig = DotDict(d)
-
     if comp(d) not in w.matches:
 
         for x in range(0, len(d.word)-1):
@@ -1343,75 +1524,39 @@ def four_word_sandhi(d: DotDict) -> DotDict:
 
                     # bla* *la* *la* *lah
 
-                    for rulex in rules:
-                        chAx = rules[rulex]["chA"]
-                        chBx = rules[rulex]["chB"]
-                        ch1x = rules[rulex]["ch1"]
-                        ch2x = rules[rulex]["ch2"]
-
-                        if (wordA_lastletter == chAx and
-                                wordB_firstletter == chBx):
-                            word1 = wordA[:-1] + ch1x
-                            word2 = ch2x + wordB[1:]
-
-                            for ruley in rules:
-                                chAy = rules[ruley]["chA"]
-                                chBy = rules[ruley]["chB"]
-                                ch1y = rules[ruley]["ch1"]
-                                ch2y = rules[ruley]["ch2"]
-
-                                if wordB_lastletter == chAy and \
-                                        wordC_firstletter == chBy:
-                                    word2 = (ch2x + wordB[1:])[:-1] + ch1y
-                                    word3 = ch2y + wordC[1:]
-
-                                    for rulez in rules:
-                                        chAz = rules[rulez]["chA"]
-                                        chBz = rules[rulez]["chB"]
-                                        ch1z = rules[rulez]["ch1"]
-                                        ch2z = rules[rulez]["ch2"]
-
-                                        if (wordC_lastletter == chAz and
-                                                wordD_firstletter == chBz):
-                                            word3 = (
-                                                ch2y + wordC[1:])[:-1] + ch1z
-                                            word4 = ch2z + wordD[1:]
-
-                                            if (word1 in all_inflections_set
-                                                and
-                                                word2 in all_inflections_set
-                                                and
-                                                word3 in all_inflections_set
-                                                and
-                                                    word4 in all_inflections_set):
-                                                d.front = f"{d.front}{word1} + {word2} + "
-                                                d.word = word3
-                                                d.back = f" + {word4}{d.back}"
-                                                d.rules_front += f"{rulex+2},{ruley+2}"
-                                                d.rules_back = f"{rulez+2},{d.rules_back}"
-                                                d.path += " > 4"
-                                                d.comm = "x4"
-
-                                                if comp(d) not in w.matches:
-                                                    matches_dict[d.init] += [(
-                                                        comp(d), d.comm,
-                                                        f"{comp_rules(d)}",
-                                                        d.path)]
-                                                    w.matches.add(comp(d))
-                                                    d.matches.add(comp(d))
-                                                    unmatched_set.discard(
-                                                        d.init)
-
-                                                d = DotDict(d_orig)
-
-    return d_orig
-
-
-def comp_rules(d: DotDict) -> str:
+                    for rulex, ch1x, ch2x in rules_index.get(
+                            (wordA_lastletter, wordB_firstletter), []):
+                        word1 = wordA[:-1] + ch1x
+
+                        for ruley, ch1y, ch2y in rules_index.get(
+                                (wordB_lastletter, wordC_firstletter), []):
+                            word2 = (ch2x + wordB[1:])[:-1] + ch1y
+
+                            for rulez, ch1z, ch2z in rules_index.get(
+                                    (wordC_lastletter, wordD_firstletter), []):
+                                word3 = (ch2y + wordC[1:])[:-1] + ch1z
+                                word4 = ch2z + wordD[1:]
+
+                                if (word1 in all_inflections_set and
+                                        word2 in all_inflections_set and
+                                        word3 in all_inflections_set and
+                                        word4 in all_inflections_set):
+                                    n = d.replace(
+                                        front=f"{d.front}{word1} + {word2} + ",
+                                        word=word3,
+                                        back=f" + {word4}{d.back}",
+                                        rules_front=f"{d.rules_front}{rulex+2},{ruley+2}",
+                                        rules_back=f"{rulez+2},{d.rules_back}",
+                                        path=f"{d.path} > 4",
+                                        comm="x4")
+                                    add_match(n, n.comm, comp_rules(n))
+
+
+def comp_rules(d: PathNode) -> str:
     return f"{d.rules_front}{d.rules_back}"
 
 
-def dprint(d: DotDict) -> None:
+def dprint(d: PathNode) -> None:
     print(f"count:\t{d.count}")
     print(f"comm:\t{d.comm}")
     print(f"init:\t'{d.init}'")
@@ -1421,8 +1566,6 @@ def dprint(d: DotDict) -> None:
     print(f"comp:\t[yellow]{comp(d)}")
     print(f"rules_front:\t{d.rules_front}")
     print(f"rules_back:\t{d.rules_back}")
-    # print(f"tried:\t{d.tried}")
-    # print(f"matches:\t{d.matches}")
     print(f"path:\t{d.path}")
     print(f"processes:\t{d.processes}")
     print()
@@ -3,15 +3,20 @@
 """Creates a word frequency file for every book in
 VRI Chaṭṭha Saṅgāyana Tipiṭaka."""
 
-import nltk
-import pandas as pd
 import os
+import re
+
+from collections import Counter, deque
+from multiprocessing import Pool
+from multiprocessing.pool import Pool as PoolType
+from pathlib import Path
+from typing import Iterator, List, Tuple
 
 from rich import print
-from tools.clean_machine import clean_machine
+from db.frequency.word_count_store import WordCountStoreWriter
+from tools.clean_machine import allowed_characters, clean_machine
 from tools.pali_text_files import ebts
 from tools.paths import ProjectPaths
-nltk.download('punkt')
 
 
 def main():
@@ -307,78 +312,103 @@ def sanity_tests(pth: ProjectPaths, tipitaka_dict, list_of_sections):
     make_raw_text_csv(pth, tipitaka_dict)
 
 
-def make_raw_text_csv(pth: ProjectPaths, tipitaka_dict):
-    """Make clean text files, just letters no punctation."""
-    print("[green]making raw text csvs")
+# clean_machine only reports the characters it doesn't know,
+# e.g. "#", "%" or "|", so they are split off here, as nltk did,
+# and left out of the counts, so every word is only letters
+not_a_letter = re.compile(f"[^{re.escape(allowed_characters)}\\s]+")
 
-    full_text = ""
-    ebt_text = ""
+# files being cleaned or waiting to be written, per worker
+files_in_flight_per_worker = 2
 
-    for section, texts in tipitaka_dict.items():
-        print(f"{section}")
 
-        text_clean = ""
+def clean_and_count(file_path: Path) -> Tuple[str, Counter]:
+    """Clean one text file and count its words, in a worker process."""
+    with open(file_path) as f:
+        text_clean = clean_machine(f.read())
+    words = not_a_letter.sub(" ", text_clean).split()
+    return text_clean, Counter(words)
 
-        for t in texts:
-            f = open(pth.cst_txt_dir.joinpath(t))
-            file_read = f.read()
-            text_clean += f"{clean_machine(file_read)}\n\n"
 
-            if t in ebts:
-                ebt_text += f"{clean_machine(file_read)}\n\n"
+def clean_and_count_in_order(
+        pool: PoolType, file_paths: List[Path]
+) -> Iterator[Tuple[str, Counter]]:
+    """clean_and_count each file in the pool, in order. Unlike imap,
+    only a few files are handed out ahead of the one being written,
+    so finished texts can't pile up in memory."""
 
-        full_text += text_clean
+    max_in_flight = files_in_flight_per_worker * (os.cpu_count() or 1)
+    pending: deque = deque()
+    for file_path in file_paths:
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(clean_and_count, (file_path,)))
+    while pending:
+        yield pending.popleft().get()
 
-        with open(
-                pth.raw_text_dir.joinpath(section).with_suffix(".txt"),
-                "w") as f:
-            f.write(text_clean)
 
-        # !!! make one function for all these raw and csv saves
-        # !!! text, df, raw_text_path word_count_path
+def make_raw_text_csv(pth: ProjectPaths, tipitaka_dict):
+    """Make clean text files, just letters no punctation.
 
-        word_count_df = make_word_count_df(text_clean)
-        word_count_df.to_csv(
-            pth.word_count_dir.joinpath(section).with_suffix(".csv"),
-            sep="\t", index=False, header=False)
+    Each file is cleaned and counted once, in a process pool, in order.
+    Its text is written out and its count added to the section, ebt and
+    tipiṭaka totals as soon as it comes back, so the whole text is never
+    held in memory. The section counts also go into one binary
+    word count store, which the frequency stages memory-map."""
+    print("[green]making raw text csvs")
 
-    save_ebt_raw_text_and_csv(pth, ebt_text)
-    save_tipitaka_raw_text_and_csv(pth, full_text)
+    file_paths = [
+        pth.cst_txt_dir.joinpath(t)
+        for texts in tipitaka_dict.values()
+        for t in texts]
 
+    tipitaka_counter: Counter = Counter()
+    ebt_counter: Counter = Counter()
+    store_writer = WordCountStoreWriter()
 
-def make_word_count_df(text):
-    """Tokenize the words and count frequency."""
-    words = nltk.word_tokenize(text)
-    freq = nltk.FreqDist(words).most_common()
-    word_count_df = pd.DataFrame(freq)
-    return word_count_df
+    with Pool() as pool, \
+            open(pth.tipitaka_raw_text_path, "w") as tipitaka_file, \
+            open(pth.ebt_raw_text_path, "w") as ebt_file:
 
+        results = clean_and_count_in_order(pool, file_paths)
 
-def save_tipitaka_raw_text_and_csv(pth: ProjectPaths, full_text):
-    """Save full tipitaka frequency, all files in one."""
-    print("[green]saving tipiṭaka csv")
+        for section, texts in tipitaka_dict.items():
+            print(f"{section}")
 
-    with open(pth.tipitaka_raw_text_path, "w") as f:
-        f.write(full_text)
+            section_counter: Counter = Counter()
+            with open(
+                    pth.raw_text_dir.joinpath(section).with_suffix(".txt"),
+                    "w") as section_file:
+                for t in texts:
+                    text_clean, word_count = next(results)
+                    section_file.write(f"{text_clean}\n\n")
+                    tipitaka_file.write(f"{text_clean}\n\n")
+                    section_counter.update(word_count)
+                    tipitaka_counter.update(word_count)
 
-    full_text_df = make_word_count_df(full_text)
-    full_text_df.to_csv(
-        pth.tipitaka_word_count_path,
-        sep="\t", index=False, header=False)
+                    if t in ebts:
+                        ebt_file.write(f"{text_clean}\n\n")
+                        ebt_counter.update(word_count)
 
+            save_word_count_csv(
+                section_counter,
+                pth.word_count_dir.joinpath(section).with_suffix(".csv"))
+            store_writer.add_section(section, section_counter)
 
-def save_ebt_raw_text_and_csv(pth: ProjectPaths, ebt_text):
-    """Save Early Buddhist Texts frequency."""
     print("[green]saving ebts csv")
+    save_word_count_csv(ebt_counter, pth.ebt_word_count_path)
+
+    print("[green]saving tipiṭaka csv")
+    save_word_count_csv(tipitaka_counter, pth.tipitaka_word_count_path)
+
+    print("[green]saving word count store")
+    store_writer.save(pth.word_count_store_path)
 
-    with open(
-            pth.ebt_raw_text_path, "w") as f:
-        f.write(ebt_text)
 
-    ebt_text_df = make_word_count_df(ebt_text)
-    ebt_text_df.to_csv(
-        pth.ebt_word_count_path,
-        sep="\t", index=False, header=False)
+def save_word_count_csv(word_count: Counter, path: Path):
+    """Save the words and their counts, most frequent first."""
+    with open(path, "w") as f:
+        for word, count in word_count.most_common():
+            f.write(f"{word}\t{count}\n")
 
 
 if __name__ == "__main__":
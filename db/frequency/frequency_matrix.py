@@ -0,0 +1,47 @@
+"""Count the inflections of every headword in every corpus section at once."""
+
+from itertools import repeat
+from typing import List
+
+import numpy as np
+
+from db.frequency.word_count_store import WordCountStore
+
+
+def section_counts(
+        store: WordCountStore,
+        sections: List[str],
+        headword_inflections: List[List[str]]
+) -> np.ndarray:
+    """Headwords × sections matrix of the summed word counts
+    of each headword's inflections in each of the sections.
+
+    Each word in the store has an integer id, i.e. a column in the
+    sections × words count matrix, shifted by one so column 0 stays
+    empty. Each headword becomes a run of ids starting with 0, so a
+    headword's count is the sum of its run of columns. Together that's
+    the sparse product of the headwords × words incidence matrix and the
+    count matrix, done with one np.add.reduceat per section."""
+
+    word_ids = store.word_ids()
+
+    # words not in the corpus get id 0 too
+    ids: List[int] = []
+    offsets: List[int] = []
+    for inflections in headword_inflections:
+        offsets.append(len(ids))
+        ids.append(-1)
+        ids.extend(map(word_ids.get, inflections, repeat(-1)))
+
+    result = np.zeros((len(offsets), len(sections)), dtype=np.int64)
+    if offsets:
+        id_array = np.array(ids) + 1
+        offset_array = np.array(offsets)
+        # one dense row at a time, the whole matrix would take a few GB
+        row = np.zeros(len(word_ids) + 1, dtype=np.int64)
+        for column, section in enumerate(sections):
+            section_ids, counts = store.section_row(section)
+            row[:] = 0
+            row[section_ids + 1] = counts
+            result[:, column] = np.add.reduceat(row[id_array], offset_array)
+    return result
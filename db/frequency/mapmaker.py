@@ -3,19 +3,21 @@
 """Create frequency map data and HTML and save into database."""
 
 import psutil
-from typing import List, TypedDict
-import pandas as pd
-import pickle
+from typing import List, Tuple, TypedDict
+import numpy as np
 import re
-from multiprocessing.managers import ListProxy
-from multiprocessing import Process, Manager
+import time
+from multiprocessing import Pool
 
 from rich import print
 from mako.template import Template
 from sqlalchemy import update
 from sqlalchemy.orm.session import Session
 
+from db.frequency.frequency_matrix import section_counts
+from db.frequency.word_count_store import WordCountStore
 from db.get_db_session import get_db_session
+from db.inflections.inflection_fingerprints import changed_headword_ids
 from db.models import DpdHeadwords
 
 from tools.pos import INDECLINABLES, CONJUGATIONS, DECLENSIONS
@@ -23,7 +25,6 @@ from tools.configger import config_test, config_update
 from tools.tic_toc import tic, toc
 from tools.superscripter import superscripter_uni
 from tools.paths import ProjectPaths
-from tools.utils import list_into_batches
 
 
 def main():
@@ -55,21 +56,19 @@ def main():
     db_session = get_db_session(pth.dpd_db_path)
 
     if not regenerate_all:
-        test_inflection_template_changed(pth)
-        test_changed_headwords(pth)
+        test_changed_inflections(pth)
         test_html_file_missing(db_session)
 
     else:
-        global changed_templates
-        global changed_headwords
+        global changed_ids
         global html_file_missing
-        changed_templates = []
-        changed_headwords = []
+        changed_ids = set()
         html_file_missing = []
 
-    dicts = make_dfs_and_dicts(pth)
+    print("[green]opening word count store")
+    store = WordCountStore(pth.word_count_store_path)
     num_logical_cores = psutil.cpu_count()
-    make_data_dict_and_html(pth, db_session, dicts, num_logical_cores, regenerate_all)
+    make_data_dict_and_html(pth, db_session, store, num_logical_cores, regenerate_all)
     db_session.close()
 
     # reset config
@@ -81,39 +80,15 @@ def main():
     toc()
 
 
-def test_inflection_template_changed(pth: ProjectPaths):
-    print("[green]test if inflection templates changed", end=" ")
+def test_changed_inflections(pth: ProjectPaths):
+    print("[green]test if inflections have changed", end=" ")
 
-    global changed_templates
-    try:
-        with open(pth.template_changed_path, "rb") as f:
-            changed_templates = pickle.load(f)
-
-            if changed_templates == []:
-                print("[white]ok")
-            else:
-                print(f"[bright_red]{len(changed_templates)}")
-
-    except FileNotFoundError as e:
-        print(f"[red]{e}")
-        assert(changed_templates == [])
-
-
-def test_changed_headwords(pth: ProjectPaths):
-    print("[green]test if stems or patterns have changed", end=" ")
-
-    global changed_headwords
-    try:
-        with open(pth.changed_headwords_path, "rb") as f:
-            changed_headwords = pickle.load(f)
-        if changed_headwords == []:
-            print("[white] ok")
-        else:
-            print(f"[bright_red]{len(changed_headwords)}")
-
-    except FileNotFoundError as e:
-        print(f"[bright_red]{e}")
-        assert(changed_templates == [])
+    global changed_ids
+    changed_ids = changed_headword_ids(pth)
+    if not changed_ids:
+        print("[white]ok")
+    else:
+        print(f"[bright_red]{len(changed_ids)}")
 
 
 def test_html_file_missing(db_session: Session):
@@ -143,163 +118,58 @@ def test_html_file_missing(db_session: Session):
         print("ok")
 
 
-def make_dfs_and_dicts(pth: ProjectPaths) -> List[dict]:
-    print("[green]making word count dicts and df's")
-
-    wc_dir = pth.word_count_dir
-
-    vinaya_pārājika_mūla = pd.read_csv(wc_dir.joinpath("vinaya_pārājika_mūla.csv"), sep="\t", header=None)
-    vinaya_pārājika_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_pārājika_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_ṭīkā = pd.read_csv(wc_dir.joinpath("vinaya_ṭīkā.csv"), sep="\t", header=None)
-    vinaya_pācittiya_mūla = pd.read_csv(wc_dir.joinpath("vinaya_pācittiya_mūla.csv"), sep="\t", header=None)
-    vinaya_pācittiya_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_pācittiya_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_mahāvagga_mūla = pd.read_csv(wc_dir.joinpath("vinaya_mahāvagga_mūla.csv"), sep="\t", header=None)
-    vinaya_mahāvagga_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_mahāvagga_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_cūḷavagga_mūla = pd.read_csv(wc_dir.joinpath("vinaya_cūḷavagga_mūla.csv"), sep="\t", header=None)
-    vinaya_cūḷavagga_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_cūḷavagga_aṭṭhakathā.csv"), sep="\t", header=None)
-    vinaya_parivāra_mūla = pd.read_csv(wc_dir.joinpath("vinaya_parivāra_mūla.csv"), sep="\t", header=None)
-    vinaya_parivāra_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("vinaya_parivāra_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_dīgha_mūla = pd.read_csv(wc_dir.joinpath("sutta_dīgha_mūla.csv"), sep="\t", header=None)
-    sutta_dīgha_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_dīgha_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_dīgha_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_dīgha_ṭīkā.csv"), sep="\t", header=None)
-    sutta_majjhima_mūla = pd.read_csv(wc_dir.joinpath("sutta_majjhima_mūla.csv"), sep="\t", header=None)
-    sutta_majjhima_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_majjhima_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_majjhima_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_majjhima_ṭīkā.csv"), sep="\t", header=None)
-    sutta_saṃyutta_mūla = pd.read_csv(wc_dir.joinpath("sutta_saṃyutta_mūla.csv"), sep="\t", header=None)
-    sutta_saṃyutta_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_saṃyutta_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_saṃyutta_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_saṃyutta_ṭīkā.csv"), sep="\t", header=None)
-    sutta_aṅguttara_mūla = pd.read_csv(wc_dir.joinpath("sutta_aṅguttara_mūla.csv"), sep="\t", header=None)
-    sutta_aṅguttara_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_aṅguttara_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_aṅguttara_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_aṅguttara_ṭīkā.csv"), sep="\t", header=None)
-    sutta_khuddaka1_mūla = pd.read_csv(wc_dir.joinpath("sutta_khuddaka1_mūla.csv"), sep="\t", header=None)
-    sutta_khuddaka1_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka1_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_khuddaka2_mūla = pd.read_csv(wc_dir.joinpath("sutta_khuddaka2_mūla.csv"), sep="\t", header=None)
-    sutta_khuddaka2_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka2_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_khuddaka3_mūla = pd.read_csv(wc_dir.joinpath("sutta_khuddaka3_mūla.csv"), sep="\t", header=None)
-    sutta_khuddaka3_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka3_aṭṭhakathā.csv"), sep="\t", header=None)
-    sutta_khuddaka3_ṭīkā = pd.read_csv(wc_dir.joinpath("sutta_khuddaka3_ṭīkā.csv"), sep="\t", header=None)
-    abhidhamma_dhammasaṅgaṇī_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_dhammasaṅgaṇī_mūla.csv"), sep="\t", header=None)
-    abhidhamma_vibhāṅga_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_vibhāṅga_mūla.csv"), sep="\t", header=None)
-    abhidhamma_dhātukathā_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_dhātukathā_mūla.csv"), sep="\t", header=None)
-    abhidhamma_puggalapaññatti_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_puggalapaññatti_mūla.csv"), sep="\t", header=None)
-    abhidhamma_kathāvatthu_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_kathāvatthu_mūla.csv"), sep="\t", header=None)
-    abhidhamma_yamaka_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_yamaka_mūla.csv"), sep="\t", header=None)
-    abhidhamma_paṭṭhāna_mūla = pd.read_csv(wc_dir.joinpath("abhidhamma_paṭṭhāna_mūla.csv"), sep="\t", header=None)
-    abhidhamma_aṭṭhakathā = pd.read_csv(wc_dir.joinpath("abhidhamma_aṭṭhakathā.csv"), sep="\t", header=None)
-    abhidhamma_ṭīkā = pd.read_csv(wc_dir.joinpath("abhidhamma_ṭīkā.csv"), sep="\t", header=None)
-    aññā_visuddhimagga = pd.read_csv(wc_dir.joinpath("aññā_visuddhimagga.csv"), sep="\t", header=None)
-    aññā_visuddhimagga_ṭīkā = pd.read_csv(wc_dir.joinpath("aññā_visuddhimagga_ṭīkā.csv"), sep="\t", header=None)
-    aññā_leḍī = pd.read_csv(wc_dir.joinpath("aññā_leḍī.csv"), sep="\t", header=None)
-    aññā_buddha_vandanā = pd.read_csv(wc_dir.joinpath("aññā_buddha_vandanā.csv"), sep="\t", header=None)
-    aññā_vaṃsa = pd.read_csv(wc_dir.joinpath("aññā_vaṃsa.csv"), sep="\t", header=None)
-    aññā_byākaraṇa = pd.read_csv(wc_dir.joinpath("aññā_byākaraṇa.csv"), sep="\t", header=None)
-    aññā_pucchavisajjana = pd.read_csv(wc_dir.joinpath("aññā_pucchavisajjana.csv"), sep="\t", header=None)
-    aññā_nīti = pd.read_csv(wc_dir.joinpath("aññā_nīti.csv"), sep="\t", header=None)
-    aññā_pakiṇṇaka = pd.read_csv(wc_dir.joinpath("aññā_pakiṇṇaka.csv"), sep="\t", header=None)
-    aññā_sihaḷa = pd.read_csv(wc_dir.joinpath("aññā_sihaḷa.csv"), sep="\t", header=None)
-
-    vinaya_pārājika_mūla_dict = dict(vinaya_pārājika_mūla.values.tolist())
-    vinaya_pārājika_aṭṭhakathā_dict = dict(vinaya_pārājika_aṭṭhakathā.values.tolist())
-    vinaya_ṭīkā_dict = dict(vinaya_ṭīkā.values.tolist())
-    vinaya_pācittiya_mūla_dict = dict(vinaya_pācittiya_mūla.values.tolist())
-    vinaya_pācittiya_aṭṭhakathā_dict = dict(vinaya_pācittiya_aṭṭhakathā.values.tolist())
-    vinaya_mahāvagga_mūla_dict = dict(vinaya_mahāvagga_mūla.values.tolist())
-    vinaya_mahāvagga_aṭṭhakathā_dict = dict(vinaya_mahāvagga_aṭṭhakathā.values.tolist())
-    vinaya_cūḷavagga_mūla_dict = dict(vinaya_cūḷavagga_mūla.values.tolist())
-    vinaya_cūḷavagga_aṭṭhakathā_dict = dict(vinaya_cūḷavagga_aṭṭhakathā.values.tolist())
-    vinaya_parivāra_mūla_dict = dict(vinaya_parivāra_mūla.values.tolist())
-    vinaya_parivāra_aṭṭhakathā_dict = dict(vinaya_parivāra_aṭṭhakathā.values.tolist())
-    sutta_dīgha_mūla_dict = dict(sutta_dīgha_mūla.values.tolist())
-    sutta_dīgha_aṭṭhakathā_dict = dict(sutta_dīgha_aṭṭhakathā.values.tolist())
-    sutta_dīgha_ṭīkā_dict = dict(sutta_dīgha_ṭīkā.values.tolist())
-    sutta_majjhima_mūla_dict = dict(sutta_majjhima_mūla.values.tolist())
-    sutta_majjhima_aṭṭhakathā_dict = dict(sutta_majjhima_aṭṭhakathā.values.tolist())
-    sutta_majjhima_ṭīkā_dict = dict(sutta_majjhima_ṭīkā.values.tolist())
-    sutta_saṃyutta_mūla_dict = dict(sutta_saṃyutta_mūla.values.tolist())
-    sutta_saṃyutta_aṭṭhakathā_dict = dict(sutta_saṃyutta_aṭṭhakathā.values.tolist())
-    sutta_saṃyutta_ṭīkā_dict = dict(sutta_saṃyutta_ṭīkā.values.tolist())
-    sutta_aṅguttara_mūla_dict = dict(sutta_aṅguttara_mūla.values.tolist())
-    sutta_aṅguttara_aṭṭhakathā_dict = dict(sutta_aṅguttara_aṭṭhakathā.values.tolist())
-    sutta_aṅguttara_ṭīkā_dict = dict(sutta_aṅguttara_ṭīkā.values.tolist())
-    sutta_khuddaka1_mūla_dict = dict(sutta_khuddaka1_mūla.values.tolist())
-    sutta_khuddaka1_aṭṭhakathā_dict = dict(sutta_khuddaka1_aṭṭhakathā.values.tolist())
-    sutta_khuddaka2_mūla_dict = dict(sutta_khuddaka2_mūla.values.tolist())
-    sutta_khuddaka2_aṭṭhakathā_dict = dict(sutta_khuddaka2_aṭṭhakathā.values.tolist())
-    sutta_khuddaka3_mūla_dict = dict(sutta_khuddaka3_mūla.values.tolist())
-    sutta_khuddaka3_aṭṭhakathā_dict = dict(sutta_khuddaka3_aṭṭhakathā.values.tolist())
-    sutta_khuddaka3_ṭīkā_dict = dict(sutta_khuddaka3_ṭīkā.values.tolist())
-    abhidhamma_dhammasaṅgaṇī_mūla_dict = dict(abhidhamma_dhammasaṅgaṇī_mūla.values.tolist())
-    abhidhamma_vibhāṅga_mūla_dict = dict(abhidhamma_vibhāṅga_mūla.values.tolist())
-    abhidhamma_dhātukathā_mūla_dict = dict(abhidhamma_dhātukathā_mūla.values.tolist())
-    abhidhamma_puggalapaññatti_mūla_dict = dict(abhidhamma_puggalapaññatti_mūla.values.tolist())
-    abhidhamma_kathāvatthu_mūla_dict = dict(abhidhamma_kathāvatthu_mūla.values.tolist())
-    abhidhamma_yamaka_mūla_dict = dict(abhidhamma_yamaka_mūla.values.tolist())
-    abhidhamma_paṭṭhāna_mūla_dict = dict(abhidhamma_paṭṭhāna_mūla.values.tolist())
-    abhidhamma_aṭṭhakathā_dict = dict(abhidhamma_aṭṭhakathā.values.tolist())
-    abhidhamma_ṭīkā_dict = dict(abhidhamma_ṭīkā.values.tolist())
-    aññā_visuddhimagga_dict = dict(aññā_visuddhimagga.values.tolist())
-    aññā_visuddhimagga_ṭīkā_dict = dict(aññā_visuddhimagga_ṭīkā.values.tolist())
-    aññā_leḍī_dict = dict(aññā_leḍī.values.tolist())
-    aññā_buddha_vandanā_dict = dict(aññā_buddha_vandanā.values.tolist())
-    aññā_vaṃsa_dict = dict(aññā_vaṃsa.values.tolist())
-    aññā_byākaraṇa_dict = dict(aññā_byākaraṇa.values.tolist())
-    aññā_pucchavisajjana_dict = dict(aññā_pucchavisajjana.values.tolist())
-    aññā_nīti_dict = dict(aññā_nīti.values.tolist())
-    aññā_pakiṇṇaka_dict = dict(aññā_pakiṇṇaka.values.tolist())
-    aññā_sihaḷa_dict = dict(aññā_sihaḷa.values.tolist())
-
-    dicts = [
-        vinaya_pārājika_mūla_dict,
-        vinaya_pārājika_aṭṭhakathā_dict,
-        vinaya_ṭīkā_dict,
-        vinaya_pācittiya_mūla_dict,
-        vinaya_pācittiya_aṭṭhakathā_dict,
-        vinaya_mahāvagga_mūla_dict,
-        vinaya_mahāvagga_aṭṭhakathā_dict,
-        vinaya_cūḷavagga_mūla_dict,
-        vinaya_cūḷavagga_aṭṭhakathā_dict,
-        vinaya_parivāra_mūla_dict,
-        vinaya_parivāra_aṭṭhakathā_dict,
-        sutta_dīgha_mūla_dict,
-        sutta_dīgha_aṭṭhakathā_dict,
-        sutta_dīgha_ṭīkā_dict,
-        sutta_majjhima_mūla_dict,
-        sutta_majjhima_aṭṭhakathā_dict,
-        sutta_majjhima_ṭīkā_dict,
-        sutta_saṃyutta_mūla_dict,
-        sutta_saṃyutta_aṭṭhakathā_dict,
-        sutta_saṃyutta_ṭīkā_dict,
-        sutta_aṅguttara_mūla_dict,
-        sutta_aṅguttara_aṭṭhakathā_dict,
-        sutta_aṅguttara_ṭīkā_dict,
-        sutta_khuddaka1_mūla_dict,
-        sutta_khuddaka1_aṭṭhakathā_dict,
-        sutta_khuddaka2_mūla_dict,
-        sutta_khuddaka2_aṭṭhakathā_dict,
-        sutta_khuddaka3_mūla_dict,
-        sutta_khuddaka3_aṭṭhakathā_dict,
-        sutta_khuddaka3_ṭīkā_dict,
-        abhidhamma_dhammasaṅgaṇī_mūla_dict,
-        abhidhamma_aṭṭhakathā_dict,
-        abhidhamma_ṭīkā_dict,
-        abhidhamma_vibhāṅga_mūla_dict,
-        abhidhamma_dhātukathā_mūla_dict,
-        abhidhamma_puggalapaññatti_mūla_dict,
-        abhidhamma_kathāvatthu_mūla_dict,
-        abhidhamma_yamaka_mūla_dict,
-        abhidhamma_paṭṭhāna_mūla_dict,
-        aññā_visuddhimagga_dict,
-        aññā_visuddhimagga_ṭīkā_dict,
-        aññā_leḍī_dict,
-        aññā_buddha_vandanā_dict,
-        aññā_vaṃsa_dict,
-        aññā_byākaraṇa_dict,
-        aññā_pucchavisajjana_dict,
-        aññā_nīti_dict,
-        aññā_pakiṇṇaka_dict,
-        aññā_sihaḷa_dict
-    ]
-    return dicts
+# the sections in the order of the cells of the frequency map
+map_sections = [
+    "vinaya_pārājika_mūla",
+    "vinaya_pārājika_aṭṭhakathā",
+    "vinaya_ṭīkā",
+    "vinaya_pācittiya_mūla",
+    "vinaya_pācittiya_aṭṭhakathā",
+    "vinaya_mahāvagga_mūla",
+    "vinaya_mahāvagga_aṭṭhakathā",
+    "vinaya_cūḷavagga_mūla",
+    "vinaya_cūḷavagga_aṭṭhakathā",
+    "vinaya_parivāra_mūla",
+    "vinaya_parivāra_aṭṭhakathā",
+    "sutta_dīgha_mūla",
+    "sutta_dīgha_aṭṭhakathā",
+    "sutta_dīgha_ṭīkā",
+    "sutta_majjhima_mūla",
+    "sutta_majjhima_aṭṭhakathā",
+    "sutta_majjhima_ṭīkā",
+    "sutta_saṃyutta_mūla",
+    "sutta_saṃyutta_aṭṭhakathā",
+    "sutta_saṃyutta_ṭīkā",
+    "sutta_aṅguttara_mūla",
+    "sutta_aṅguttara_aṭṭhakathā",
+    "sutta_aṅguttara_ṭīkā",
+    "sutta_khuddaka1_mūla",
+    "sutta_khuddaka1_aṭṭhakathā",
+    "sutta_khuddaka2_mūla",
+    "sutta_khuddaka2_aṭṭhakathā",
+    "sutta_khuddaka3_mūla",
+    "sutta_khuddaka3_aṭṭhakathā",
+    "sutta_khuddaka3_ṭīkā",
+    "abhidhamma_dhammasaṅgaṇī_mūla",
+    "abhidhamma_aṭṭhakathā",
+    "abhidhamma_ṭīkā",
+    "abhidhamma_vibhāṅga_mūla",
+    "abhidhamma_dhātukathā_mūla",
+    "abhidhamma_puggalapaññatti_mūla",
+    "abhidhamma_kathāvatthu_mūla",
+    "abhidhamma_yamaka_mūla",
+    "abhidhamma_paṭṭhāna_mūla",
+    "aññā_visuddhimagga",
+    "aññā_visuddhimagga_ṭīkā",
+    "aññā_leḍī",
+    "aññā_buddha_vandanā",
+    "aññā_vaṃsa",
+    "aññā_byākaraṇa",
+    "aññā_pucchavisajjana",
+    "aññā_nīti",
+    "aññā_pakiṇṇaka",
+    "aññā_sihaḷa",
+]
 
 
 def colourme(value, hi, low):
@@ -348,21 +218,15 @@ class ParsedResult(TypedDict):
     id: int
     freq_html: str
 
-def _parse_item(i: DpdHeadwords, dicts: List[dict]) -> ParsedResult:
-    inflections = i.inflections_list
+def _parse_item(
+        i: DpdHeadwords, counts: List[int], template: Template
+) -> ParsedResult:
+    """Render the frequency map of a headword
+    from its counts in each section."""
 
-    section = 1
     d = {}
-    for dict in dicts:
-        count = 0
-        for inflection in inflections:
-            if inflection in dict:
-                infl = dict.get(inflection)
-                if infl is not None:
-                    count += infl
-
+    for section, count in enumerate(counts, start=1):
         d[str(section)] = {"data": count, "class": ""}
-        section += 1
 
     d_values = [v["data"] for __k__, v, in d.items()]
 
@@ -390,7 +254,6 @@ def _parse_item(i: DpdHeadwords, dicts: List[dict]) -> ParsedResult:
         elif i.pos in DECLENSIONS:
             map_html += f"""<p class="heading underlined">Exact matches of <b>{superscripter_uni(i.lemma_1)} and its declensions</b> in the Chaṭṭha Saṅgāyana corpus.</p>"""
 
-        template = Template(filename='db/frequency/frequency.html')
         map_html += str(template.render(d=d))
 
     else:
@@ -398,10 +261,51 @@ def _parse_item(i: DpdHeadwords, dicts: List[dict]) -> ParsedResult:
 
     return ParsedResult(id=i.id, freq_html=map_html)
 
+# set in each worker process by _init_parse_worker
+worker_pth: ProjectPaths
+worker_headwords: List[DpdHeadwords]
+worker_counts: np.ndarray
+worker_template: Template
+
+
+def _init_parse_worker(
+        pth: ProjectPaths,
+        headwords: List[DpdHeadwords],
+        counts: np.ndarray
+) -> None:
+    """Compile the template once per worker process."""
+    global worker_pth, worker_headwords, worker_counts, worker_template
+    worker_pth = pth
+    worker_headwords = headwords
+    worker_counts = counts
+    worker_template = Template(filename='db/frequency/frequency.html')
+
+
+def _parse_range(index_range: Tuple[int, int]) -> List[ParsedResult]:
+    """Parse the headwords in the range and return all the results together."""
+
+    start, stop = index_range
+    batch = worker_headwords[start:stop]
+    res = [
+        _parse_item(i, worker_counts[x].tolist(), worker_template)
+        for x, i in enumerate(batch, start=start)]
+
+    # Save the details of the first item of the batch for logging and review.
+    first_word = batch[0]
+    first_map_html = res[0]["freq_html"]
+
+    with open(
+        worker_pth.freq_html_dir.joinpath(
+            first_word.lemma_1).with_suffix(".html"), "w") as f:
+        f.write(first_map_html)
+
+    return res
+
+
 def make_data_dict_and_html(
         pth: ProjectPaths,
         db_session: Session,
-        dicts: List[dict],
+        store: WordCountStore,
         use_n_processes: int,
         regenerate_all: bool
 ):
@@ -413,75 +317,42 @@ def make_data_dict_and_html(
         """Filter predicate function which returns whether an item should be kept.
         """
         return (i.pos != "idiom" and \
-                (i.pattern in changed_templates or \
-                 i.lemma_1 in changed_headwords or \
+                (i.id in changed_ids or \
                  i.id in html_file_missing or \
                  regenerate_all is True))
 
     # Filter the DpdHeadwords and Derived data list, while keeping the related items together in a Tuple.
     filtered_pairs: List = [i for i in dpd_db if _keep(i)]
 
-    # Split the list into batches, each batch will be assigned to a Process() thread.
-    batches: List = list_into_batches(filtered_pairs, use_n_processes)
-
-    processes: List[Process] = []
-
-    # The Manager allows shared memory between the worker threads.
-    manager = Manager()
-    results_list: ListProxy = manager.list()
-
-    # Don't need to pass everything as arguments, sub-threads have access to
-    # memory objects of the parent scope. This is a good way to access shared
-    # read-only memory object between threads.
-
-    def _parse_batch(batch: List, __batch_idx__: int):
-        """Takes a batch of items (and the necessary lookup dicts for the work), applies the work with _parse_item_pair() to each work item.
-
-        The results are added to a ListProxy, which is going to be a list() in shared memory from the multiprocessing Manager().
-        """
-
-        if len(batch) == 0:
-            print("[yellow]Batch list has 0 length")
-            return
-
-        res = [_parse_item(i, dicts) for i in batch]
-        results_list.extend(res)
-
-        # Save the details of the first item of the batch for logging and review.
-        first_word = batch[0]
-        first_map_html = res[0]["freq_html"]
-
-        with open(
-            pth.freq_html_dir.joinpath(
-                first_word.lemma_1).with_suffix(".html"), "w") as f:
-            f.write(first_map_html)
-
-    for batch_idx, batch in enumerate(batches):
-        # Assign a Process() thread to each batch list.
-        p = Process(target=_parse_batch, args=(batch, batch_idx,))
-
-        # Start the Process's target function, i.e. _parse_batch()
-        p.start()
-
-        # Keep a handle to the process.
-        processes.append(p)
-
-    # At this point the thread workers are started.
-    #
-    # However, the main thread will not automatically wait for sub-threads to
-    # complete, it would simply continue (and exit), terminating the worker
-    # threads before they complete.
-
-    # Process.join() blocks the main thread (i.e. makes it wait) until the
-    # process whose join() method is called terminates.
-    for p in processes:
-        p.join()
-
-    # At this point all worker processes are completed and the main thread will
-    # continue.
-
-    # Convert the ListProxy from Manager() back to a regular list()
-    add_to_db: List[ParsedResult] = list(results_list)
+    # All the counts at once, headwords × sections.
+    count_start = time.perf_counter()
+    counts = section_counts(
+        store, map_sections, [i.inflections_list for i in filtered_pairs])
+    print(f"[green]counted in {time.perf_counter() - count_start:.1f}s")
+
+    # Split the list into index ranges, one task each.
+    batch_size = 500
+    ranges = [
+        (start, min(start + batch_size, len(filtered_pairs)))
+        for start in range(0, len(filtered_pairs), batch_size)]
+
+    # One pool for the whole run. The workers get the headwords and the
+    # counts from the parent when they fork, so only the index ranges are
+    # sent to them, and each range comes back as one list of results.
+    add_to_db: List[ParsedResult] = []
+    parse_start = time.perf_counter()
+
+    with Pool(
+        use_n_processes,
+        initializer=_init_parse_worker,
+        initargs=(pth, filtered_pairs, counts)
+    ) as pool:
+        for res in pool.imap(_parse_range, ranges):
+            add_to_db.extend(res)
+
+    parse_time = time.perf_counter() - parse_start
+    if parse_time > 0:
+        print(f"[green]{len(add_to_db):,} headwords at {len(add_to_db) / parse_time:,.0f} headwords/sec")
 
     # Add the results to the database.
     print("[green]adding to db", end=" ")
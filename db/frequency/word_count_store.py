@@ -0,0 +1,179 @@
+"""The word counts of every corpus section in one binary file,
+which is memory-mapped rather than parsed.
+
+The file holds
+- a header: magic, version, length of the json index
+- the json index: the section names and where each array starts
+- the vocabulary: every word, sorted, utf-8, separated by newlines
+- the counts: a sparse sections × words matrix in CSR form,
+  indptr, word ids and counts
+
+Worker processes forked after a store is opened share its pages."""
+
+import json
+import mmap
+import os
+import struct
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# bump when the layout changes
+STORE_VERSION = 1
+
+# magic, version, json index length
+header_format = "<8sIQ"
+header_size = struct.calcsize(header_format)
+store_magic = b"DPDWCNT\0"
+
+# arrays start on multiples of this
+alignment = 8
+
+
+class WordCountStoreWriter:
+    """Collect the word count of each section, then save them together.
+
+    Each section is turned into arrays as soon as it is added, so only
+    the vocabulary is held as Python objects."""
+
+    def __init__(self) -> None:
+        self.sections: List[str] = []
+        self.word_ids: Dict[str, int] = {}
+        self.rows: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def add_section(self, section: str, word_count: Counter) -> None:
+        set_id = self.word_ids.setdefault
+        ids = np.fromiter(
+            (set_id(word, len(self.word_ids)) for word in word_count),
+            dtype=np.int32, count=len(word_count))
+        counts = np.fromiter(
+            word_count.values(), dtype=np.int32, count=len(word_count))
+        self.sections.append(section)
+        self.rows.append((ids, counts))
+
+    def save(self, path: Path) -> None:
+        """Sort the vocabulary, renumber the words to match and write the
+        file, via a temp file so a reader never sees half of it."""
+
+        vocabulary = sorted(self.word_ids)
+        new_ids = np.empty(len(vocabulary), dtype=np.int32)
+        new_ids[[self.word_ids[word] for word in vocabulary]] = \
+            np.arange(len(vocabulary), dtype=np.int32)
+
+        indptr = np.zeros(len(self.rows) + 1, dtype=np.int64)
+        indices: List[np.ndarray] = []
+        data: List[np.ndarray] = []
+        for section, (ids, counts) in enumerate(self.rows):
+            ids = new_ids[ids]
+            order = np.argsort(ids)
+            indices.append(ids[order])
+            data.append(counts[order])
+            indptr[section + 1] = indptr[section] + len(ids)
+
+        arrays = {
+            "vocabulary": np.frombuffer(
+                "\n".join(vocabulary).encode(), dtype=np.uint8),
+            "indptr": indptr,
+            "indices": np.concatenate(indices + [np.empty(0, np.int32)]),
+            "data": np.concatenate(data + [np.empty(0, np.int32)]),
+        }
+
+        # offsets are from the end of the json index
+        offset = 0
+        index: dict = {"sections": self.sections, "arrays": {}}
+        for name, array in arrays.items():
+            index["arrays"][name] = {
+                "offset": offset,
+                "dtype": array.dtype.str,
+                "length": len(array)}
+            offset += -(-array.nbytes // alignment) * alignment
+        index_bytes = json.dumps(index, ensure_ascii=False).encode()
+        index_bytes += b" " * (-(header_size + len(index_bytes)) % alignment)
+
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(struct.pack(
+                header_format, store_magic, STORE_VERSION, len(index_bytes)))
+            f.write(index_bytes)
+            for array in arrays.values():
+                f.write(array.tobytes())
+                f.write(b"\0" * (-array.nbytes % alignment))
+        os.replace(temp_path, path)
+
+
+class WordCountStore:
+    """Read-only view of a saved store.
+
+    - sections: the section names, in the order they were added
+    - vocabulary(): all the words, sorted, a word's id is its position
+    - word_ids(): word: id
+    - section_row(section): the ids and counts of the words in a section
+    - section_dict(section): word: count"""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_length = struct.unpack_from(
+            header_format, self._mmap)
+        if magic != store_magic or version != STORE_VERSION:
+            raise ValueError(
+                f"{path} is not a version {STORE_VERSION} word count store")
+
+        index = json.loads(
+            self._mmap[header_size:header_size + index_length])
+        self.sections: List[str] = index["sections"]
+        self._section_numbers = {
+            section: number for number, section in enumerate(self.sections)}
+
+        start = header_size + index_length
+        arrays = {
+            name: np.frombuffer(
+                self._mmap,
+                dtype=np.dtype(spec["dtype"]),
+                count=spec["length"],
+                offset=start + spec["offset"])
+            for name, spec in index["arrays"].items()}
+        self._vocabulary_bytes = arrays["vocabulary"]
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.data = arrays["data"]
+
+        self._vocabulary: Optional[List[str]] = None
+        self._word_ids: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.vocabulary())
+
+    def vocabulary(self) -> List[str]:
+        """Decoded on first use."""
+        if self._vocabulary is None:
+            if len(self._vocabulary_bytes):
+                self._vocabulary = \
+                    self._vocabulary_bytes.tobytes().decode().split("\n")
+            else:
+                self._vocabulary = []
+        return self._vocabulary
+
+    def word_ids(self) -> Dict[str, int]:
+        if self._word_ids is None:
+            self._word_ids = {
+                word: word_id
+                for word_id, word in enumerate(self.vocabulary())}
+        return self._word_ids
+
+    def section_row(self, section: str) -> Tuple[np.ndarray, np.ndarray]:
+        """The word ids of a section, ascending, and their counts."""
+        number = self._section_numbers[section]
+        start, stop = self.indptr[number], self.indptr[number + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+    def section_dict(self, section: str) -> Dict[str, int]:
+        vocabulary = self.vocabulary()
+        ids, counts = self.section_row(section)
+        return {
+            vocabulary[word_id]: count
+            for word_id, count in zip(ids.tolist(), counts.tolist())}
@@ -4,9 +4,17 @@ import os
 import sys
 
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 
+# tuned for a server which only ever reads the db
+READ_ONLY_PRAGMAS = [
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+]
+
 
 def get_db_session(db_path: Path) -> Session:
     """Get the db session."""
@@ -27,3 +35,38 @@ def get_db_session(db_path: Path) -> Session:
         sys.exit(1)
 
     return db_sess
+
+
+def get_read_only_sessionmaker(db_path: Path) -> sessionmaker:
+    """Get a sessionmaker on a pooled, read-only engine.
+    Make it once and share it, each session then only
+    checks out a connection which is already open."""
+    if not os.path.isfile(db_path):
+        print(f"Database file doesn't exist: {db_path}")
+        sys.exit(1)
+
+    try:
+        db_eng = create_engine(
+            f"sqlite+pysqlite:///file:{db_path}?mode=ro&uri=true",
+            echo=False,
+            connect_args={"check_same_thread": False},
+            # enough for every thread of the server's threadpool
+            pool_size=10,
+            max_overflow=30)
+
+        @event.listens_for(db_eng, "connect")
+        def _set_pragmas(dbapi_connection, __connection_record__):
+            cursor = dbapi_connection.cursor()
+            for pragma in READ_ONLY_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+
+        # never autoflush, objects get modified for display,
+        # which must not be written back
+        Session = sessionmaker(db_eng, autoflush=False)
+
+    except Exception as e:
+        print(f"Can't connect to database: {e}")
+        sys.exit(1)
+
+    return Session
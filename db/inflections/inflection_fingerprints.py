@@ -0,0 +1,96 @@
+"""Fingerprints of everything a headword's inflections are made from,
+to tell which headwords need them regenerated.
+
+A headword's fingerprint hashes its lemma_1, pos, stem and pattern,
+the hash of its pattern's template, and the version of the set of
+tipiṭaka words, which decides the grayed out inflections.
+
+The fingerprints of the last run are saved, and so are the ids of the
+headwords whose fingerprint moved, as the changed set which the later
+stages read with changed_headword_ids."""
+
+import hashlib
+import pickle
+
+from pathlib import Path
+from typing import Dict, List, Set
+
+from db.models import DpdHeadwords, InflectionTemplates
+from tools.paths import ProjectPaths
+
+
+def _sha1(*parts: str) -> str:
+    return hashlib.sha1("\t".join(parts).encode()).hexdigest()
+
+
+def template_hashes(templates: List[InflectionTemplates]) -> Dict[str, str]:
+    """Pattern: hash of its like and data."""
+    return {
+        t.pattern: _sha1(t.pattern, t.like, t.data)
+        for t in templates}
+
+
+def words_version(path: Path) -> str:
+    """Hash of the saved set of tipiṭaka words."""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def make_fingerprints(
+        dpd_db: List[DpdHeadwords],
+        templates: List[InflectionTemplates],
+        tipitaka_words_version: str
+) -> Dict[int, str]:
+    """Headword id: fingerprint."""
+    hashes = template_hashes(templates)
+    return {
+        i.id: _sha1(
+            i.lemma_1,
+            i.pos,
+            i.stem,
+            i.pattern,
+            hashes.get(i.pattern, ""),
+            tipitaka_words_version)
+        for i in dpd_db}
+
+
+def changed_fingerprints(
+        old: Dict[int, str], new: Dict[int, str]) -> Set[int]:
+    """Ids of the headwords which are new or whose fingerprint moved."""
+    return {
+        headword_id for headword_id, fingerprint in new.items()
+        if old.get(headword_id) != fingerprint}
+
+
+def load_fingerprints(pth: ProjectPaths) -> Dict[int, str]:
+    try:
+        with open(pth.inflection_fingerprints_path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_fingerprints(
+        pth: ProjectPaths,
+        fingerprints: Dict[int, str],
+        changed_ids: Set[int]
+) -> None:
+    """Save the fingerprints and the changed set together,
+    after the inflections are committed."""
+    with open(pth.inflection_fingerprints_path, "wb") as f:
+        pickle.dump(fingerprints, f)
+    with open(pth.changed_inflections_path, "wb") as f:
+        pickle.dump(changed_ids, f)
+
+
+def changed_headword_ids(pth: ProjectPaths) -> Set[int]:
+    """Ids of the headwords whose inflections were regenerated
+    on the last run. Empty if there hasn't been one."""
+    try:
+        with open(pth.changed_inflections_path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return set()
@@ -4,13 +4,12 @@
 """
 Transliterate all inflections into Sinhala, Devanagari and Thai.
 - Regenerate from scratch OR
-- Update if stem & pattern has changed or inflection template has changed.
+- Update the headwords whose inflections were regenerated.
 Save into database.
 """
 
 
 import json
-import pickle
 
 from aksharamukha import transliterate
 from subprocess import check_output
@@ -21,6 +20,7 @@ from multiprocessing.managers import ListProxy
 from multiprocessing import Process, Manager
 
 from db.get_db_session import get_db_session
+from db.inflections.inflection_fingerprints import changed_headword_ids
 from db.models import DpdHeadwords
 
 from tools.configger import config_test
@@ -34,8 +34,7 @@ from tools.utils import list_into_batches
 def _parse_batch(
     batch: List[DpdHeadwords],
     pth: ProjectPaths,
-    changed_headwords: list,
-    changed_templates: list,
+    changed_ids: set,
     regenerate_all: bool,
     results_list: ListProxy,
     batch_idx: int,
@@ -54,10 +53,7 @@ def _parse_batch(
     counter: int = 0
 
     for counter, i in enumerate(batch):
-        test1 = i.pattern in changed_templates
-        test2 = i.lemma_1 in changed_headwords
-
-        if test1 or test2 or regenerate_all:
+        if i.id in changed_ids or regenerate_all:
             inflections: list = i.inflections_list
             inflections_index_dict[counter] = i.lemma_1
             inflections_for_json_dict[i.lemma_1] = {"inflections": inflections}
@@ -195,11 +191,7 @@ def main():
     db_session = get_db_session(pth.dpd_db_path)
     dpd_db = db_session.query(DpdHeadwords).all()
 
-    with open(pth.changed_headwords_path, "rb") as f:
-        changed_headwords: list = pickle.load(f)
-
-    with open(pth.template_changed_path, "rb") as f:
-        changed_templates: list = pickle.load(f)
+    changed_ids: set = changed_headword_ids(pth)
 
     tic()
     p_title("transliterating inflections")
@@ -230,8 +222,7 @@ def main():
             args=(
                 batch,
                 pth,
-                changed_headwords,
-                changed_templates,
+                changed_ids,
                 regenerate_all,
                 results_list,
                 batch_idx,
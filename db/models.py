@@ -21,10 +21,12 @@ from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import declared_attr
 from sqlalchemy.orm import object_session
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 
 from tools.cache_load import load_cf_set, load_idioms_set
 from tools.link_generator import generate_link
+from tools.lookup_key import normalize_lookup_key
 from tools.pali_sort_key import pali_sort_key
 from tools.pos import CONJUGATIONS
 from tools.pos import DECLENSIONS
@@ -226,6 +228,7 @@ class Lookup(Base):
     __tablename__ = "lookup"
 
     lookup_key: Mapped[str] = mapped_column(primary_key=True)
+    lookup_key_norm: Mapped[str] = mapped_column(default='', index=True)
     headwords: Mapped[str] = mapped_column(default='')
     roots: Mapped[str] = mapped_column(default='')
     deconstructor: Mapped[str] = mapped_column(default='')
@@ -240,6 +243,12 @@ class Lookup(Base):
     devanagari: Mapped[str] = mapped_column(default='')
     thai: Mapped[str] = mapped_column(default='')
 
+    @validates("lookup_key")
+    def _set_lookup_key_norm(self, __key__, value: str) -> str:
+        """Keep lookup_key_norm in step with every lookup_key."""
+        self.lookup_key_norm = normalize_lookup_key(value)
+        return value
+
     # headwords pack unpack
     
     def headwords_pack(self, list: list[int]) -> None:
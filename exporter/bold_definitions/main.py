@@ -6,6 +6,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
 
+from db.bold_definitions.bold_definitions_fts import fts_exists, fts_prefilter
 from db.get_db_session import get_db_session
 from db.models import BoldDefinition
 from tools.paths import ProjectPaths
@@ -35,6 +36,10 @@ def home_page(request: Request):
 def db_search(request: Request, search_1: str, search_2: str, option: str):
     db_session = get_db_session(pth.dpd_db_path)
 
+    # narrow down the rows with the fts index before the regex runs
+    query = db_session.query(BoldDefinition)
+    use_fts = fts_exists(db_session)
+
     # no search
     if not search_1 and not search_2:
         results = []
@@ -42,14 +47,20 @@ def db_search(request: Request, search_1: str, search_2: str, option: str):
     # starts_with search
     elif option == "starts_with":
         search_1_start = f"^{search_1}"
-        results = db_session.query(BoldDefinition) \
+        if use_fts:
+            query = fts_prefilter(
+                query, BoldDefinition.id, search_1_start, search_2)
+        results = query \
             .filter(BoldDefinition.bold.regexp_match(search_1_start)) \
             .filter(BoldDefinition.commentary.regexp_match(search_2)) \
             .all()
     
     # regex search
     elif option == "regex":
-        results = db_session.query(BoldDefinition) \
+        if use_fts:
+            query = fts_prefilter(
+                query, BoldDefinition.id, search_1, search_2)
+        results = query \
             .filter(BoldDefinition.bold.regexp_match(search_1)) \
             .filter(BoldDefinition.commentary.regexp_match(search_2)) \
             .all()
@@ -59,7 +70,10 @@ def db_search(request: Request, search_1: str, search_2: str, option: str):
     elif option == "fuzzy":
         search_1_fuzzy = fuzzy_replace(search_1)
         search_2_fuzzy = fuzzy_replace(search_2)
-        results = db_session.query(BoldDefinition) \
+        if use_fts:
+            query = fts_prefilter(
+                query, BoldDefinition.id, search_1, search_2, fuzzy=True)
+        results = query \
             .filter(BoldDefinition.bold.regexp_match(search_1_fuzzy)) \
             .filter(BoldDefinition.commentary.regexp_match(search_2_fuzzy)) \
             .all()
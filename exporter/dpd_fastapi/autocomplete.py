@@ -0,0 +1,181 @@
+"""Prefix index of lookup keys for the autocomplete endpoint."""
+
+import json
+
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from unidecode import unidecode
+
+from db.models import DpdHeadwords, Lookup
+from tools.lookup_key import normalize_lookup_key
+from tools.pali_sort_key import pali_sort_key
+
+
+class AutocompleteIndex:
+    """All the dictionary lookup keys, normalized and sorted twice:
+    as they are, and folded to ASCII, so "dham" finds dhamma and dhāma.
+    A prefix is bisected in one of them, depending on whether it has
+    any diacritics. The matches are ranked by ebt_count,
+    then in Pāḷi alphabetical order.
+
+    A prefix with a few matches ranks them all. The top matches of a
+    prefix with many matches, i.e. the first few letters, are ranked
+    once when the index is made, so no request ranks a wide range."""
+
+    # above this many matches, the top matches are ranked in advance
+    wide_range = 500
+
+    # most suggestions one request can get
+    max_limit = 50
+
+    # a longer prefix is refused rather than folded and bisected
+    max_prefix_length = 100
+
+    def __init__(self, keys: List[str], weights: List[int]) -> None:
+        self.keys = keys
+        self.weights = array("I", weights)
+
+        pali_order = sorted(range(len(keys)), key=lambda x: pali_sort_key(keys[x]))
+        self.pali_order = array("I", pali_order)
+        self.pali_rank = self._positions(self.pali_order)
+        self.weighted_order = array("I", sorted(
+            range(len(keys)),
+            key=lambda x: (-self.weights[x], self.pali_rank[x])))
+
+        folded_keys = [normalize_lookup_key(key) for key in keys]
+        self.exact_ids, self.exact_keys = self._sorted_by(folded_keys)
+        self.ascii_ids, self.ascii_keys = self._sorted_by(
+            [unidecode(key) for key in folded_keys])
+
+        self.exact_top = self._rank_wide_prefixes(self.exact_ids, self.exact_keys)
+        self.ascii_top = self._rank_wide_prefixes(self.ascii_ids, self.ascii_keys)
+
+    @staticmethod
+    def _sorted_by(sort_keys: List[str]) -> Tuple[array, List[str]]:
+        ids = sorted(range(len(sort_keys)), key=lambda x: sort_keys[x])
+        return array("I", ids), [sort_keys[x] for x in ids]
+
+    @staticmethod
+    def _positions(ids: array) -> array:
+        """The position of each id in ids."""
+        positions = array("I", bytes(4 * len(ids)))
+        for position, key_id in enumerate(ids):
+            positions[key_id] = position
+        return positions
+
+    def _rank_wide_prefixes(
+            self, ids: array, sorted_keys: List[str]
+    ) -> Dict[str, Tuple[List[int], List[int]]]:
+        """The top ids of every prefix with more than wide_range matches,
+        by weight and in Pāḷi order. A prefix one letter longer can only
+        be wide within a wide range, so only those are searched."""
+
+        weighted_rank = self._positions(self.weighted_order)
+        pali_rank = self.pali_rank
+        top: Dict[str, Tuple[List[int], List[int]]] = {}
+
+        wide_ranges = [(0, len(sorted_keys))]
+        length = 1
+        while wide_ranges:
+            next_ranges = []
+            for range_start, range_stop in wide_ranges:
+                start = range_start
+                for prefix, group in groupby(
+                        sorted_keys[range_start:range_stop],
+                        key=lambda x: x[:length]):
+                    stop = start + sum(1 for _ in group)
+                    if stop - start > self.wide_range:
+                        top[prefix] = (
+                            nsmallest(
+                                self.max_limit, ids[start:stop],
+                                key=weighted_rank.__getitem__),
+                            nsmallest(
+                                self.max_limit, ids[start:stop],
+                                key=pali_rank.__getitem__))
+                        next_ranges.append((start, stop))
+                    start = stop
+            wide_ranges = next_ranges
+            length += 1
+
+        return top
+
+    def complete(
+            self, prefix: str, limit: int = 10, weighted: bool = True
+    ) -> List[str]:
+        """The top lookup keys starting with the prefix."""
+
+        if len(prefix) > self.max_prefix_length:
+            return []
+        prefix = normalize_lookup_key(prefix.strip())
+        if not prefix:
+            return []
+        limit = min(limit, self.max_limit)
+
+        ascii_prefix = unidecode(prefix)
+        is_ascii = ascii_prefix == prefix
+        if is_ascii:
+            ids, sorted_keys = self.ascii_ids, self.ascii_keys
+            wide_top = self.ascii_top
+        else:
+            ids, sorted_keys = self.exact_ids, self.exact_keys
+            wide_top = self.exact_top
+
+        start = bisect_left(sorted_keys, prefix)
+        stop = bisect_left(sorted_keys, prefix + "\U0010ffff", lo=start)
+
+        if stop - start <= self.wide_range:
+            return self._rank(ids[start:stop], limit, weighted)
+
+        weighted_top, pali_top = wide_top[prefix]
+        top = weighted_top if weighted else pali_top
+        return [self.keys[x] for x in top[:limit]]
+
+    def _rank(self, key_ids, limit: int, weighted: bool) -> List[str]:
+        weights = self.weights
+        pali_rank = self.pali_rank
+        if weighted:
+            top = nsmallest(
+                limit, key_ids, key=lambda x: (-weights[x], pali_rank[x]))
+        else:
+            top = nsmallest(limit, key_ids, key=lambda x: pali_rank[x])
+        return [self.keys[x] for x in top]
+
+
+def make_autocomplete_index(db_session: Session) -> AutocompleteIndex:
+    """Index the lookup keys which lead to a dictionary entry,
+    i.e. headwords, roots, English or help,
+    weighted by the highest ebt_count of their headwords."""
+
+    ebt_counts: Dict[int, int] = {
+        headword_id: ebt_count or 0
+        for headword_id, ebt_count in db_session.query(
+            DpdHeadwords.id, DpdHeadwords.ebt_count)}
+
+    results = db_session \
+        .query(Lookup.lookup_key, Lookup.headwords) \
+        .filter(or_(
+            Lookup.headwords != "",
+            Lookup.roots != "",
+            Lookup.epd != "",
+            Lookup.help != "",
+            Lookup.abbrev != "")) \
+        .all()
+
+    keys: List[str] = []
+    weights: List[int] = []
+    for lookup_key, headwords in results:
+        keys.append(lookup_key)
+        if headwords:
+            weights.append(max(
+                (ebt_counts.get(x, 0) for x in json.loads(headwords)),
+                default=0))
+        else:
+            weights.append(0)
+
+    return AutocompleteIndex(keys, weights)
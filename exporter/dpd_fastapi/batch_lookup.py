@@ -0,0 +1,128 @@
+"""Look up every word of a passage in one go,
+for reader apps annotating whole pages."""
+
+import json
+
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, load_only
+
+from db.models import DpdHeadwords, Lookup
+from tools.clean_machine import clean_machine
+from tools.lookup_key import normalize_lookup_key
+from tools.meaning_construction import make_meaning_combo
+
+# most distinct words in one request
+batch_max_tokens = 5000
+
+# most characters of text and words in one request,
+# checked before anything is cleaned or split
+batch_max_chars = 200_000
+
+# sqlite's default limit of variables in one statement
+sql_chunk_size = 999
+
+
+class BatchLookupRequest(BaseModel):
+    """Either a list of words, or a passage of text to split into words."""
+    words: Optional[list[str]] = None
+    text: Optional[str] = None
+
+
+def request_length(request: BatchLookupRequest) -> int:
+    """The characters of text and words in the request."""
+    length = len(request.text or "")
+    for word in request.words or []:
+        length += len(word)
+    return length
+
+
+def tokenize(request: BatchLookupRequest) -> list[str]:
+    """The cleaned words of the request, in order."""
+
+    tokens: list[str] = []
+    if request.text:
+        tokens.extend(clean_machine(request.text).split())
+    if request.words:
+        for word in request.words:
+            tokens.extend(clean_machine(word).split())
+    return tokens
+
+
+def chunks(items: list, size: int):
+    for x in range(0, len(items), size):
+        yield items[x:x + size]
+
+
+def batch_lookup(
+        db_session: Session,
+        tokens: list[str],
+        render_summary: Callable[[DpdHeadwords], str]
+) -> dict:
+    """Resolve all the tokens with one query on the Lookup table
+    and one on the DpdHeadwords table.
+
+    Returns
+    - tokens: the words, in order
+    - lookup: for each word found, its headword ids and deconstructions
+    - headwords: for each headword id, its lemma_1, pos and meaning,
+    and its summary_html, as in the search results"""
+
+    keys = {token: normalize_lookup_key(token) for token in tokens}
+    distinct_keys = list(dict.fromkeys(keys.values()))
+
+    lookup_by_key: dict[str, dict[str, list]] = {}
+    for key_chunk in chunks(distinct_keys, sql_chunk_size):
+        results = db_session \
+            .query(
+                Lookup.lookup_key_norm,
+                Lookup.headwords,
+                Lookup.deconstructor) \
+            .filter(Lookup.lookup_key_norm.in_(key_chunk)) \
+            .all()
+        for lookup_key_norm, headwords, deconstructor in results:
+            entry = lookup_by_key.setdefault(
+                lookup_key_norm, {"headwords": [], "deconstructor": []})
+            for headword_id in json.loads(headwords) if headwords else []:
+                if headword_id not in entry["headwords"]:
+                    entry["headwords"].append(headword_id)
+            for deconstruction in \
+                    json.loads(deconstructor) if deconstructor else []:
+                if deconstruction not in entry["deconstructor"]:
+                    entry["deconstructor"].append(deconstruction)
+
+    headword_ids = list({
+        headword_id
+        for entry in lookup_by_key.values()
+        for headword_id in entry["headwords"]})
+
+    headwords: dict[int, dict[str, str]] = {}
+    for id_chunk in chunks(headword_ids, sql_chunk_size):
+        results = db_session \
+            .query(DpdHeadwords) \
+            .options(load_only(
+                DpdHeadwords.id,
+                DpdHeadwords.lemma_1,
+                DpdHeadwords.pos,
+                DpdHeadwords.meaning_1,
+                DpdHeadwords.meaning_lit,
+                DpdHeadwords.meaning_2)) \
+            .filter(DpdHeadwords.id.in_(id_chunk)) \
+            .all()
+        for i in results:
+            headwords[i.id] = {
+                "lemma_1": i.lemma_1,
+                "pos": i.pos,
+                "meaning": make_meaning_combo(i),
+                "summary_html": render_summary(i)}
+
+    lookup = {
+        token: lookup_by_key[key]
+        for token, key in keys.items()
+        if key in lookup_by_key}
+
+    return {
+        "tokens": tokens,
+        "lookup": lookup,
+        "headwords": headwords}
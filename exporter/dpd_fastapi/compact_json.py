@@ -0,0 +1,136 @@
+"""Search results as compact JSON of the raw db fields, without any HTML,
+for API consumers."""
+
+import json
+import re
+
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from db.models import DpdHeadwords, Lookup
+from exporter.dpd_fastapi.html_cache import HtmlCache
+from tools.lookup_key import normalize_lookup_key
+
+# the Lookup columns are stored as JSON already,
+# so they are copied into the response as they are
+lookup_columns = (
+    Lookup.headwords,
+    Lookup.roots,
+    Lookup.deconstructor,
+    Lookup.variant,
+    Lookup.spelling,
+    Lookup.grammar,
+    Lookup.help,
+    Lookup.abbrev,
+    Lookup.epd,
+)
+
+# timestamps, html and the inflection lists are left out
+headword_excluded_columns = {
+    "created_at",
+    "updated_at",
+    "inflections",
+    "inflections_sinhala",
+    "inflections_devanagari",
+    "inflections_thai",
+    "inflections_html",
+    "freq_html",
+}
+
+
+def dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def lookup_row_json(lookup_key: str, *values: str) -> str:
+    """A Lookup row as a JSON object, leaving out the empty columns."""
+    parts = [f'"lookup_key":{dumps(lookup_key)}']
+    for column, value in zip(lookup_columns, values):
+        if value:
+            parts.append(f'"{column.key}":{value}')
+    return "{" + ",".join(parts) + "}"
+
+
+def headword_json(i: DpdHeadwords) -> str:
+    """A headword's fields as a JSON object, leaving out the empty ones."""
+    fields = {}
+    for column in i.__mapper__.column_attrs:
+        if column.key not in headword_excluded_columns:
+            value = getattr(i, column.key)
+            if value:
+                fields[column.key] = value
+    return dumps(fields)
+
+
+def get_headwords_json(
+        db_session: Session, html_cache: HtmlCache, headword_ids: list[int]
+) -> dict[int, str]:
+    """Headwords as JSON, only querying the ones not in the cache."""
+
+    headwords: dict[int, str] = {}
+    missing_ids: list[int] = []
+    for headword_id in headword_ids:
+        cached = html_cache.get(("headword_json", headword_id))
+        if cached is None:
+            missing_ids.append(headword_id)
+        else:
+            headwords[headword_id] = cached
+
+    if missing_ids:
+        results = db_session \
+            .query(DpdHeadwords) \
+            .filter(DpdHeadwords.id.in_(missing_ids)) \
+            .all()
+        for i in results:
+            headword = headword_json(i)
+            html_cache.put(("headword_json", i.id), headword, len(headword))
+            headwords[i.id] = headword
+
+    return {x: headwords[x] for x in headword_ids if x in headwords}
+
+
+def make_compact_json(
+        db_session: Session,
+        html_cache: HtmlCache,
+        search: str,
+        closest_matches: Callable[[str], list[str]]
+) -> str:
+    """The unpacked Lookup rows of a search and the fields of their
+    headwords, serialized once. Ids and "lemma 5" searches find headwords
+    directly, and a search with no results lists the closest matches."""
+
+    lookup_results = db_session \
+        .query(Lookup.lookup_key, *lookup_columns) \
+        .filter(Lookup.lookup_key_norm == normalize_lookup_key(search)) \
+        .all()
+
+    headword_ids: list[int] = []
+    for lookup_result in lookup_results:
+        if lookup_result.headwords:
+            for headword_id in json.loads(lookup_result.headwords):
+                if headword_id not in headword_ids:
+                    headword_ids.append(headword_id)
+
+    if not lookup_results:
+        if search.isnumeric():
+            headword_ids = [int(search)]
+        elif re.search(r"\s\d", search):
+            headword_ids = [
+                headword_id for headword_id, in db_session
+                    .query(DpdHeadwords.id)
+                    .filter(DpdHeadwords.lemma_1 == search)]
+
+    headwords = get_headwords_json(db_session, html_cache, headword_ids)
+
+    parts = [
+        f'"search":{dumps(search)}',
+        '"lookup":[' + ",".join(
+            lookup_row_json(*row) for row in lookup_results) + "]",
+        '"headwords":{' + ",".join(
+            f'"{x}":{headword}' for x, headword in headwords.items()) + "}",
+    ]
+    if not lookup_results and not headwords:
+        parts.append(f'"closest_matches":{dumps(closest_matches(search))}')
+
+    return "{" + ",".join(parts) + "}"
@@ -0,0 +1,94 @@
+"""Memory-capped LRU cache of rendered HTML for the FastAPI server."""
+
+import hashlib
+import os
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from db.models import DbInfo
+
+
+class HtmlCache:
+    """Rendered HTML fragments and pages, least recently used first out
+    once the total size passes max_chars.
+
+    Everything is cleared when the db changes, i.e. when the mtime of the db
+    file or the dpd_release_version in DbInfo changes.
+
+    Requests are served from a threadpool, so all access is locked."""
+
+    def __init__(self, db_path: Path, max_chars: int) -> None:
+        self.db_path = db_path
+        self.max_chars = max_chars
+        self.entries: OrderedDict[Hashable, Tuple[object, int]] = OrderedDict()
+        self.chars = 0
+        self.db_mtime: Optional[float] = None
+        self.db_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def check_db(self, db_session: Session) -> None:
+        """Clear the cache if the db has changed since the last request."""
+
+        db_mtime = os.stat(self.db_path).st_mtime
+        if db_mtime == self.db_mtime:
+            return
+
+        db_info = db_session.query(DbInfo) \
+            .filter_by(key="dpd_release_version") \
+            .first()
+        db_version = db_info.value if db_info else ""
+
+        with self.lock:
+            if db_mtime != self.db_mtime:
+                if self.db_mtime is not None:
+                    self.clear()
+                self.db_mtime = db_mtime
+            if db_version != self.db_version:
+                if self.db_version is not None:
+                    self.clear()
+                self.db_version = db_version
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.chars = 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: object, chars: int) -> None:
+        """Add a value, with its size in characters."""
+        if chars > self.max_chars:
+            return
+        with self.lock:
+            old_entry = self.entries.pop(key, None)
+            if old_entry is not None:
+                self.chars -= old_entry[1]
+            self.entries[key] = (value, chars)
+            self.chars += chars
+            while self.chars > self.max_chars:
+                __key, (__value, old_chars) = self.entries.popitem(last=False)
+                self.chars -= old_chars
+
+
+def make_etag(*parts: str) -> str:
+    """A weak ETag, as the gzip middleware may compress the body."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()[:20]}"'
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""Latency of a Lookup table search on dpd.db,
+ilike scan versus normalized key index."""
+
+import random
+import statistics
+import time
+
+from rich import print
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db.get_db_session import get_read_only_sessionmaker
+from db.models import Lookup
+from tools.lookup_key import normalize_lookup_key
+from tools.paths import ProjectPaths
+
+sample_size = 200
+random_seed = 108
+
+
+def time_searches(db_session: Session, searches: list[str], search_fn) -> list[float]:
+    """Time each search in milliseconds."""
+    times = []
+    for search in searches:
+        start = time.perf_counter()
+        search_fn(db_session, search)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def ilike_search(db_session: Session, search: str) -> list[Lookup]:
+    return db_session.query(Lookup) \
+        .filter(Lookup.lookup_key.ilike(search)) \
+        .all()
+
+
+def normalized_search(db_session: Session, search: str) -> list[Lookup]:
+    return db_session.query(Lookup) \
+        .filter(Lookup.lookup_key_norm == normalize_lookup_key(search)) \
+        .all()
+
+
+def print_times(name: str, times: list[float]) -> None:
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(
+        f"{name:<15}"
+        f"mean {statistics.mean(times):>9.3f}ms  "
+        f"median {statistics.median(times):>9.3f}ms  "
+        f"p95 {p95:>9.3f}ms")
+
+
+def main():
+    print("[bright_yellow]lookup search benchmark")
+    pth = ProjectPaths()
+    SessionLocal = get_read_only_sessionmaker(pth.dpd_db_path)
+    db_session = SessionLocal()
+
+    lookup_keys = db_session.execute(select(Lookup.lookup_key)).scalars().all()
+    random.seed(random_seed)
+    searches = random.sample(lookup_keys, min(sample_size, len(lookup_keys)))
+    print(f"[green]{len(searches)} searches in {len(lookup_keys):,} keys")
+
+    ilike_times = time_searches(db_session, searches, ilike_search)
+    normalized_times = time_searches(db_session, searches, normalized_search)
+
+    print_times("ilike", ilike_times)
+    print_times("normalized", normalized_times)
+    print(
+        f"{'speedup':<15}"
+        f"{statistics.mean(ilike_times) / statistics.mean(normalized_times):.1f}x")
+
+    db_session.close()
+
+
+if __name__ == "__main__":
+    main()
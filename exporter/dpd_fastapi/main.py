@@ -1,18 +1,31 @@
 import re
 import uvicorn
-import difflib
-from unidecode import unidecode
 
 from collections import defaultdict
-from fastapi import FastAPI
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi import Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, TypeVar
 
+import asyncio
 
+
+from exporter.dpd_fastapi.autocomplete import AutocompleteIndex
+from exporter.dpd_fastapi.batch_lookup import BatchLookupRequest
+from exporter.dpd_fastapi.batch_lookup import batch_lookup, batch_max_tokens
+from exporter.dpd_fastapi.batch_lookup import batch_max_chars, request_length
+from exporter.dpd_fastapi.batch_lookup import tokenize
+from exporter.dpd_fastapi.compact_json import make_compact_json
+from exporter.dpd_fastapi.html_cache import HtmlCache, make_etag
 from exporter.dpd_fastapi.modules import AbbreviationsData
 from exporter.dpd_fastapi.modules import DeconstructorData
 from exporter.dpd_fastapi.modules import EpdData
@@ -22,73 +35,141 @@ from exporter.dpd_fastapi.modules import HelpData
 from exporter.dpd_fastapi.modules import RootsData
 from exporter.dpd_fastapi.modules import SpellingData
 from exporter.dpd_fastapi.modules import VariantData
+from exporter.dpd_fastapi.snapshot import load_snapshot, make_snapshot
+from exporter.dpd_fastapi.snapshot import save_snapshot
 
-from db.get_db_session import get_db_session
+from db.get_db_session import get_read_only_sessionmaker
 from db.models import DpdHeadwords
 from db.models import DpdRoots
 from db.models import FamilyRoot
 from db.models import Lookup
 
-from exporter.goldendict.helpers import make_roots_count_dict
 
 from tools.exporter_functions import get_family_compounds
 from tools.exporter_functions import get_family_idioms
 from tools.exporter_functions import get_family_set
-from tools.pali_sort_key import pali_list_sorter, pali_sort_key
+from tools.fuzzy_matcher import FuzzyMatcher
+from tools.lookup_key import normalize_lookup_key
+from tools.meaning_construction import make_meaning_combo_html
+from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 
 
-def make_headwords_clean_set(db_session: Session) -> set[str]:
-    """Make a set of Pāḷi headwords and English meanings."""
-    
-    # add headwords
-    results = db_session.query(DpdHeadwords).all()
-    headwords_clean_set = set([i.lemma_clean for i in results])
-
-    # add all english meanings
-    results = db_session \
-        .query(Lookup) \
-        .filter(Lookup.epd != "") \
-        .all()
-    headwords_clean_set.update([i.lookup_key for i in results])
-    return headwords_clean_set
-
-
-def make_ascii_to_unicode_dict(db_session: Session) -> dict[str, list[str]]:
-    """ASCII Key: Unicode Value."""
-
-    results = db_session.query(DpdHeadwords).all()
-    headwords_clean_set: set[str] = set()
-    for i in results:
-        headwords_clean_set.add(i.lemma_clean)
-        headwords_clean_set.add(i.lemma_2)
-    headwords_sorted_list = pali_list_sorter(headwords_clean_set)
-
-    ascii_to_unicode_dict = defaultdict(list)
-    for headword in headwords_sorted_list:
-        headword_ascii = unidecode(headword)
-        if (
-            headword_ascii != headword
-            and headword not in ascii_to_unicode_dict[headword_ascii]
-        ):
-            ascii_to_unicode_dict[headword_ascii].append(headword)
-
-    return ascii_to_unicode_dict
-
+pth: ProjectPaths = ProjectPaths()
 
-app = FastAPI()
+# about 100-200 MB of rendered html
+html_cache_max_chars = 100_000_000
+
+# threads doing db and render work, one pooled connection each
+db_workers = 10
+# requests waiting for a db worker, beyond that they get a 503
+db_queue_limit = 200
+
+# most suggestions one autocomplete request can ask for
+autocomplete_max_limit = AutocompleteIndex.max_limit
+
+# made once at startup and shared by all requests
+SessionLocal: sessionmaker
+db_executor: ThreadPoolExecutor
+db_jobs = 0
+html_cache: HtmlCache
+roots_count_dict: dict[str, int]
+fuzzy_matcher: FuzzyMatcher
+ascii_to_unicode_dict: defaultdict[str, list[str]]
+autocomplete_index: AutocompleteIndex
+
+
+def startup() -> None:
+    """Open the db and load the lookup structures from the snapshot,
+    rebuilding it if the db has changed."""
+
+    global SessionLocal, db_executor, html_cache, roots_count_dict
+    global fuzzy_matcher, ascii_to_unicode_dict, autocomplete_index
+
+    SessionLocal = get_read_only_sessionmaker(pth.dpd_db_path)
+    check_lookup_key_norm()
+    db_executor = ThreadPoolExecutor(
+        max_workers=db_workers, thread_name_prefix="dpd_db")
+    html_cache = HtmlCache(pth.dpd_db_path, html_cache_max_chars)
+
+    snapshot = load_snapshot(pth.dpd_fastapi_snapshot_path, pth.dpd_db_path)
+    if snapshot is None:
+        print("fastapi snapshot missing or out of date, rebuilding")
+        db_session = SessionLocal()
+        snapshot = make_snapshot(db_session)
+        db_session.close()
+        try:
+            save_snapshot(
+                pth.dpd_fastapi_snapshot_path, pth.dpd_db_path, snapshot)
+        except OSError as e:
+            print(f"could not save fastapi snapshot: {e}")
+
+    roots_count_dict = snapshot.roots_count_dict
+    fuzzy_matcher = snapshot.fuzzy_matcher
+    ascii_to_unicode_dict = snapshot.ascii_to_unicode_dict
+    autocomplete_index = snapshot.autocomplete_index
+
+
+def check_lookup_key_norm() -> None:
+    """Every search matches Lookup.lookup_key_norm, which a db made
+    before it was added doesn't have, so refuse to start without it."""
+    columns = [
+        column["name"]
+        for column in inspect(SessionLocal.kw["bind"]).get_columns("lookup")]
+    if "lookup_key_norm" not in columns:
+        raise RuntimeError(
+            f"{pth.dpd_db_path} has no lookup_key_norm column, "
+            "run scripts/lookup_key_norm_update.py to add it")
+
+
+@asynccontextmanager
+async def lifespan(__app__: FastAPI):
+    await run_in_threadpool(startup)
+    yield
+    db_executor.shutdown(wait=True)
+    SessionLocal.kw["bind"].dispose()
+
+
+T = TypeVar("T")
+
+
+def _with_session(fn: Callable[..., T], *args) -> T:
+    """Run fn with a pooled read-only session as its first argument."""
+    db_session = SessionLocal()
+    try:
+        return fn(db_session, *args)
+    finally:
+        db_session.close()
+
+
+async def run_db_work(fn: Callable[..., T], *args) -> T:
+    """Run blocking db and render work on the db executor,
+    keeping the event loop free. When too many requests are
+    already waiting, refuse with a 503 rather than queue without limit."""
+
+    global db_jobs
+    if db_jobs >= db_workers + db_queue_limit:
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, try again",
+            headers={"Retry-After": "1"})
+
+    db_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            db_executor, _with_session, fn, *args)
+    finally:
+        db_jobs -= 1
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add this line to enable gzip compression
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
 
 app.mount("/static", StaticFiles(directory="exporter/dpd_fastapi/static"), name="static")
-pth: ProjectPaths = ProjectPaths()
-db_session = get_db_session(pth.dpd_db_path)
-roots_count_dict = make_roots_count_dict(db_session)
-headwords_clean_set = make_headwords_clean_set(db_session)
-ascii_to_unicode_dict = make_ascii_to_unicode_dict(db_session)
-db_session.close()
 templates = Jinja2Templates(directory="exporter/dpd_fastapi/templates")
 
 with open("exporter/dpd_fastapi/static/dpd.css") as f:
@@ -102,7 +183,7 @@ with open("exporter/dpd_fastapi/static/home_simple.css") as f:
 
 
 @app.get("/")
-def home_page(request: Request, response_class=HTMLResponse):
+async def home_page(request: Request, response_class=HTMLResponse):
     return templates.TemplateResponse(
         "home.html", {
         "request": request,
@@ -110,37 +191,124 @@ def home_page(request: Request, response_class=HTMLResponse):
 
 
 @app.get("/search_html", response_class=HTMLResponse)
-def db_search_html(request: Request, search: str):
+async def db_search_html(request: Request, search: str):
+    return await run_db_work(search_html_response, request, search)
 
-    dpd_html, summary_html = make_dpd_html(search)
 
-    return templates.TemplateResponse(
+@app.get("/search_json", response_class=JSONResponse)
+async def db_search_json(request: Request, search: str, compact: bool = False):
+    if compact:
+        return await run_db_work(compact_json_response, request, search)
+    return await run_db_work(search_json_response, request, search)
+
+
+@app.get("/gd", response_class=HTMLResponse)
+async def db_search_gd(request: Request, search: str):
+    return await run_db_work(gd_response, request, search)
+
+
+@app.get("/autocomplete", response_class=JSONResponse)
+async def autocomplete(prefix: str, limit: int = 10, weighted: bool = True):
+    """Suggest lookup keys starting with the prefix, from memory,
+    so it runs on the event loop without a db worker."""
+    limit = max(0, min(limit, autocomplete_max_limit))
+    return JSONResponse(
+        content=autocomplete_index.complete(prefix, limit, weighted))
+
+
+@app.post("/batch_lookup", response_class=JSONResponse)
+async def db_batch_lookup(batch_request: BatchLookupRequest):
+    """Look up a list of words or a passage of text in one request.
+    Only the length is checked on the event loop,
+    the text is cleaned and split on a db worker."""
+    if request_length(batch_request) > batch_max_chars:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too much text, the limit is {batch_max_chars} characters")
+    return JSONResponse(
+        content=await run_db_work(tokenize_and_lookup, batch_request))
+
+
+def tokenize_and_lookup(
+        db_session: Session, batch_request: BatchLookupRequest) -> dict:
+    tokens = tokenize(batch_request)
+    if len(set(tokens)) > batch_max_tokens:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many words, the limit is {batch_max_tokens}")
+    return batch_lookup(db_session, tokens, render_summary)
+
+
+def render_summary(i: DpdHeadwords) -> str:
+    """A headword's summary with the search results' template,
+    without the rest of its HeadwordData."""
+    return templates \
+        .get_template("dpd_summary.html") \
+        .render(d=SimpleNamespace(i=i, meaning=make_meaning_combo_html(i)))
+
+
+def search_html_response(
+        db_session: Session, request: Request, search: str) -> Response:
+
+    dpd_html, summary_html, etag = cached_dpd_html(search, db_session)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response = templates.TemplateResponse(
         "home.html", {
         "request": request,
         "search": search,
         "dpd_results": dpd_html,
         })
+    response.headers["ETag"] = etag
+    return response
 
 
-@app.get("/search_json", response_class=JSONResponse)
-def db_search_json(request: Request, search: str):
+def search_json_response(
+        db_session: Session, request: Request, search: str) -> Response:
+
+    dpd_html, summary_html, etag = cached_dpd_html(search, db_session)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
 
-    dpd_html, summary_html = make_dpd_html(search)
     response_data = {
         "summary_html": summary_html,
         "dpd_html": dpd_html}
-    headers = {"Accept-Encoding": "gzip"}
+    headers = {"Accept-Encoding": "gzip", "ETag": etag}
 
     return JSONResponse(content=response_data, headers=headers)
 
 
-@app.get("/gd", response_class=HTMLResponse)
-def db_search_gd(request: Request, search: str):
+def compact_json_response(
+        db_session: Session, request: Request, search: str) -> Response:
+    """The raw fields instead of rendered html, serialized once and cached."""
+
+    html_cache.check_db(db_session)
+    search = clean_search(search)
+    key = ("compact_json", search)
+    cached = html_cache.get(key)
+    if cached is None:
+        body = make_compact_json(
+            db_session, html_cache, search, closest_matches)
+        cached = (body, make_etag(body))
+        html_cache.put(key, cached, len(body))
+    body, etag = cached
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def gd_response(
+        db_session: Session, request: Request, search: str) -> Response:
 
-    dpd_html, summary_html = make_dpd_html(search)
+    dpd_html, summary_html, etag = cached_dpd_html(search, db_session)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     global dpd_css, dpd_js, home_simple_css
 
-    return templates.TemplateResponse(
+    response = templates.TemplateResponse(
         "home_simple.html", {
         "request": request,
         "search": search,
@@ -150,16 +318,118 @@ def db_search_gd(request: Request, search: str):
         "dpd_js": dpd_js,
         "home_simple_css": home_simple_css,
         })
-    
+    response.headers["ETag"] = etag
+    return response
+
+
+def clean_search(search: str) -> str:
+    return search.replace("'", "").replace("ṁ", "ṃ").strip()
+
+
+def cached_dpd_html(search: str, db_session: Session) -> tuple[str, str, str]:
+    """The dpd_html, summary_html and ETag of a search,
+    from the cache if the db hasn't changed."""
+
+    html_cache.check_db(db_session)
+    key = ("search", clean_search(search))
+    cached = html_cache.get(key)
+    if cached is None:
+        dpd_html, summary_html = make_dpd_html(search, db_session)
+        cached = (dpd_html, summary_html, make_etag(dpd_html, summary_html))
+        html_cache.put(key, cached, len(dpd_html) + len(summary_html))
+    return cached
 
-def make_dpd_html(search: str) -> tuple[str, str]:
-    db_session = get_db_session(pth.dpd_db_path)
+
+# lemma_1, summary html and headword html
+HeadwordFragment = tuple[str, str, str]
+
+
+def render_headword(i: DpdHeadwords) -> HeadwordFragment:
+    """Render the summary and entry of a headword, and cache them."""
+
+    lemma_1 = i.lemma_1
+    fc = get_family_compounds(i)
+    fi = get_family_idioms(i)
+    fs = get_family_set(i)
+    d = HeadwordData(i, fc, fi, fs)
+    summary_html = templates \
+        .get_template("dpd_summary.html") \
+        .render(d=d)
+    headword_html = templates \
+        .get_template("dpd_headword.html") \
+        .render(d=d)
+
+    fragment = (lemma_1, summary_html, headword_html)
+    html_cache.put(
+        ("headword", i.id), fragment, len(summary_html) + len(headword_html))
+    return fragment
+
+
+def get_headword_fragments(
+        db_session: Session, headword_ids: list[int]
+) -> list[HeadwordFragment]:
+    """Rendered headwords in Pāḷi order,
+    only querying and rendering the ones not in the cache."""
+
+    fragments: dict[int, HeadwordFragment] = {}
+    missing_ids: list[int] = []
+    for headword_id in headword_ids:
+        fragment = html_cache.get(("headword", headword_id))
+        if fragment is None:
+            missing_ids.append(headword_id)
+        else:
+            fragments[headword_id] = fragment
+
+    if missing_ids:
+        headword_results = db_session\
+            .query(DpdHeadwords)\
+            .filter(DpdHeadwords.id.in_(missing_ids))\
+            .all()
+        for i in headword_results:
+            fragments[i.id] = render_headword(i)
+
+    return sorted(fragments.values(), key=lambda x: pali_sort_key(x[0]))
+
+
+def get_root_fragments(db_session: Session, roots_list: list[str]) -> list[str]:
+    """Rendered roots, only querying and rendering the ones not in the cache."""
+
+    fragments: dict[str, str] = {}
+    missing_roots: list[str] = []
+    for root in roots_list:
+        fragment = html_cache.get(("root", root))
+        if fragment is None:
+            missing_roots.append(root)
+        else:
+            fragments[root] = fragment
+
+    if missing_roots:
+        root_results = db_session \
+            .query(DpdRoots) \
+            .filter(DpdRoots.root.in_(missing_roots))\
+            .all()
+        for r in root_results:
+            frs = db_session \
+                .query(FamilyRoot) \
+                .filter(FamilyRoot.root_key == r.root)
+            frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
+            d = RootsData(r, frs, roots_count_dict)
+            fragment = templates \
+                .get_template("root.html") \
+                .render(d=d)
+            html_cache.put(("root", r.root), fragment, len(fragment))
+            fragments[r.root] = fragment
+
+    return [fragments[root] for root in roots_list if root in fragments]
+
+
+def make_dpd_html(search: str, db_session: Session) -> tuple[str, str]:
     dpd_html = ""
     summary_html = ""
-    search = search.replace("'", "").replace("ṁ", "ṃ").strip()
+    search = clean_search(search)
 
     lookup_results = db_session.query(Lookup) \
-        .filter(Lookup.lookup_key.ilike(search)) \
+        .filter(Lookup.lookup_key_norm == normalize_lookup_key(search)) \
         .all()
     
     # first try the lookup table, if no results, then try other options
@@ -170,40 +440,16 @@ def make_dpd_html(search: str) -> tuple[str, str]:
             # headwords
             if lookup_result.headwords:
                 headwords = lookup_result.headwords_unpack
-                headword_results = db_session\
-                    .query(DpdHeadwords)\
-                    .filter(DpdHeadwords.id.in_(headwords))\
-                    .all()
-                headword_results = sorted(
-                    headword_results, key=lambda x: pali_sort_key(x.lemma_1))
-                for i in headword_results:
-                    fc = get_family_compounds(i)
-                    fi = get_family_idioms(i)
-                    fs = get_family_set(i)
-                    d = HeadwordData(i, fc, fi, fs)
-                    summary_html += templates \
-                        .get_template("dpd_summary.html") \
-                        .render(d=d)
-                    dpd_html += templates \
-                        .get_template("dpd_headword.html") \
-                        .render(d=d)
+                for __lemma_1, headword_summary, headword_html in \
+                        get_headword_fragments(db_session, headwords):
+                    summary_html += headword_summary
+                    dpd_html += headword_html
             
             # roots
             if lookup_result.roots:
                 roots_list = lookup_result.roots_unpack
-                root_results = db_session \
-                    .query(DpdRoots) \
-                    .filter(DpdRoots.root.in_(roots_list))\
-                    .all()
-                for r in root_results:
-                    frs = db_session \
-                        .query(FamilyRoot) \
-                        .filter(FamilyRoot.root_key == r.root)
-                    frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
-                    d = RootsData(r, frs, roots_count_dict)
-                    dpd_html += templates \
-                        .get_template("root.html") \
-                        .render(d=d)
+                for root_html in get_root_fragments(db_session, roots_list):
+                    dpd_html += root_html
 
             # deconstructor
             if lookup_result.deconstructor:
@@ -257,18 +503,10 @@ def make_dpd_html(search: str) -> tuple[str, str]:
 
     elif search.isnumeric(): # eg 78654
         search_term = int(search)
-        headword_result = db_session\
-            .query(DpdHeadwords)\
-            .filter(DpdHeadwords.id == search_term)\
-            .first()
-        if headword_result:
-            fc = get_family_compounds(headword_result)
-            fi = get_family_idioms(headword_result)
-            fs = get_family_set(headword_result)
-            d = HeadwordData(headword_result, fc, fi, fs)
-            dpd_html += templates \
-                .get_template("dpd_headword.html") \
-                .render(d=d)
+        fragments = get_headword_fragments(db_session, [search_term])
+        if fragments:
+            __lemma_1, __summary_html, headword_html = fragments[0]
+            dpd_html += headword_html
 
         # return closest matches
         else:
@@ -280,13 +518,9 @@ def make_dpd_html(search: str) -> tuple[str, str]:
             .filter(DpdHeadwords.lemma_1 == search) \
             .first()
         if headword_result:
-            fc = get_family_compounds(headword_result)
-            fi = get_family_idioms(headword_result)
-            fs = get_family_set(headword_result)
-            d = HeadwordData(headword_result, fc, fi, fs)
-            dpd_html += templates \
-                .get_template("dpd_headword.html") \
-                .render(d=d)
+            __lemma_1, __summary_html, headword_html = \
+                render_headword(headword_result)
+            dpd_html += headword_html
 
         # return closest matches
         else:
@@ -297,17 +531,17 @@ def make_dpd_html(search: str) -> tuple[str, str]:
     else:
         dpd_html = find_closest_matches(search)
 
-    db_session.close()
     return dpd_html, summary_html
 
     
 
-def find_closest_matches(search) -> str:
+def closest_matches(search: str) -> list[str]:
+    """ASCII matches, then the closest fuzzy matches."""
 
-    ascii_matches = ascii_to_unicode_dict[search]
+    ascii_matches = ascii_to_unicode_dict.get(search, [])
     closest_headword_matches =  \
-        difflib.get_close_matches(
-            search, headwords_clean_set,
+        fuzzy_matcher.get_close_matches(
+            search,
             n=10,
             cutoff=0.7)
     
@@ -318,7 +552,12 @@ def find_closest_matches(search) -> str:
         for item in closest_headword_matches
         if item not in ascii_matches
     ])
+    return combined_list
+
+
+def find_closest_matches(search) -> str:
 
+    combined_list = closest_matches(search)
     string = "<h3>No results found. "
     if combined_list:
         string += "The closest matches are:</h3><br>"
@@ -31,17 +31,17 @@ class HeadwordData():
 
     @staticmethod
     def convert_newlines(obj):
-        for attr_name in dir(obj):
+        # only the columns can be set, walking dir(obj) would also
+        # evaluate every property, some of which query the db
+        for column in obj.__mapper__.column_attrs:
+            attr_name = column.key
             if (
                 not attr_name.startswith('_')
                 and "html" not in attr_name
             ):  # skip private and protected attributes
                 attr_value = getattr(obj, attr_name)
-                if isinstance(attr_value, str):
-                    try:
-                        setattr(obj, attr_name, attr_value.replace("\n", "<br>"))
-                    except AttributeError:
-                        continue  # skip attributes that don't have a setter
+                if isinstance(attr_value, str) and "\n" in attr_value:
+                    setattr(obj, attr_name, attr_value.replace("\n", "<br>"))
         return obj
 
 
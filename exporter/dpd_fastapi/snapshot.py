@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""Build the FastAPI server's lookup structures once, at db build time,
+into a snapshot file which the server loads at startup."""
+
+import io
+import mmap
+import os
+import pickle
+import re
+import struct
+
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from rich import print
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from unidecode import unidecode
+
+from db.get_db_session import get_read_only_sessionmaker
+from db.models import DpdHeadwords, Lookup
+from exporter.dpd_fastapi.autocomplete import AutocompleteIndex
+from exporter.dpd_fastapi.autocomplete import make_autocomplete_index
+from tools.fuzzy_matcher import FuzzyMatcher
+from tools.pali_sort_key import pali_list_sorter
+from tools.paths import ProjectPaths
+from tools.tic_toc import tic, toc
+
+# bump when any structure in the snapshot changes shape
+SNAPSHOT_VERSION = 2
+
+# magic, version, db mtime_ns, db size, pickle offset, pickle length
+header_format = "<8sIqqqq"
+header_size = struct.calcsize(header_format)
+snapshot_magic = b"DPDSNAP\0"
+
+
+class Snapshot(NamedTuple):
+    roots_count_dict: dict[str, int]
+    fuzzy_matcher: FuzzyMatcher
+    ascii_to_unicode_dict: defaultdict[str, list[str]]
+    autocomplete_index: AutocompleteIndex
+
+
+def lemma_clean(lemma_1: str) -> str:
+    return re.sub(r" \d.*$", "", lemma_1)
+
+
+def make_roots_count_dict(db_session: Session) -> dict[str, int]:
+    """Root key: number of headwords."""
+    results = db_session \
+        .query(DpdHeadwords.root_key, func.count()) \
+        .filter(DpdHeadwords.root_key.isnot(None)) \
+        .group_by(DpdHeadwords.root_key) \
+        .all()
+    return {root_key: count for root_key, count in results}
+
+
+def make_headwords_clean_set(db_session: Session) -> set[str]:
+    """Make a set of Pāḷi headwords and English meanings."""
+
+    # add headwords
+    headwords_clean_set = {
+        lemma_clean(lemma_1)
+        for lemma_1, in db_session.query(DpdHeadwords.lemma_1)}
+
+    # add all english meanings
+    headwords_clean_set.update(
+        lookup_key
+        for lookup_key, in db_session
+            .query(Lookup.lookup_key)
+            .filter(Lookup.epd != ""))
+    return headwords_clean_set
+
+
+def make_ascii_to_unicode_dict(
+        db_session: Session) -> defaultdict[str, list[str]]:
+    """ASCII Key: Unicode Value."""
+
+    headwords_clean_set: set[str] = set()
+    for lemma_1, lemma_2 in db_session.query(
+            DpdHeadwords.lemma_1, DpdHeadwords.lemma_2):
+        headwords_clean_set.add(lemma_clean(lemma_1))
+        headwords_clean_set.add(lemma_2)
+    headwords_sorted_list = pali_list_sorter(headwords_clean_set)
+
+    ascii_to_unicode_dict: defaultdict[str, list[str]] = defaultdict(list)
+    for headword in headwords_sorted_list:
+        headword_ascii = unidecode(headword)
+        if (
+            headword_ascii != headword
+            and headword not in ascii_to_unicode_dict[headword_ascii]
+        ):
+            ascii_to_unicode_dict[headword_ascii].append(headword)
+
+    return ascii_to_unicode_dict
+
+
+def make_snapshot(db_session: Session) -> Snapshot:
+    return Snapshot(
+        roots_count_dict=make_roots_count_dict(db_session),
+        fuzzy_matcher=FuzzyMatcher(make_headwords_clean_set(db_session)),
+        ascii_to_unicode_dict=make_ascii_to_unicode_dict(db_session),
+        autocomplete_index=make_autocomplete_index(db_session),
+    )
+
+
+def db_stamp(db_path: Path) -> tuple[int, int]:
+    stat = os.stat(db_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _ArrayPickler(pickle.Pickler):
+    """Write every array's raw bytes to the buffers section of the file,
+    leaving only a reference in the pickle."""
+
+    def __init__(self, file, buffers: io.BytesIO) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.buffers = buffers
+
+    def persistent_id(self, obj):
+        if type(obj) is not array:
+            return None
+        # keep every array 8 byte aligned
+        padding = -self.buffers.tell() % 8
+        self.buffers.write(bytes(padding))
+        offset = header_size + self.buffers.tell()
+        self.buffers.write(obj.tobytes())
+        return (obj.typecode, offset, len(obj))
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """Read arrays as memoryviews straight into the mapped file."""
+
+    def __init__(self, file, mapped: memoryview) -> None:
+        super().__init__(file)
+        self.mapped = mapped
+
+    def persistent_load(self, pid):
+        typecode, offset, length = pid
+        itemsize = array(typecode).itemsize
+        return self.mapped[offset:offset + length * itemsize].cast(typecode)
+
+
+def save_snapshot(path: Path, db_path: Path, snapshot: Snapshot) -> None:
+    """Write the snapshot: a header, the raw arrays, then a pickle of
+    everything else. The file is written aside and renamed into place,
+    so a running server never sees half a snapshot."""
+
+    buffers = io.BytesIO()
+    pickled = io.BytesIO()
+    _ArrayPickler(pickled, buffers).dump(snapshot)
+    padding = -buffers.tell() % 8
+    buffers.write(bytes(padding))
+
+    db_mtime, db_size = db_stamp(db_path)
+    header = struct.pack(
+        header_format, snapshot_magic, SNAPSHOT_VERSION, db_mtime, db_size,
+        header_size + buffers.tell(), pickled.tell())
+
+    temp_path = path.with_name(f"{path.name}.tmp")
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(buffers.getbuffer())
+        f.write(pickled.getbuffer())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path: Path, db_path: Path) -> Optional[Snapshot]:
+    """Map the snapshot into memory, if it exists, is this version
+    and was made from the db as it is now. Otherwise None.
+
+    The arrays stay in the mapped file, so their pages are shared
+    by all the server processes and read in only as they are used."""
+
+    if not path.exists():
+        return None
+
+    with open(path, "rb") as f:
+        mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped_file) < header_size:
+        return None
+
+    magic, version, db_mtime, db_size, pickle_offset, pickle_length = \
+        struct.unpack_from(header_format, mapped_file)
+    if (
+        magic != snapshot_magic
+        or version != SNAPSHOT_VERSION
+        or (db_mtime, db_size) != db_stamp(db_path)
+    ):
+        return None
+
+    mapped = memoryview(mapped_file)
+    pickled = io.BytesIO(mapped[pickle_offset:pickle_offset + pickle_length])
+    return _ArrayUnpickler(pickled, mapped).load()
+
+
+def main():
+    tic()
+    print("[bright_yellow]making fastapi snapshot")
+    pth = ProjectPaths()
+    db_session = get_read_only_sessionmaker(pth.dpd_db_path)()
+
+    print("[green]building lookup structures", end=" ")
+    snapshot = make_snapshot(db_session)
+    db_session.close()
+    print("[white]ok")
+
+    print("[green]saving", end=" ")
+    save_snapshot(pth.dpd_fastapi_snapshot_path, pth.dpd_db_path, snapshot)
+    size = pth.dpd_fastapi_snapshot_path.stat().st_size
+    print(f"[white]{size / 1024 / 1024:.1f}MB")
+    toc()
+
+
+if __name__ == "__main__":
+    main()
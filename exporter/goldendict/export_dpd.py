@@ -1,6 +1,7 @@
 """Compile HTML data for DpdHeadwords."""
 
 import psutil
+import time
 
 from sqlalchemy.sql import func
 
@@ -8,13 +9,17 @@ from sqlalchemy.sql import func
 # from css_html_js_minify import css_minify, js_minify
 from mako.template import Template
 from minify_html import minify
-from multiprocessing.managers import ListProxy
-from multiprocessing import Process, Manager
-from typing import List, Set, TypedDict, Tuple, Union
+from multiprocessing import Pool
+from multiprocessing.pool import AsyncResult
+from pathlib import Path
+from typing import Dict, List, Optional, Set, TypedDict, Tuple, Union
 
 from sqlalchemy.orm.session import Session
 
 from exporter.goldendict.helpers import TODAY
+from exporter.goldendict.render_cache import CachedEntry, RenderCache
+from exporter.goldendict.render_cache import column_values, files_key, make_hash
+from exporter.goldendict.render_cache import module_files
 
 from db.models import DpdHeadwords
 from db.models import DpdRoots
@@ -28,7 +33,7 @@ from db.models import SBS
 
 from tools.configger import config_test
 from tools.date_and_time import year_month_day_dash
-from tools.exporter_functions import get_family_compounds, get_family_idioms, get_family_set
+from tools.exporter_functions import PrefetchedFamilies
 from tools.goldendict_exporter import DictEntry
 from tools.meaning_construction import make_meaning_combo_html, make_grammar_line
 from tools.meaning_construction import summarize_construction, degree_of_completion
@@ -40,6 +45,7 @@ from tools.sandhi_contraction import SandhiContractions
 from tools.superscripter import superscripter_uni
 from tools.utils import RenderedSizes, default_rendered_sizes, list_into_batches
 from tools.utils import sum_rendered_sizes, squash_whitespaces
+from tools.utils import RenderTimings, add_render_timing, sum_render_timings
 
 from exporter.goldendict.ru_components.tools.paths_ru import RuPaths
 from exporter.goldendict.ru_components.tools.tools_for_ru_exporter import make_ru_meaning_html, ru_replace_abbreviations
@@ -80,6 +86,11 @@ class DpdHeadwordsDbParts(TypedDict):
     family_idioms: List[FamilyIdiom]
     family_set: List[FamilySet]
 
+# a page sent to the pool: results, all rows, their hashes and cached entries
+PendingPage = Tuple[
+    AsyncResult, List[DpdHeadwordsDbParts], List[str],
+    List[Optional[CachedEntry]]]
+
 class DpdHeadwordsRenderData(TypedDict):
     pth: Union[ProjectPaths, RuPaths]
     word_templates: DpdHeadwordsTemplates
@@ -97,11 +108,19 @@ def render_pali_word_dpd_html(
         render_data: DpdHeadwordsRenderData,
         lang="en",
         extended_synonyms=False, 
-        show_sbs_data=False
+        show_sbs_data=False,
+        timings: Optional[RenderTimings] = None
 ) -> Tuple[DictEntry, RenderedSizes]:
+    """Render a headword. If a timings dict is given,
+    the time and number of calls of each section are added to it."""
+
     rd = render_data
     size_dict = default_rendered_sizes()
 
+    def _timed(section: str, start: float) -> None:
+        if timings is not None:
+            add_render_timing(timings, section, time.perf_counter() - start)
+
     i: DpdHeadwords = db_parts["pali_word"]
     rt: DpdRoots = db_parts["pali_root"]
     sbs: SBS = db_parts["sbs"]
@@ -161,78 +180,110 @@ def render_pali_word_dpd_html(
     html: str = ""
     html += "<body>"
 
+    start = time.perf_counter()
     summary = render_dpd_definition_templ(
         pth, i, tt.dpd_definition_templ, sbs, ru, rd['make_link'], rd['show_id'], rd['show_ebt_count'], rd['show_sbs_data'], lang)
     html += summary
     size_dict["dpd_summary"] += len(summary)
+    _timed("dpd_summary", start)
 
+    start = time.perf_counter()
     button_box = render_button_box_templ(
         pth, i, sbs, rd['cf_set'], rd['idioms_set'], tt.button_box_templ, lang, rd['show_sbs_data'])
     html += button_box
     size_dict["dpd_button_box"] += len(button_box)
+    _timed("dpd_button_box", start)
 
     if i.needs_grammar_button or show_sbs_data:
+        start = time.perf_counter()
         grammar = render_grammar_templ(pth, i, rt, sbs, ru, tt.grammar_templ, lang, rd['show_sbs_data'])
         html += grammar
         size_dict["dpd_grammar"] += len(grammar)
+        _timed("dpd_grammar", start)
 
     if i.needs_example_button or i.needs_examples_button:
+        start = time.perf_counter()
         example = render_example_templ(pth, i, tt.example_templ, rd['make_link'])
         html += example
         size_dict["dpd_example"] += len(example)
+        _timed("dpd_example", start)
 
     if i.needs_conjugation_button or i.needs_declension_button:
+        start = time.perf_counter()
         inflection_table = render_inflection_templ(pth, i, tt.inflection_templ, lang)
         html += inflection_table
         size_dict["dpd_inflection_table"] += len(inflection_table)
+        _timed("dpd_inflection_table", start)
 
     if i.needs_root_family_button:
+        start = time.perf_counter()
         family_root = render_family_root_templ(pth, i, fr, tt.family_root_templ)
         html += family_root
         size_dict["dpd_family_root"] += len(family_root)
+        _timed("dpd_family_root", start)
 
     if i.needs_word_family_button:
+        start = time.perf_counter()
         family_word = render_family_word_templ(pth, i, fw, tt.family_word_templ)
         html += family_word
         size_dict["dpd_family_word"] += len(family_word)
+        _timed("dpd_family_word", start)
 
     if i.needs_compound_family_button or i.needs_compound_families_button:
+        start = time.perf_counter()
         family_compound = render_family_compound_templ(
             pth, i, fc, rd['cf_set'], tt.family_compound_templ)
         html += family_compound
         size_dict["dpd_family_compound"] += len(family_compound)
+        _timed("dpd_family_compound", start)
 
     if i.needs_idioms_button:
+        start = time.perf_counter()
         family_idiom = render_family_idioms_templ(
             pth, i, fi, rd['idioms_set'], tt.family_idiom_templ)
         html += family_idiom
         size_dict["dpd_family_idiom"] += len(family_idiom)
+        _timed("dpd_family_idiom", start)
 
     if i.needs_set_button or i.needs_sets_button:
+        start = time.perf_counter()
         family_sets = render_family_set_templ(pth, i, fs, tt.family_set_templ)
         html += family_sets
         size_dict["dpd_family_sets"] += len(family_sets)
+        _timed("dpd_family_sets", start)
 
     if i.needs_frequency_button:
+        start = time.perf_counter()
         frequency = render_frequency_templ(pth, i, tt.frequency_templ, lang)
         html += frequency
         size_dict["dpd_frequency"] += len(frequency)
+        _timed("dpd_frequency", start)
 
     if show_sbs_data and sbs:
+        start = time.perf_counter()
         sbs_example = render_sbs_example_templ(pth, i, sbs, tt.sbs_example_templ, rd['make_link'])
         html += sbs_example
         size_dict["sbs_example"] += len(sbs_example)
+        _timed("sbs_example", start)
 
+    start = time.perf_counter()
     feedback = render_feedback_templ(pth, i, tt.feedback_templ)
     html += feedback
     size_dict["dpd_feedback"] += len(feedback)
+    _timed("dpd_feedback", start)
     
     html += "</body></html>"
 
+    start = time.perf_counter()
     header = str(tt.header_templ.render(i=i, date=date))
     size_dict["dpd_header"] += len(header)
+    _timed("dpd_header", start)
+
+    start = time.perf_counter()
     html = squash_whitespaces(header) + minify(html)
+    _timed("minify", start)
 
+    start = time.perf_counter()
     synonyms: List[str] = i.inflections_list
     synonyms = add_niggahitas(synonyms)
     for synonym in synonyms:
@@ -264,6 +315,7 @@ def render_pali_word_dpd_html(
     
 
     size_dict["dpd_synonyms"] += len(str(synonyms))
+    _timed("dpd_synonyms", start)
 
     res = DictEntry(
         word = i.lemma_1,
@@ -285,7 +337,7 @@ def generate_dpd_html(
         show_sbs_data=False,
         lang="en",
         data_limit:int = 0
-) -> Tuple[List[DictEntry], RenderedSizes]:
+) -> Tuple[List[DictEntry], RenderedSizes, RenderTimings]:
 
     p_green_title("generating dpd html")
 
@@ -294,8 +346,6 @@ def generate_dpd_html(
     elif lang == "ru":
         paths = rupth
 
-    word_templates = DpdHeadwordsTemplates(paths, lang)
-
     if config_test("dictionary", "extended_synonyms", "yes"):
         extended_synonyms: bool = True
     else:
@@ -311,7 +361,10 @@ def generate_dpd_html(
     else:
         show_ebt_count: bool = False
 
-    dpd_data_list: List[DictEntry] = []
+    if config_test("dictionary", "render_timings", "yes"):
+        render_timings: bool = True
+    else:
+        render_timings: bool = False
 
     if lang == "en":
         pali_words_count = db_session \
@@ -339,103 +392,271 @@ def generate_dpd_html(
     else:
         limit = 5000
 
-    offset = 0
+    # load the roots and families once, instead of per headword
+    roots_dict: Dict[str, DpdRoots] = {
+        r.root: r for r in db_session.query(DpdRoots).all()}
+    families = PrefetchedFamilies(db_session)
+
+    done = 0
+    last_lemma_1 = ""
+
+    dpd_data_list: List[DictEntry] = []
+    rendered_sizes: List[RenderedSizes] = []
+    timings_list: List[RenderTimings] = []
+
+    # only re-render headwords whose data has changed since the last run.
+    # not with a data_limit, that would drop the rest of the cache.
+    render_cache: Optional[RenderCache] = None
+    if config_test("dictionary", "incremental", "yes") and data_limit == 0:
+        render_cache = RenderCache(
+            pth.dpd_render_cache_path,
+            make_hash([
+                lang, make_link, show_id, show_ebt_count, show_sbs_data,
+                extended_synonyms, files_key(template_files(paths))]))
+
+    def _collect(page: PendingPage):
+        """Add a rendered page to the results in lemma_1 order,
+        filling in the cached entries."""
+        results, page_data, content_hashes, cached_entries = page
+        batches_results = results.get()
+        timings_list.extend(timings for __, timings in batches_results)
+        rendered = (
+            entry for batch, __ in batches_results for entry in batch)
+
+        for parts, content_hash, cached in zip(
+                page_data, content_hashes, cached_entries):
+            if cached is None:
+                cached = next(rendered)
+                if render_cache is not None:
+                    render_cache.put(
+                        parts["pali_word"].lemma_1, content_hash, cached)
+            entry, sizes = cached
+            dpd_data_list.append(entry)
+            rendered_sizes.append(sizes)
 
-    manager = Manager()
-    dpd_data_results_list: ListProxy = manager.list()
-    rendered_sizes_results_list: ListProxy = manager.list()
     num_logical_cores = psutil.cpu_count()
     p_green_title(f"running with {num_logical_cores} cores")
 
-    while offset <= pali_words_count:
-
-        dpd_db_query = db_session \
-            .query(
-                DpdHeadwords, FamilyRoot, FamilyWord, SBS, Russian) \
-            .outerjoin(
-                FamilyRoot, DpdHeadwords.root_family_key == FamilyRoot.root_family_key) \
-            .outerjoin(
-                FamilyWord, DpdHeadwords.family_word == FamilyWord.word_family) \
-            .outerjoin(
-                Russian, DpdHeadwords.id == Russian.id) \
-            .outerjoin(
-                SBS, DpdHeadwords.id == SBS.id) \
-            .order_by(DpdHeadwords.lemma_1) \
-        
-        if lang == "ru":
-            dpd_db_query = dpd_db_query.filter(
-                    Russian.id.isnot(None)
+    # One pool for the whole run. Each worker compiles the templates once,
+    # and returns a whole batch of rendered entries at a time.
+    pool = Pool(
+        num_logical_cores,
+        initializer=_init_render_worker,
+        initargs=(
+            paths, pth, lang, sandhi_contractions, cf_set, idioms_set,
+            make_link, show_id, show_ebt_count, show_sbs_data,
+            extended_synonyms, render_timings))
+
+    render_start = time.perf_counter()
+    pending: Optional[PendingPage] = None
+
+    with pool:
+        while done < pali_words_count:
+
+            dpd_db_query = db_session \
+                .query(
+                    DpdHeadwords, FamilyRoot, FamilyWord, SBS, Russian) \
+                .outerjoin(
+                    FamilyRoot, DpdHeadwords.root_family_key == FamilyRoot.root_family_key) \
+                .outerjoin(
+                    FamilyWord, DpdHeadwords.family_word == FamilyWord.word_family) \
+                .outerjoin(
+                    Russian, DpdHeadwords.id == Russian.id) \
+                .outerjoin(
+                    SBS, DpdHeadwords.id == SBS.id) \
+                .filter(DpdHeadwords.lemma_1 > last_lemma_1) \
+                .order_by(DpdHeadwords.lemma_1) \
+            
+            if lang == "ru":
+                dpd_db_query = dpd_db_query.filter(
+                        Russian.id.isnot(None)
+                    )
+
+            # keyset pagination: lemma_1 is unique, so each page starts
+            # where the last one stopped, without sorting and skipping
+            # all the earlier rows again
+            dpd_db = dpd_db_query.limit(limit).all()
+            if not dpd_db:
+                break
+            last_lemma_1 = dpd_db[-1][0].lemma_1
+
+            def _add_parts(i: DpdHeadwordsDbRowItems) -> DpdHeadwordsDbParts:
+                pw: DpdHeadwords
+                fr: FamilyRoot
+                fw: FamilyWord
+                sbs: SBS
+                ru: Russian
+                pw, fr, fw, sbs, ru = i
+
+                return DpdHeadwordsDbParts(
+                    pali_word = pw,
+                    pali_root = roots_dict.get(pw.root_key),
+                    sbs = sbs,
+                    ru = ru,
+                    family_root = fr,
+                    family_word = fw,
+                    family_compounds = families.get_family_compounds(pw),
+                    family_idioms = families.get_family_idioms(pw),
+                    family_set = families.get_family_set(pw),
                 )
 
-        dpd_db = dpd_db_query.limit(limit).offset(offset).all()
-
-        def _add_parts(i: DpdHeadwordsDbRowItems) -> DpdHeadwordsDbParts:
-            pw: DpdHeadwords
-            fr: FamilyRoot
-            fw: FamilyWord
-            sbs: SBS
-            ru: Russian
-            pw, fr, fw, sbs, ru = i
-
-            return DpdHeadwordsDbParts(
-                pali_word = pw,
-                pali_root = pw.rt,
-                sbs = sbs,
-                ru = ru,
-                family_root = fr,
-                family_word = fw,
-                family_compounds = get_family_compounds(pw),
-                family_idioms = get_family_idioms(pw),
-                family_set = get_family_set(pw),
-            )
+            dpd_db_data = [_add_parts(i.tuple()) for i in dpd_db]
+
+            content_hashes: List[str] = []
+            cached_entries: List[Optional[CachedEntry]] = []
+            if render_cache is not None:
+                for parts in dpd_db_data:
+                    content_hash = db_parts_hash(
+                        parts, sandhi_contractions, cf_set, idioms_set)
+                    content_hashes.append(content_hash)
+                    cached_entries.append(render_cache.get(
+                        parts["pali_word"].lemma_1, content_hash))
+            else:
+                content_hashes = [""] * len(dpd_db_data)
+                cached_entries = [None] * len(dpd_db_data)
 
-        dpd_db_data = [_add_parts(i.tuple()) for i in dpd_db]
+            dirty_data = [
+                parts for parts, cached in zip(dpd_db_data, cached_entries)
+                if cached is None]
 
-        rendered_sizes: List[RenderedSizes] = []
+            batches: List[List[DpdHeadwordsDbParts]] = list_into_batches(dirty_data, num_logical_cores)
 
-        batches: List[List[DpdHeadwordsDbParts]] = list_into_batches(dpd_db_data, num_logical_cores)
+            # render this page while the next one is loading
+            page_results = pool.map_async(_render_batch, batches)
+            if pending is not None:
+                _collect(pending)
+            pending = (
+                page_results, dpd_db_data, content_hashes, cached_entries)
 
-        processes: List[Process] = []
+            p_counter(done, pali_words_count, dpd_db[0][0].lemma_1)
 
-        render_data = DpdHeadwordsRenderData(
-            pth = pth,
-            word_templates = word_templates,
-            sandhi_contractions = sandhi_contractions,
-            cf_set = cf_set,
-            idioms_set = idioms_set,
-            make_link = make_link,
-            show_id = show_id,
-            show_ebt_count = show_ebt_count,
-            show_sbs_data = show_sbs_data
-        )
+            done += len(dpd_db)
 
-        def _parse_batch(batch: List[DpdHeadwordsDbParts]):
-            res: List[Tuple[DictEntry, RenderedSizes]] = \
-                [render_pali_word_dpd_html(i, render_data, lang, extended_synonyms, show_sbs_data) for i in batch]
+        if pending is not None:
+            _collect(pending)
 
-            for i, j in res:
-                dpd_data_results_list.append(i)
-                rendered_sizes_results_list.append(j)
+    render_time = time.perf_counter() - render_start
+    if render_time > 0:
+        p_green_title(
+            f"rendered {len(dpd_data_list):,} headwords "
+            f"at {len(dpd_data_list) / render_time:,.0f} headwords/sec")
 
-        for batch in batches:
-            p = Process(target=_parse_batch, args=(batch,))
+    if render_cache is not None:
+        p_green_title(
+            f"reused {render_cache.hits:,} cached headwords, "
+            f"re-rendered {render_cache.misses:,}")
+        render_cache.save()
 
-            p.start()
-            processes.append(p)
+    total_sizes = sum_rendered_sizes(rendered_sizes)
+    total_timings = sum_render_timings(timings_list)
+    
+    return dpd_data_list, total_sizes, total_timings
 
-        for p in processes:
-            p.join()
-        
-        if offset % limit == 0:
-            p_counter(offset, pali_words_count, batch[0]["pali_word"].lemma_1)
 
-        offset += limit
+def template_files(paths: Union[ProjectPaths, RuPaths]) -> List[Path]:
+    """All the templates, and the code which renders them,
+    i.e. this module and every project module it imports."""
+    files = [
+        value for key, value in vars(paths).items()
+        if key.endswith("_templ_path")]
+    files.extend(module_files(Path(__file__).resolve().parents[2]))
+    return files
 
-    dpd_data_list = list(dpd_data_results_list)
-    rendered_sizes = list(rendered_sizes_results_list)
-    total_sizes = sum_rendered_sizes(rendered_sizes)
-    
-    return dpd_data_list, total_sizes
+
+def db_parts_hash(
+        db_parts: DpdHeadwordsDbParts,
+        sandhi_contractions: SandhiContractions,
+        cf_set: Set[str],
+        idioms_set: Set[str]
+) -> str:
+    """Hash all the data a headword is rendered from."""
+
+    i = db_parts["pali_word"]
+    values: list = [
+        column_values(db_parts["pali_word"]),
+        column_values(db_parts["pali_root"]),
+        column_values(db_parts["sbs"]),
+        column_values(db_parts["ru"]),
+        column_values(db_parts["family_root"]),
+        column_values(db_parts["family_word"]),
+        [column_values(fc) for fc in db_parts["family_compounds"]],
+        [column_values(fi) for fi in db_parts["family_idioms"]],
+        [column_values(fs) for fs in db_parts["family_set"]],
+    ]
+
+    # synonyms
+    values.append([
+        sorted(sandhi_contractions[inflection]["contractions"])
+        for inflection in add_niggahitas(i.inflections_list)
+        if inflection in sandhi_contractions])
+
+    # buttons
+    values.append([
+        word in cf_set for word in i.family_compound_list + [i.lemma_clean]])
+    values.append([
+        word in idioms_set for word in i.family_idioms_list + [i.lemma_clean]])
+
+    return make_hash(values)
+
+
+# set in each worker process by _init_render_worker
+worker_render_data: DpdHeadwordsRenderData
+worker_lang: str
+worker_extended_synonyms: bool
+worker_show_sbs_data: bool
+worker_render_timings: bool
+
+
+def _init_render_worker(
+        paths: Union[ProjectPaths, RuPaths],
+        pth: ProjectPaths,
+        lang: str,
+        sandhi_contractions: SandhiContractions,
+        cf_set: Set[str],
+        idioms_set: Set[str],
+        make_link: bool,
+        show_id: bool,
+        show_ebt_count: bool,
+        show_sbs_data: bool,
+        extended_synonyms: bool,
+        render_timings: bool
+) -> None:
+    """Compile the templates once per worker process."""
+
+    global worker_render_data, worker_lang
+    global worker_extended_synonyms, worker_show_sbs_data
+    global worker_render_timings
+
+    worker_render_data = DpdHeadwordsRenderData(
+        pth = pth,
+        word_templates = DpdHeadwordsTemplates(paths, lang),
+        sandhi_contractions = sandhi_contractions,
+        cf_set = cf_set,
+        idioms_set = idioms_set,
+        make_link = make_link,
+        show_id = show_id,
+        show_ebt_count = show_ebt_count,
+        show_sbs_data = show_sbs_data
+    )
+    worker_lang = lang
+    worker_extended_synonyms = extended_synonyms
+    worker_show_sbs_data = show_sbs_data
+    worker_render_timings = render_timings
+
+
+def _render_batch(
+        batch: List[DpdHeadwordsDbParts]
+) -> Tuple[List[Tuple[DictEntry, RenderedSizes]], RenderTimings]:
+    """Render a batch, returning the entries and the timings of the batch."""
+
+    timings: RenderTimings = {}
+    res = [
+        render_pali_word_dpd_html(
+            i, worker_render_data, worker_lang,
+            worker_extended_synonyms, worker_show_sbs_data,
+            timings if worker_render_timings else None)
+        for i in batch]
+    return res, timings
 
 
 def render_dpd_definition_templ(
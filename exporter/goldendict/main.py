@@ -6,7 +6,7 @@ import csv
 import pickle
 
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from export_dpd import generate_dpd_html
 from export_roots import generate_root_html
@@ -27,7 +27,7 @@ from tools.paths import ProjectPaths
 from tools.printer import p_green, p_green_title, p_title, p_yes
 from tools.sandhi_contraction import make_sandhi_contraction_dict
 from tools.tic_toc import tic, toc
-from tools.utils import RenderedSizes, sum_rendered_sizes
+from tools.utils import RenderedSizes, RenderTimings, sum_rendered_sizes
 
 from exporter.goldendict.ru_components.tools.tools_for_ru_exporter import \
     mdict_ru_title, mdict_ru_description
@@ -43,6 +43,7 @@ class ProgData():
         self.idioms_set: set = load_idioms_set()
         self.roots_count_dict = make_roots_count_dict(self.db_session)
         self.rendered_sizes: List[RenderedSizes] = []
+        self.render_timings: RenderTimings = {}
         self.data_limit = int(config_read("dictionary", "data_limit") or "0")
         self.dict_data: list[DictEntry]
 
@@ -86,9 +87,10 @@ def main():
     
     g = ProgData()
     
-    dpd_data_list, sizes = generate_dpd_html(
+    dpd_data_list, sizes, timings = generate_dpd_html(
         g.db_session, g.pth, g.rupth, g.sandhi_contractions, g.cf_set, g.idioms_set, g.make_link, g.show_sbs_data, g.lang, g.data_limit)
     g.rendered_sizes.append(sizes)
+    g.render_timings = timings
 
     root_data_list, sizes = generate_root_html(g.db_session, g.pth, g.roots_count_dict, g.rupth, g.lang, g.show_sbs_data)
     g.rendered_sizes.append(sizes)
@@ -113,7 +115,7 @@ def main():
     )
 
     write_limited_datalist(g)
-    write_size_dict(g.pth, sum_rendered_sizes(g.rendered_sizes))
+    write_size_dict(g.pth, sum_rendered_sizes(g.rendered_sizes), g.render_timings)
     prepare_export_to_goldendict_mdict(g)
 
     toc()
@@ -179,7 +181,11 @@ def prepare_export_to_goldendict_mdict(g: ProgData) -> None:
         export_to_mdict(dict_info, dict_var, g.dict_data)
 
 
-def write_size_dict(pth: ProjectPaths, size_dict):
+def write_size_dict(
+        pth: ProjectPaths,
+        size_dict,
+        render_timings: Optional[RenderTimings] = None
+):
     p_green("writing size_dict")
     filename = pth.temp_dir.joinpath("size_dict.tsv")
 
@@ -190,6 +196,30 @@ def write_size_dict(pth: ProjectPaths, size_dict):
 
     p_yes("ok")
 
+    if render_timings:
+        write_render_timings(pth, render_timings)
+
+
+def write_render_timings(pth: ProjectPaths, render_timings: RenderTimings):
+    """Total time, calls and time per call of each section,
+    slowest first. The time is summed across all workers."""
+
+    p_green("writing render_timings")
+    filename = pth.temp_dir.joinpath("render_timings.tsv")
+
+    with open(filename, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile, delimiter='\t')
+        writer.writerow(["section", "seconds", "calls", "ms_per_call"])
+        for section, (seconds, calls) in sorted(
+                render_timings.items(), key=lambda x: x[1][0], reverse=True):
+            writer.writerow([
+                section,
+                f"{seconds:.3f}",
+                calls,
+                f"{seconds / calls * 1000:.4f}"])
+
+    p_yes("ok")
+
 
 def write_limited_datalist(g: ProgData):
     """A limited dataset for troubleshooting purposes"""
@@ -0,0 +1,94 @@
+"""Cache of rendered dictionary entries for incremental exports."""
+
+import hashlib
+import pickle
+import sys
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tools.goldendict_exporter import DictEntry
+from tools.utils import RenderedSizes
+
+CachedEntry = Tuple[DictEntry, RenderedSizes]
+
+
+class RenderCache:
+    """Rendered entries of the last export, keyed by headword.
+    Each entry is stored with the hash of all the data it was rendered from,
+    so an entry is only reused if nothing that went into it has changed.
+
+    The settings key covers everything which affects all entries,
+    i.e. config flags and templates. If it changes, the cache starts empty.
+    Only entries used in this run are saved, so deleted headwords drop out."""
+
+    def __init__(self, cache_path: Path, settings_key: str) -> None:
+        self.cache_path = cache_path
+        self.settings_key = settings_key
+        self.old_entries: Dict[str, Tuple[str, CachedEntry]] = {}
+        self.new_entries: Dict[str, Tuple[str, CachedEntry]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            with open(cache_path, "rb") as f:
+                settings_key_old, entries = pickle.load(f)
+            if settings_key_old == settings_key:
+                self.old_entries = entries
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass
+
+    def get(self, key: str, content_hash: str) -> Optional[CachedEntry]:
+        cached = self.old_entries.get(key)
+        if cached is not None and cached[0] == content_hash:
+            self.hits += 1
+            self.new_entries[key] = cached
+            return cached[1]
+        else:
+            self.misses += 1
+            return None
+
+    def put(self, key: str, content_hash: str, entry: CachedEntry) -> None:
+        self.new_entries[key] = (content_hash, entry)
+
+    def save(self) -> None:
+        with open(self.cache_path, "wb") as f:
+            pickle.dump(
+                (self.settings_key, self.new_entries), f,
+                protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def make_hash(values) -> str:
+    """Hash the repr of some values, which must have a stable repr,
+    i.e. no sets."""
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+def files_key(file_paths: Iterable[Path]) -> list:
+    """The modification time of each file, to invalidate the cache
+    whenever a template or the rendering code changes."""
+    return [
+        (str(file_path), file_path.stat().st_mtime)
+        for file_path in sorted(file_paths)
+        if file_path.exists()]
+
+
+def module_files(root_dir: Path) -> List[Path]:
+    """The files of every module loaded from the project,
+    i.e. the rendering code and all the helpers it imports."""
+    files: List[Path] = []
+    for module in list(sys.modules.values()):
+        file_name = getattr(module, "__file__", None)
+        if file_name is not None:
+            file_path = Path(file_name).resolve()
+            if file_path.is_relative_to(root_dir):
+                files.append(file_path)
+    return files
+
+
+def column_values(row) -> Optional[tuple]:
+    """All the column values of a db row, or None."""
+    if row is None:
+        return None
+    return tuple(
+        getattr(row, column.key) for column in row.__mapper__.column_attrs)
@@ -7,3 +7,5 @@ scripts/db_rebuild_from_tsv.py
 scripts/bash/generate_components.sh
 
 db/frequency/ebt_calculation.py
+
+exporter/dpd_fastapi/snapshot.py
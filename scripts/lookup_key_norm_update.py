@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""Add, fill and index the normalized lookup key
+of the Lookup table in an existing db."""
+
+from rich import print
+from sqlalchemy import inspect, select, text, update
+
+from db.get_db_session import get_db_session
+from db.models import Lookup
+from tools.lookup_key import normalize_lookup_key
+from tools.paths import ProjectPaths
+from tools.tic_toc import tic, toc
+
+
+def main():
+    tic()
+    print("[bright_yellow]normalizing lookup keys")
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    columns = [
+        column["name"]
+        for column in inspect(db_session.get_bind()).get_columns("lookup")]
+    if "lookup_key_norm" not in columns:
+        print("[green]adding column")
+        db_session.execute(text(
+            "ALTER TABLE lookup "
+            "ADD COLUMN lookup_key_norm VARCHAR NOT NULL DEFAULT ''"))
+
+    lookup_keys = db_session.execute(select(Lookup.lookup_key)).scalars().all()
+    print(f"[green]updating [white]{len(lookup_keys):,}")
+    db_session.execute(update(Lookup), [
+        {"lookup_key": key, "lookup_key_norm": normalize_lookup_key(key)}
+        for key in lookup_keys])
+
+    print("[green]indexing")
+    db_session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_lookup_lookup_key_norm "
+        "ON lookup (lookup_key_norm)"))
+
+    db_session.commit()
+    db_session.close()
+    toc()
+
+
+if __name__ == "__main__":
+    main()
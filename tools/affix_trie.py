@@ -0,0 +1,74 @@
+"""A compact trie for finding every known word which is a prefix
+or suffix of a longer word in a single walk."""
+
+import pickle
+
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+class AffixTrie:
+    """Flat trie. Every node is an index into `children` and `flags`.
+    Each word is stored with a flag bit, so several word sets
+    can share the same trie and be searched together with a mask.
+    A reversed trie matches suffixes instead of prefixes."""
+
+    def __init__(self, reverse: bool = False):
+        self.reverse = reverse
+        self.children: List[Dict[str, int]] = [{}]
+        self.flags = bytearray(1)
+
+    def add(self, word: str, flag: int) -> None:
+        if self.reverse:
+            word = word[::-1]
+        node = 0
+        for char in word:
+            child = self.children[node].get(char)
+            if child is None:
+                child = len(self.children)
+                self.children[node][char] = child
+                self.children.append({})
+                self.flags.append(0)
+            node = child
+        self.flags[node] |= flag
+
+    def add_all(self, words: Iterable[str], flag: int) -> None:
+        for word in words:
+            self.add(word, flag)
+
+    def matches(self, word: str, mask: int) -> List[str]:
+        """Return every prefix (or suffix if reversed) of word,
+        including the empty string and the word itself,
+        whose flags match the mask. Longest first."""
+
+        lengths = []
+        if self.flags[0] & mask:
+            lengths.append(0)
+
+        node = 0
+        chars = reversed(word) if self.reverse else word
+        for length, char in enumerate(chars, start=1):
+            child = self.children[node].get(char)
+            if child is None:
+                break
+            node = child
+            if self.flags[node] & mask:
+                lengths.append(length)
+
+        if self.reverse:
+            return [word[len(word)-length:] for length in reversed(lengths)]
+        else:
+            return [word[:length] for length in reversed(lengths)]
+
+    def __len__(self) -> int:
+        return len(self.children)
+
+
+def save_tries(path: Path, *tries: AffixTrie) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(tries, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_tries(path: Path) -> tuple[AffixTrie, ...]:
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -1,9 +1,108 @@
 """A text cleaning machine."""
 
 import re
+
+from pathlib import Path
+from typing import Iterable, Iterator
+
 from rich import print
 from tools.unicode_char import unicode_char
 
+allowed_characters = "aāiīuūeokgṅcjñṭḍṇtdnpbmyrlsvhḷṃṁ\n xfśṣǣæwqḥṛz"
+
+# The replacements run in the same order as they always have, since
+# " - " and "  " are only replaced in what the earlier ones left behind.
+# A str.replace of a character which isn't in the text costs almost
+# nothing, and it beats str.translate and character class regexes on
+# Pāḷi text, so they stay as replacements, read from these tables.
+# Apostrophes are gone before "'\u0306'" could match, so that one,
+# and the repeated ones, are left out.
+
+digits_and_tabs = re.compile(r"[\d\t]")
+leading_spaces = re.compile("^ *")
+trailing_space = re.compile(" $")
+
+replacements = (
+    (".", " "),
+    (",", " "),
+    (";", " "),
+    (":", " "),
+    ("'", ""),
+    ("‘", ""),
+    ("’", ""),
+    ("`", ""),
+    ("“", ""),
+    ("”", ""),
+    ('"', ""),
+    ("!", ""),
+    ("?", ""),
+    ("+", ""),
+    ("*", ""),
+    ("=", ""),
+    ("~", ""),
+    ("\ufeff", ""),
+    ("§", " "),
+    ("‡", " "),
+    ("†", " "),
+    ("$", " "),
+    ("(", " "),
+    (")", " "),
+    ("[", " "),
+    ("]", " "),
+    ("{", " "),
+    ("}", " "),
+    ("/", " "),
+    ("\\", " "),
+    ("<", " "),
+    (">", " "),
+    ("^", " "),
+    (" - ", " "),
+    ("–", ""),
+    ("—", " "),
+    ("_", ""),
+    ("…", " "),
+    ("  ", " "),
+    ("॰", ""),
+    ("ï", "i"),
+    ("ü", "u"),
+    ("ạ", "a"),
+    ("\u0325", ""),
+    ("ใ", ""),
+    ("\xad", ""),
+    ("\xa0", ""),
+    ("\u0306", ""),
+    ("&", ""),
+    ("°", ""),
+)
+
+
+def _clean(text: str, niggahita: str, remove_hyphen: bool) -> str:
+    """Every replacement, without trimming the ends."""
+    text = digits_and_tabs.sub("", text.lower())
+    text = text.replace("\n", " \n")
+    if niggahita == "ṃ":
+        text = text.replace("ṁ", "ṃ")
+    for old, new in replacements:
+        text = text.replace(old, new)
+    if remove_hyphen:
+        text = text.replace("-", "")
+    return text
+
+
+def _print_errors(errors: set[str]) -> None:
+    if len(errors) != 0:
+        print(f"[bright_red]errors:{errors}", end=" ")
+        unicode_errors = [unicode_char(error) for error in errors]
+        for error in unicode_errors:
+            print(f"[bright_red]{error}", end=" ")
+
+
+def _allowed(remove_hyphen: bool) -> str:
+    if remove_hyphen is False:
+        return allowed_characters + "-"
+    return allowed_characters
+
+
 def clean_machine(text: str, niggahita="ṃ", remove_hyphen=True) -> str:
     
     """
@@ -12,88 +111,65 @@ def clean_machine(text: str, niggahita="ṃ", remove_hyphen=True) -> str:
     - optionally keep the hyphen
     """
 
-    allowed_characters = "aāiīuūeokgṅcjñṭḍṇtdnpbmyrlsvhḷṃṁ\n xfśṣǣæwqḥṛz"
+    text = _clean(text, niggahita, remove_hyphen)
+    text = leading_spaces.sub("", text)
+    text = trailing_space.sub("", text)
 
-    text = text.lower()
-    text = re.sub(r"\d", "", text)
-    text = re.sub(r"\t", "", text)
-    text = re.sub(r"\n", r" \n", text)
+    _print_errors(set(text).difference(_allowed(remove_hyphen)))
 
-    if niggahita == "ṃ":
-        text = text.replace("ṁ", "ṃ")
+    return text
 
-    text = text.replace(".", " ")\
-        .replace(",", " ")\
-        .replace(";", " ")\
-        .replace(":", " ")\
-        .replace("'", "")\
-        .replace("‘", "")\
-        .replace("’", "")\
-        .replace("`", "")\
-        .replace("`", "")\
-        .replace("“", "")\
-        .replace("”", "")\
-        .replace('"', "")\
-        .replace("!", "")\
-        .replace("?", "")\
-        .replace("+", "")\
-        .replace("*", "")\
-        .replace("=", "")\
-        .replace("~", "")\
-        .replace("﻿", "")\
-        .replace("§", " ")\
-        .replace("‡", " ")\
-        .replace("†", " ")\
-        .replace("$", " ")\
-        .replace("(", " ")\
-        .replace(")", " ")\
-        .replace("[", " ")\
-        .replace("]", " ")\
-        .replace("{", " ")\
-        .replace("}", " ")\
-        .replace("/", " ")\
-        .replace("\\", " ")\
-        .replace("<", " ")\
-        .replace(">", " ")\
-        .replace("^", " ")\
-        .replace(" - ", " ")\
-        .replace("–", "")\
-        .replace("—", " ")\
-        .replace("_", "")\
-        .replace("–", "")\
-        .replace("…", " ")\
-        .replace("  ", " ")\
-        .replace("॰", "")\
-        .replace("ï", "i")\
-        .replace("ü", "u")\
-        .replace("ạ", "a")\
-        .replace('̥', "")\
-        .replace("'̆'", "")\
-        .replace("ใ", "")\
-        .replace("'̆'", "")\
-        .replace("\xad", "")\
-        .replace("\xa0", "")\
-        .replace("\u0306", "")\
-        .replace("&", "")\
-        .replace("°", "")
-    
-    if remove_hyphen:
-        text = text.replace("-", "")\
 
-    text = re.sub("^ *", "", text)
-    text = re.sub(" $", "", text)
+def clean_machine_chunks(
+        chunks: Iterable[str], niggahita="ṃ", remove_hyphen=True
+) -> Iterator[str]:
+    """Clean a text in chunks, e.g. the lines of a large file, with the
+    same result as clean_machine on the whole text joined together.
 
-    if remove_hyphen == False:
-        allowed_characters += "-"
-    errors = set([c for c in text if c not in allowed_characters])
+    Each chunk must end with a newline, except the last, as no
+    replacement spans a newline. The spaces at the start of the text
+    and the last two characters, which the trimming depends on,
+    are held back until they are known."""
 
+    allowed = _allowed(remove_hyphen)
+    errors: set[str] = set()
+    at_start = True
+    tail = ""
 
-    if len(errors) != 0:
-        print(f"[bright_red]errors:{errors}", end=" ")
-        unicode_errors = [unicode_char(error) for error in errors]
-        for error in unicode_errors:
-            print(f"[bright_red]{error}", end=" ")
+    for chunk in chunks:
+        text = _clean(chunk, niggahita, remove_hyphen)
+        if at_start:
+            text = text.lstrip(" ")
+            if not text:
+                continue
+            at_start = False
+        errors.update(text)
+        text = tail + text
+        tail = text[-2:]
+        if text[:-2]:
+            yield text[:-2]
 
-    return text
+    tail = trailing_space.sub("", tail)
+    if tail:
+        yield tail
+
+    _print_errors(errors.difference(allowed))
+
+
+def clean_machine_file(
+        file_path: Path, niggahita="ṃ", remove_hyphen=True,
+        chunk_size=1 << 20
+) -> Iterator[str]:
+    """Clean a large file in chunks of about chunk_size characters."""
+
+    def read_lines() -> Iterator[str]:
+        with open(file_path) as f:
+            while True:
+                lines = f.readlines(chunk_size)
+                if not lines:
+                    break
+                yield "".join(lines)
+
+    return clean_machine_chunks(read_lines(), niggahita, remove_hyphen)
 
 # clean_machine("½¾")
\ No newline at end of file
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+"""Benchmark clean_machine against the chain of replacements it replaced,
+over the CST corpus."""
+
+import re
+import time
+import tracemalloc
+
+from pathlib import Path
+
+from rich import print
+
+from tools.clean_machine import clean_machine, clean_machine_file
+from tools.paths import ProjectPaths
+
+
+def clean_machine_chained(text: str, niggahita="ṃ", remove_hyphen=True) -> str:
+    """The original clean_machine, one replacement at a time,
+    without the error report."""
+
+    text = text.lower()
+    text = re.sub(r"\d", "", text)
+    text = re.sub(r"\t", "", text)
+    text = re.sub(r"\n", r" \n", text)
+
+    if niggahita == "ṃ":
+        text = text.replace("ṁ", "ṃ")
+
+    text = text.replace(".", " ")\
+        .replace(",", " ")\
+        .replace(";", " ")\
+        .replace(":", " ")\
+        .replace("'", "")\
+        .replace("‘", "")\
+        .replace("’", "")\
+        .replace("`", "")\
+        .replace("`", "")\
+        .replace("“", "")\
+        .replace("”", "")\
+        .replace('"', "")\
+        .replace("!", "")\
+        .replace("?", "")\
+        .replace("+", "")\
+        .replace("*", "")\
+        .replace("=", "")\
+        .replace("~", "")\
+        .replace("\ufeff", "")\
+        .replace("§", " ")\
+        .replace("‡", " ")\
+        .replace("†", " ")\
+        .replace("$", " ")\
+        .replace("(", " ")\
+        .replace(")", " ")\
+        .replace("[", " ")\
+        .replace("]", " ")\
+        .replace("{", " ")\
+        .replace("}", " ")\
+        .replace("/", " ")\
+        .replace("\\", " ")\
+        .replace("<", " ")\
+        .replace(">", " ")\
+        .replace("^", " ")\
+        .replace(" - ", " ")\
+        .replace("–", "")\
+        .replace("—", " ")\
+        .replace("_", "")\
+        .replace("–", "")\
+        .replace("…", " ")\
+        .replace("  ", " ")\
+        .replace("॰", "")\
+        .replace("ï", "i")\
+        .replace("ü", "u")\
+        .replace("ạ", "a")\
+        .replace("\u0325", "")\
+        .replace("'\u0306'", "")\
+        .replace("ใ", "")\
+        .replace("'\u0306'", "")\
+        .replace("\xad", "")\
+        .replace("\xa0", "")\
+        .replace("\u0306", "")\
+        .replace("&", "")\
+        .replace("°", "")
+
+    if remove_hyphen:
+        text = text.replace("-", "")
+
+    text = re.sub("^ *", "", text)
+    text = re.sub(" $", "", text)
+    return text
+
+
+def time_cleaner(cleaner, texts: list[str]) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    results = [cleaner(text) for text in texts]
+    return time.perf_counter() - start, results
+
+
+def peak_memory(cleaner, file_path: Path) -> float:
+    tracemalloc.start()
+    cleaner(file_path)
+    __current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    print("[bright_yellow]clean_machine benchmarks")
+    pth = ProjectPaths()
+
+    file_paths = sorted(pth.cst_txt_dir.glob("*.txt"))
+    if not file_paths:
+        print("[red]no cst texts, run cst4_xml_to_txt.py first")
+        return
+
+    print(f"[green]reading {len(file_paths)} files", end=" ")
+    texts = [file_path.read_text() for file_path in file_paths]
+    size = sum(len(text) for text in texts)
+    print(f"[white]{size / 1024 / 1024:.1f}M characters")
+
+    print("[green]cleaning")
+    chained_time, chained_results = time_cleaner(clean_machine_chained, texts)
+    compiled_time, compiled_results = time_cleaner(clean_machine, texts)
+    start = time.perf_counter()
+    chunked_results = [
+        "".join(clean_machine_file(file_path)) for file_path in file_paths]
+    chunked_time = time.perf_counter() - start
+
+    print(f"{'chained':<20}{chained_time:>10.4f}s")
+    print(f"{'compiled':<20}{compiled_time:>10.4f}s")
+    print(f"{'chunked':<20}{chunked_time:>10.4f}s")
+    print(f"{'speedup':<20}{chained_time / compiled_time:>10.1f}x")
+
+    different = sum(
+        1 for chained, compiled, chunked
+        in zip(chained_results, compiled_results, chunked_results)
+        if not chained == compiled == chunked)
+    if different:
+        print(f"[red]{different} files cleaned differently")
+    else:
+        print("[green]all files cleaned the same")
+
+    largest = max(file_paths, key=lambda x: x.stat().st_size)
+    print(f"[green]peak memory cleaning {largest.name}")
+    whole_peak = peak_memory(lambda x: clean_machine(x.read_text()), largest)
+    chunked_peak = peak_memory(
+        lambda x: sum(len(chunk) for chunk in clean_machine_file(x)), largest)
+    print(f"{'whole file':<20}{whole_peak:>10.2f}MB")
+    print(f"{'chunked':<20}{chunked_peak:>10.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,9 @@ DEFAULT_CONFIG = {
     "deconstructor": {
         "include_cloud": "no",
         "all_texts": "no",
-        "run_on_cloud": "no"
+        "run_on_cloud": "no",
+        "multiprocess": "no",
+        "checkpoint": "no"
     },
     "gui": {
         "theme": "DarkGrey10",
@@ -54,6 +56,8 @@ DEFAULT_CONFIG = {
         "show_ebt_count": "no",
         "show_sbs_data": "no",
         "data_limit": "0",
+        "incremental": "no",
+        "render_timings": "no",
     },
     "exporter" : {
         "language": "en",
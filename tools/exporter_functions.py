@@ -1,6 +1,7 @@
 from sqlalchemy.orm import object_session
+from sqlalchemy.orm.session import Session
 
-from typing import List
+from typing import Dict, List, TypeVar
 
 from db.models import DpdHeadwords, FamilyIdiom
 from db.models import FamilyCompound
@@ -10,6 +11,8 @@ from tools.paths import ProjectPaths
 
 pth = ProjectPaths()
 
+T = TypeVar("T")
+
 
 def get_family_compounds(i: DpdHeadwords) -> List[FamilyCompound]:
     db_session = object_session(i)
@@ -82,3 +85,34 @@ def get_family_set(i: DpdHeadwords) -> List[FamilySet]:
     fs = list(fs)
 
     return fs
+
+
+class PrefetchedFamilies:
+    """Compound, idiom and set families loaded once into dicts,
+    for exporters which render every headword.
+    Same results as the get_family_ functions, without a query per word."""
+
+    def __init__(self, db_session: Session):
+        self.compounds: Dict[str, FamilyCompound] = {
+            fc.compound_family: fc
+            for fc in db_session.query(FamilyCompound).all()}
+        self.idioms: Dict[str, FamilyIdiom] = {
+            fi.idiom: fi
+            for fi in db_session.query(FamilyIdiom).all()}
+        self.sets: Dict[str, FamilySet] = {
+            fs.set: fs
+            for fs in db_session.query(FamilySet).all()}
+
+    def get_family_compounds(self, i: DpdHeadwords) -> List[FamilyCompound]:
+        return lookup_in_order(self.compounds, i.family_compound_list)
+
+    def get_family_idioms(self, i: DpdHeadwords) -> List[FamilyIdiom]:
+        return lookup_in_order(self.idioms, i.family_idioms_list)
+
+    def get_family_set(self, i: DpdHeadwords) -> List[FamilySet]:
+        return lookup_in_order(self.sets, i.family_set_list)
+
+
+def lookup_in_order(family_dict: Dict[str, T], keys: List[str]) -> List[T]:
+    """Every family found in the dict, once each, in the order of the keys."""
+    return [family_dict[key] for key in dict.fromkeys(keys) if key in family_dict]
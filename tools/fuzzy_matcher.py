@@ -0,0 +1,113 @@
+"""Find the closest matches to a word in a large word list,
+like difflib.get_close_matches, but in milliseconds."""
+
+import numpy as np
+import pickle
+
+from collections import Counter
+from difflib import SequenceMatcher
+from heapq import heappush, heappushpop
+from itertools import chain
+from math import ceil, floor
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from tools.lookup_key import normalize_lookup_key
+
+
+class FuzzyMatcher:
+    """The character counts of the normalized words, sorted by length.
+
+    difflib's quick_ratio, which no ratio can exceed, only depends on
+    the characters two words have in common, so a search works it out
+    for all the words of a possible length at once. Only the words whose
+    quick_ratio could still make the top n are scored with difflib's
+    SequenceMatcher, best first, so the results are the same as
+    get_close_matches, without scoring every word in the list."""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words: List[str] = sorted(set(words))
+        self.keys: List[str] = [normalize_lookup_key(word) for word in self.words]
+
+        # the words sorted by length, and how often each character
+        # appears in each of them, capped at 255
+        self.length_order = np.array(
+            sorted(range(len(self.keys)), key=lambda x: len(self.keys[x])),
+            dtype=np.uint32)
+        self.sorted_lengths = np.array(
+            [len(self.keys[x]) for x in self.length_order], dtype=np.int64)
+        self.chars: Dict[str, int] = {
+            char: column for column, char
+            in enumerate(sorted(set(chain.from_iterable(self.keys))))}
+        self.char_counts = np.zeros(
+            (len(self.keys), len(self.chars)), dtype=np.uint8)
+        for row, word_id in enumerate(self.length_order):
+            for char, count in Counter(self.keys[word_id]).items():
+                self.char_counts[row, self.chars[char]] = min(count, 255)
+
+    def get_close_matches(
+            self,
+            word: str,
+            n: int = 10,
+            cutoff: float = 0.7
+    ) -> List[str]:
+        """The n closest words scoring at least cutoff, best first,
+        ranked like get_close_matches."""
+
+        key = normalize_lookup_key(word)
+        if not key:
+            return []
+
+        # ratio = 2 * matches / total length, so longer or shorter words
+        # can't reach the cutoff
+        min_len = len(key) * cutoff / (2 - cutoff)
+        max_len = len(key) * (2 - cutoff) / cutoff
+        start = np.searchsorted(self.sorted_lengths, ceil(min_len))
+        stop = np.searchsorted(self.sorted_lengths, floor(max_len), "right")
+
+        key_chars = Counter(key)
+        columns = [self.chars[char] for char in key_chars if char in self.chars]
+        if start >= stop or not columns:
+            return []
+
+        # the quick_ratio of every word of a possible length,
+        # computed as difflib does
+        key_char_counts = np.array(
+            [key_chars[char] for char in key_chars if char in self.chars])
+        matches = np.minimum(
+            self.char_counts[start:stop, columns], key_char_counts).sum(axis=1)
+        quick_ratios = \
+            2.0 * matches / (self.sorted_lengths[start:stop] + len(key))
+
+        # the best n (score, word) so far, worst first
+        top: List[Tuple[float, str]] = []
+
+        # best quick_ratio first, stopping once none is left which could
+        # beat the worst of the top n. Equal scores rank by word,
+        # so ties go on.
+        rows = np.flatnonzero(quick_ratios >= cutoff)
+        rows = rows[np.argsort(-quick_ratios[rows], kind="stable")]
+        s = SequenceMatcher()
+        s.set_seq2(key)
+        for row in rows:
+            if len(top) == n and quick_ratios[row] < top[0][0]:
+                break
+            word_id = self.length_order[start + row]
+            s.set_seq1(self.keys[word_id])
+            score = s.ratio()
+            if score >= cutoff:
+                if len(top) < n:
+                    heappush(top, (score, self.words[word_id]))
+                else:
+                    heappushpop(top, (score, self.words[word_id]))
+
+        return [x for __score, x in sorted(top, reverse=True)]
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: Path) -> "FuzzyMatcher":
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""Check FuzzyMatcher against difflib.get_close_matches on the headwords
+of dpd.db, with one letter of a headword changed as the search."""
+
+import difflib
+import random
+import time
+
+from rich import print
+
+from db.get_db_session import get_read_only_sessionmaker
+from exporter.dpd_fastapi.snapshot import make_headwords_clean_set
+from tools.fuzzy_matcher import FuzzyMatcher
+from tools.lookup_key import normalize_lookup_key
+from tools.paths import ProjectPaths
+
+sample_size = 200
+random_seed = 108
+pali_letters = "aāiīuūeokgṅcjñṭḍṇtdnpbmyrlsvhḷṃ"
+
+
+def make_searches(words: list[str]) -> list[str]:
+    """Headwords with one letter changed, half of them short ones."""
+    rng = random.Random(random_seed)
+    short_words = [word for word in words if len(word) <= 5]
+    searches = []
+    for word in rng.sample(words, sample_size // 2) \
+            + rng.sample(short_words, sample_size // 2):
+        x = rng.randrange(len(word))
+        searches.append(word[:x] + rng.choice(pali_letters) + word[x + 1:])
+    return searches
+
+
+def main():
+    print("[bright_yellow]fuzzy matcher check")
+    pth = ProjectPaths()
+    if not pth.dpd_db_path.exists():
+        print("[red]no dpd.db")
+        return
+
+    SessionLocal = get_read_only_sessionmaker(pth.dpd_db_path)
+    db_session = SessionLocal()
+    words = sorted(make_headwords_clean_set(db_session))
+    db_session.close()
+
+    print(f"[green]indexing {len(words):,} words")
+    fuzzy_matcher = FuzzyMatcher(words)
+    searches = make_searches([word for word in words if " " not in word])
+
+    print(f"[green]searching {len(searches)} words")
+    difflib_time = matcher_time = 0.0
+    different = 0
+    for search in searches:
+        start = time.perf_counter()
+        expected = difflib.get_close_matches(
+            normalize_lookup_key(search), fuzzy_matcher.keys, 10, 0.7)
+        difflib_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = fuzzy_matcher.get_close_matches(search, 10, 0.7)
+        matcher_time += time.perf_counter() - start
+
+        # compared as keys, as difflib has no normalization
+        result = [normalize_lookup_key(word) for word in result]
+
+        if result != expected:
+            different += 1
+            print(f"[red]{search}[/red] {expected} {result}")
+
+    print(f"{'difflib':<20}{difflib_time / len(searches) * 1000:>10.2f}ms")
+    print(f"{'fuzzy matcher':<20}{matcher_time / len(searches) * 1000:>10.2f}ms")
+    if different:
+        print(f"[red]{different} searches matched differently")
+    else:
+        print("[green]all searches matched the same")
+
+
+if __name__ == "__main__":
+    main()
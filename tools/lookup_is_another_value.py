@@ -10,7 +10,7 @@ def is_another_value(
     """
 
     for column in Lookup.__table__.columns:
-        if column.name not in ["lookup_key", column_name]:
+        if column.name not in ["lookup_key", "lookup_key_norm", column_name]:
             if getattr(row, column.name):
                 return True
     return False
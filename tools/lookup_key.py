@@ -0,0 +1,7 @@
+"""Normalize Lookup table keys, so searches can match them exactly
+on an index instead of a case-insensitive scan."""
+
+
+def normalize_lookup_key(key: str) -> str:
+    """Fold case and niggahitas (ṁ to ṃ)."""
+    return key.replace("ṁ", "ṃ").casefold()
@@ -155,6 +155,7 @@ class ProjectPaths:
         self.tipitaka_raw_text_path = base_dir / "db/frequency/output/raw_text/tipitaka.txt"
         self.tipitaka_word_count_path = base_dir / "db/frequency/output/word_count/tipitaka.csv"
         self.word_count_dir = base_dir / "db/frequency/output/word_count"
+        self.word_count_store_path = base_dir / "db/frequency/output/word_count/sections.bin"
 
         # exporter/grammar_dict/output
         self.grammar_dict_output_dir = base_dir / "exporter/grammar_dict/output"
@@ -268,6 +269,7 @@ class ProjectPaths:
         self.tpr_release_path = base_dir / "resources/tpr_downloads/release_zips/dpd.zip"
 
         # db/deconstructor/assets
+        self.affix_tries_path = base_dir / "db/deconstructor/assets/affix_tries"
         self.all_inflections_set_path = base_dir / "db/deconstructor/assets/all_inflections_set"
         self.matches_dict_path = base_dir / "db/deconstructor/assets/matches_dict"
         self.neg_inflections_set_path = base_dir / "db/deconstructor/assets/neg_inflections_set"
@@ -286,6 +288,9 @@ class ProjectPaths:
         self.sandhi_log_path = base_dir / "db/deconstructor/output/logfile.log"
         self.sandhi_output_dir = base_dir / "db/deconstructor/output/"
         self.sandhi_output_do_dir = base_dir / "db/deconstructor/output_do/"
+        self.sandhi_shards_dir = base_dir / "db/deconstructor/output/shards/"
+        self.sandhi_checkpoints_dir = base_dir / "db/deconstructor/output/checkpoints/"
+        self.sandhi_checkpoints_inputs_path = base_dir / "db/deconstructor/output/checkpoints/inputs_hash"
         self.sandhi_timer_path = base_dir / "db/deconstructor/output/timer.tsv"
         self.unmatched_path = base_dir / "db/deconstructor/output/unmatched.tsv"
 
@@ -320,17 +325,17 @@ class ProjectPaths:
 
         # share
         self.all_tipitaka_words_path = base_dir / "share/all_tipitaka_words"
-        self.changed_headwords_path = base_dir / "share/changed_headwords"
-        self.headword_stem_pattern_dict_path = base_dir / "share/headword_stem_pattern_dict"
-        self.inflection_templates_pickle_path = base_dir / "share/inflection_templates"
+        self.changed_inflections_path = base_dir / "share/changed_inflections"
+        self.inflection_fingerprints_path = base_dir / "share/inflection_fingerprints"
         self.inflections_from_translit_json_path = base_dir / "share/inflections_from_translit.json"
         self.inflections_to_translit_json_path = base_dir / "share/inflections_to_translit.json"
         self.lookup_from_translit_path = base_dir / "share/lookup_from_translit.json"
         self.lookup_to_translit_path = base_dir / "share/lookup_to_translit.json"
-        self.template_changed_path = base_dir / "share/changed_templates"
 
         # temp
         self.temp_dir = base_dir / "temp/"
+        self.dpd_render_cache_path = base_dir / "temp/dpd_render_cache"
+        self.dpd_fastapi_snapshot_path = base_dir / "temp/dpd_fastapi_snapshot"
 
         # tests/
         self.antonym_dict_path = base_dir / "tests/test_antonyms.json"
@@ -376,6 +381,8 @@ class ProjectPaths:
             self.sandhi_assests_dir,
             self.sandhi_output_dir,
             self.sandhi_output_do_dir,
+            self.sandhi_shards_dir,
+            self.sandhi_checkpoints_dir,
             self.share_dir,
             self.stash_dir,
             self.temp_dir,
@@ -1,4 +1,4 @@
-from typing import List, TypedDict
+from typing import Dict, List, Tuple, TypedDict
 
 class RenderedSizes(TypedDict):
     dpd_header: int
@@ -79,6 +79,21 @@ def sum_rendered_sizes(sizes: List[RenderedSizes]) -> RenderedSizes:
             res[k] += v
     return res
 
+# section: (seconds, calls)
+RenderTimings = Dict[str, Tuple[float, int]]
+
+def add_render_timing(timings: RenderTimings, section: str, seconds: float) -> None:
+    total_seconds, calls = timings.get(section, (0.0, 0))
+    timings[section] = (total_seconds + seconds, calls + 1)
+
+def sum_render_timings(timings_list: List[RenderTimings]) -> RenderTimings:
+    res: RenderTimings = {}
+    for timings in timings_list:
+        for section, (seconds, calls) in timings.items():
+            total_seconds, total_calls = res.get(section, (0.0, 0))
+            res[section] = (total_seconds + seconds, total_calls + calls)
+    return res
+
 def list_into_batches(input_list: List, num_batches: int) -> List[List]:
     """Splits a list into a number of lists.
 